@@ -30,6 +30,7 @@ import os
 from typing import Dict, Any, List
 
 from ..tools import DocumentParserTool, ContentFillerTool, StyleGeneratorTool, VirtualReviewerTool, MeetingReviewTool, DocumentOutputTool
+from ..tools.artifact_store import get_artifact_store
 from ..guidance import ScenarioInferenceModule
 
 class MockLLMClient:
@@ -76,7 +77,8 @@ class AgentOrchestrator:
             "confirmed_scenario": None,
             "selected_reviewers": [],
             "review_results": [],
-            "final_output_path": None
+            "final_output_path": None,
+            "final_output_filename": None
         }
 
     def process_document(self, file_path: str, initial_action: str = None) -> Dict[str, Any]:
@@ -149,7 +151,16 @@ class AgentOrchestrator:
                 if "error" in output_result:
                     print(f"Error saving final output: {output_result['error']}")
                 else:
-                    print(f"Final processed summary saved to: {self.current_state['final_output_path']}.txt")
+                    # 移入生成文件存储，由其按保存期限与总大小清理
+                    saved_path = f"{self.current_state['final_output_path']}.txt"
+                    try:
+                        artifact = get_artifact_store().put_file(saved_path, move=True)
+                        self.current_state["final_output_path"] = os.path.splitext(artifact.path)[0]
+                        self.current_state["final_output_filename"] = artifact.filename
+                        saved_path = artifact.path
+                    except Exception as e:
+                        print(f"Warning: Failed to move output into artifact store: {e}")
+                    print(f"Final processed summary saved to: {saved_path}")
 
         else:
             print("No reviewers selected, skipping review and meeting simulation.")
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量格式应用引擎
+
+把格式模板一次性编译为样式计划（段落类型 → 预先解析好的样式），
+再用进程池把样式计划应用到大批文件上，逐个文件汇报进度与错误。
+模板 JSON 只加载、解析一次；样式在每个输出文档的 styles.xml 中各定义一次，
+段落只按类型引用样式 ID，由 StyledDocxWriter 批量写入。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import os
+import re
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator, Iterable
+
+try:
+    from docx.shared import Inches
+    from ..tools.docx_writer import StyledDocxWriter
+except ImportError:
+    print("Warning: python-docx not installed. Batch format application will be unavailable.")
+
+from ..tools.docx_reader import DocxStreamReader, DocxParagraph, DocxTable
+
+logger = logging.getLogger(__name__)
+
+# 文件数少于该值时串行处理，进程池启动开销不划算
+PARALLEL_BATCH_THRESHOLD = 4
+
+# 进度回调：(已完成数, 总数, 文件名, 单文件结果)
+ProgressCallback = Callable[[int, int, str, Dict[str, Any]], None]
+
+
+def identify_content_type(text: str, style_name: str) -> Tuple[str, int]:
+    """根据样式名称与文本特征识别内容类型，返回 (类型, 级别)"""
+    text = text.strip()
+
+    # 基于样式名称判断
+    if "Title" in style_name:
+        return "title", 0
+    elif "Heading" in style_name:
+        match = re.search(r"Heading (\d+)", style_name)
+        return "heading", int(match.group(1)) if match else 1
+
+    # 基于文本模式判断
+    if len(text) < 50 and not text.endswith('。') and not text.endswith('：'):
+        # 可能是标题
+        if re.match(r'^[一二三四五六七八九十]+[、.]', text):
+            return "heading", 1
+        elif re.match(r'^\d+[、.]', text):
+            return "heading", 2
+        elif re.match(r'^[（(]\d+[）)]', text):
+            return "heading", 3
+        else:
+            return "title", 0
+
+    # 列表项
+    if re.match(r'^\s*[-*+]\s', text) or re.match(r'^\s*\d+\.\s', text):
+        return "list", 1
+
+    # 默认为段落
+    return "paragraph", 0
+
+
+@dataclass
+class StyleSpec:
+    """单一段落类型的样式（字号、间距、缩进单位为磅，页面尺寸单位为英寸）"""
+    font_name: Optional[str] = None
+    size: Optional[float] = None
+    bold: Optional[bool] = None
+    italic: Optional[bool] = None
+    underline: Optional[bool] = None
+    color: Optional[str] = None
+    alignment: Optional[str] = None
+    line_spacing: Optional[float] = None
+    space_before: Optional[float] = None
+    space_after: Optional[float] = None
+    first_line_indent: Optional[float] = None
+    left_indent: Optional[float] = None
+    right_indent: Optional[float] = None
+
+    @classmethod
+    def from_template_style(cls, style_info: Dict[str, Any]) -> Optional["StyleSpec"]:
+        """由模板 JSON 中的 {"font": {...}, "paragraph": {...}} 样式生成"""
+        if not style_info:
+            return None
+        font = style_info.get("font") or {}
+        para = style_info.get("paragraph") or {}
+        color = font.get("color")
+        return cls(
+            font_name=font.get("name"),
+            size=font.get("size"),
+            bold=font.get("bold"),
+            italic=font.get("italic"),
+            underline=font.get("underline"),
+            color=None if color in (None, "#000000", "000000") else color,
+            alignment=para.get("alignment"),
+            line_spacing=para.get("line_spacing"),
+            space_before=para.get("space_before"),
+            space_after=para.get("space_after"),
+            first_line_indent=para.get("first_line_indent") or None,
+            left_indent=para.get("left_indent") or None,
+            right_indent=para.get("right_indent") or None,
+        )
+
+
+@dataclass
+class StylePlan:
+    """编译后的模板：段落类型 → 样式。只包含普通数据，可以直接传给工作进程"""
+    template_id: str
+    document_type: str = "docx"
+    page: Dict[str, float] = field(default_factory=dict)
+    styles: Dict[str, StyleSpec] = field(default_factory=dict)
+    table_style_name: str = "Table Grid"
+
+    def style_key_for(self, element_type: str, level: int = 0) -> Optional[str]:
+        """按类型取样式键：缺少的标题级别取上一级，列表 / 单元格缺省时使用正文样式"""
+        if element_type == "heading":
+            for candidate in range(max(level, 1), 0, -1):
+                if f"heading_{candidate}" in self.styles:
+                    return f"heading_{candidate}"
+            return "paragraph" if "paragraph" in self.styles else None
+        if element_type in ("list", "table_cell") and element_type not in self.styles:
+            return "paragraph" if "paragraph" in self.styles else None
+        return element_type if element_type in self.styles else None
+
+    def spec_for(self, element_type: str, level: int = 0) -> Optional[StyleSpec]:
+        key = self.style_key_for(element_type, level)
+        return self.styles[key] if key else None
+
+
+def compile_style_plan(template_id: str, template_data: Dict[str, Any]) -> StylePlan:
+    """把模板 JSON（PreciseFormatExtractor 保存的格式）编译为样式计划"""
+    styles: Dict[str, StyleSpec] = {}
+
+    def add(name: str, style_info: Dict[str, Any]):
+        spec = StyleSpec.from_template_style(style_info)
+        if spec:
+            styles[name] = spec
+
+    add("title", template_data.get("title_style"))
+    # 模板保存为 JSON 后标题级别的键变为字符串
+    for level, style_info in (template_data.get("heading_styles") or {}).items():
+        add(f"heading_{int(level)}", style_info)
+    add("paragraph", template_data.get("paragraph_style"))
+    add("list", (template_data.get("list_styles") or {}).get("1") or (template_data.get("list_styles") or {}).get(1))
+
+    table_styles = template_data.get("table_styles") or []
+    table_style_name = "Table Grid"
+    if table_styles and isinstance(table_styles[0], dict):
+        table_style_name = table_styles[0].get("style_name") or table_style_name
+        add("table_cell", table_styles[0].get("cell_styles"))
+
+    page = {key: float(value) for key, value in (template_data.get("page_style") or {}).items()
+            if key in ("width", "height", "margin_top", "margin_bottom", "margin_left", "margin_right") and value}
+
+    return StylePlan(template_id=template_id, document_type=template_data.get("document_type", "docx"),
+                     page=page, styles=styles, table_style_name=table_style_name)
+
+
+# ==================== 样式计划的应用 ====================
+
+def _style_definition(key: str, spec: StyleSpec) -> Dict[str, Any]:
+    """样式计划中的一项 → StyledDocxWriter.define_paragraph_style 的参数"""
+    match = re.match(r"heading_(\d+)$", key)
+    return {
+        "font_name": spec.font_name,
+        "size": spec.size,
+        "bold": spec.bold,
+        "italic": spec.italic,
+        "underline": spec.underline,
+        "color": spec.color,
+        "alignment": spec.alignment,
+        "line_spacing": spec.line_spacing,
+        "space_before": spec.space_before,
+        "space_after": spec.space_after,
+        "first_line_indent": spec.first_line_indent,
+        "left_indent": spec.left_indent,
+        "right_indent": spec.right_indent,
+        "outline_level": int(match.group(1)) - 1 if match else None,
+    }
+
+
+class _PlanApplier:
+    """在单个进程内应用样式计划：样式在每个输出文档的 styles.xml 中各定义一次，段落只引用样式 ID"""
+
+    def __init__(self, plan: StylePlan):
+        self.plan = plan
+        self._definitions = {key: _style_definition(key, spec) for key, spec in plan.styles.items()}
+        self._page = {name: Inches(value) for name, value in plan.page.items()}
+
+    def setup_page(self, doc):
+        section = doc.sections[0]
+        for name, value in self._page.items():
+            setattr(section, {"width": "page_width", "height": "page_height"}.get(name, name), value)
+
+    def write(self, elements: Iterable[Tuple[str, int, Any]], output_path: str) -> Dict[str, Any]:
+        """
+        按样式计划写出 Word 文档。
+
+        Args:
+            elements: (类型, 级别, 文本) 序列；表格为 ("table", 0, 行列表)
+            output_path: 输出路径
+        """
+        writer = StyledDocxWriter()
+        self.setup_page(writer.document)
+        style_ids = {key: writer.define_paragraph_style(f"AiDoc {key}", **definition)
+                     for key, definition in self._definitions.items()}
+
+        counts = {"paragraphs": 0, "tables": 0}
+        for element_type, level, content in elements:
+            if element_type == "table":
+                writer.add_table(content, self.plan.table_style_name,
+                                 style_ids.get(self.plan.style_key_for("table_cell")))
+                counts["tables"] += 1
+            else:
+                writer.add_paragraph(content, style_ids.get(self.plan.style_key_for(element_type, level)))
+                counts["paragraphs"] += 1
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        writer.save(output_path)
+        return {
+            "success": True,
+            "output_path": output_path,
+            "file_size": os.path.getsize(output_path),
+            "template_id": self.plan.template_id,
+            **counts
+        }
+
+    def format_file(self, source_path: str, output_path: str) -> Dict[str, Any]:
+        """读取源文件，按样式计划生成格式化后的 Word 文档"""
+        start = time.time()
+        result = self.write(_iter_source_elements(source_path), output_path)
+        result["elapsed"] = round(time.time() - start, 3)
+        return result
+
+
+def write_styled_document(plan: StylePlan, elements: Iterable[Tuple[str, int, Any]],
+                          output_path: str) -> Dict[str, Any]:
+    """按样式计划把内容元素写成 Word 文档（单个文件，不经过进程池）"""
+    return _PlanApplier(plan).write(elements, output_path)
+
+
+class _TextParagraph:
+    """纯文本源文件中的一行"""
+    style_name = "Normal"
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _iter_source_elements(source_path: str) -> Iterator[Tuple[str, int, Any]]:
+    """
+    按文档顺序产出源文件的内容元素 (类型, 级别, 文本)，表格为 ("table", 0, 行列表)。
+    .docx 流式解析，其他文件按 UTF-8 文本逐行读取。
+    """
+    if source_path.lower().endswith(".docx"):
+        blocks = DocxStreamReader(source_path).iter_blocks()
+    else:
+        with open(source_path, "r", encoding="utf-8", errors="replace") as file:
+            blocks = [_TextParagraph(line) for line in file]
+
+    for block in blocks:
+        if isinstance(block, DocxTable):
+            rows = [[cell.strip() for cell in row] for row in block.rows]
+            if rows:
+                yield "table", 0, rows
+        elif isinstance(block, (DocxParagraph, _TextParagraph)):
+            text = block.text.strip()
+            if text:
+                element_type, level = identify_content_type(text, block.style_name or "Normal")
+                yield element_type, level, text
+
+
+def output_path_for(source_path: str, output_dir: str) -> str:
+    """输出文件路径：与源文件同名，扩展名改为 .docx"""
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(output_dir, stem + ".docx")
+
+
+# ==================== 进程池 ====================
+
+_worker_applier: Optional[_PlanApplier] = None
+
+
+def _init_format_worker(plan: StylePlan):
+    """工作进程初始化：样式计划只随初始化参数传输一次"""
+    global _worker_applier
+    _worker_applier = _PlanApplier(plan)
+
+
+def _format_file_job(source_path: str, output_path: str) -> Dict[str, Any]:
+    """进程池任务：格式化单个文件"""
+    try:
+        return _worker_applier.format_file(source_path, output_path)
+    except Exception as e:
+        return {"error": f"格式应用失败: {str(e)}"}
+
+
+class BatchFormatEngine:
+    """批量格式应用引擎"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: 进程数，默认 CPU 核数
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def run(self, plan: StylePlan, source_files: List[str], output_dir: str,
+            progress_callback: Optional[ProgressCallback] = None, parallel: bool = True) -> Dict[str, Any]:
+        """
+        把样式计划应用到一批文件。
+
+        Returns:
+            {"success", "results": {文件名: 结果}, "total", "succeeded", "failed", "elapsed"}
+            单个文件失败时其结果为 {"error": ...}，不影响其他文件
+        """
+        start = time.time()
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = [(path, output_path_for(path, output_dir)) for path in source_files]
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for index, (path, result) in enumerate(self._run_jobs(plan, jobs, parallel), 1):
+            results[os.path.basename(path)] = result
+            if progress_callback:
+                try:
+                    progress_callback(index, len(jobs), os.path.basename(path), result)
+                except Exception as e:
+                    logger.warning(f"进度回调失败: {e}")
+
+        failed = sum(1 for result in results.values() if "error" in result)
+        return {
+            "success": True,
+            "template_id": plan.template_id,
+            "results": results,
+            "total": len(jobs),
+            "succeeded": len(jobs) - failed,
+            "failed": failed,
+            "elapsed": round(time.time() - start, 3)
+        }
+
+    def _run_jobs(self, plan: StylePlan, jobs: List[Tuple[str, str]],
+                  parallel: bool) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """执行格式化任务，按完成顺序产出 (源文件, 结果)"""
+        pending = list(jobs)
+        workers = min(self.max_workers, len(pending))
+        if parallel and workers > 1 and len(pending) >= PARALLEL_BATCH_THRESHOLD:
+            done = set()
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_format_worker,
+                                         initargs=(plan,)) as executor:
+                    futures = {executor.submit(_format_file_job, source, output): source
+                               for source, output in pending}
+                    for future in as_completed(futures):
+                        source = futures[future]
+                        done.add(source)
+                        yield source, future.result()
+                return
+            except Exception as e:
+                # 进程池不可用（如受限环境）时串行处理剩余文件
+                logger.warning(f"并行格式化失败，改为串行: {e}")
+                pending = [job for job in pending if job[0] not in done]
+
+        applier = _PlanApplier(plan)
+        for source, output in pending:
+            try:
+                yield source, applier.format_file(source, output)
+            except Exception as e:
+                yield source, {"error": f"格式应用失败: {str(e)}"}
@@ -32,10 +32,20 @@ except ImportError:
     print("Warning: python-docx not installed. Word format application will be limited.")
 
 from .precise_format_extractor import PreciseFormatExtractor, DocumentFormatTemplate
+from .batch_format_engine import (BatchFormatEngine, StylePlan, ProgressCallback,
+                                  compile_style_plan, identify_content_type, write_styled_document)
 
 
 @dataclass
 class ContentElement:
+    """源文档中的内容元素"""
+    type: str
+    content: str
+    level: int = 0
+    table_data: Optional[List[List[str]]] = None
+
+
+class PreciseFormatApplier:
     
     def __init__(self, templates_dir: str = "src/core/knowledge_base/format_templates"):
         self.templates_dir = templates_dir
@@ -113,58 +123,32 @@ class ContentElement:
             return [ContentElement(type="paragraph", content=f"解析失败: {str(e)}")]
     
     def _parse_text_content(self, content: str) -> List[ContentElement]:
-        text = text.strip()
-        
-        # 基于样式名称判断
-        if "Title" in style_name:
-            return "title", 0
-        elif "Heading" in style_name:
-            level = 1
-            if "Heading 2" in style_name:
-                level = 2
-            elif "Heading 3" in style_name:
-                level = 3
-            return "heading", level
-        
-        # 基于文本模式判断
-        if len(text) < 50 and not text.endswith('。') and not text.endswith('：'):
-            # 可能是标题
-            if re.match(r'^[一二三四五六七八九十]+[、.]', text):
-                return "heading", 1
-            elif re.match(r'^\d+[、.]', text):
-                return "heading", 2
-            elif re.match(r'^[（(]\d+[）)]', text):
-                return "heading", 3
-            else:
-                return "title", 0
-        
-        # 列表项
-        if re.match(r'^\s*[-*+]\s', text) or re.match(r'^\s*\d+\.\s', text):
-            return "list", 1
-        
-        # 默认为段落
-        return "paragraph", 0
+        elements = []
+        for line in content.split('\n'):
+            if not line.strip():
+                continue
+            element_type, level = identify_content_type(line, "Normal")
+            elements.append(ContentElement(type=element_type, content=line.strip(), level=level))
+        return elements
     
     def _generate_word_document(self, content_elements: List[ContentElement], 
                                template_data: Dict[str, Any], output_path: str = None) -> Dict[str, Any]:
         try:
-            section = doc.sections[0]
+            # 确定输出路径
+            if not output_path:
+                import time
+                output_path = f"output/document_{int(time.time())}.docx"
+            
+            # 模板编译为样式计划，样式只定义一次，段落按样式 ID 批量写入
+            plan = compile_style_plan(template_data.get("template_id", ""), template_data)
+            elements = [("table", 0, element.table_data) if element.type == "table"
+                        else (element.type, element.level, element.content)
+                        for element in content_elements
+                        if element.type != "table" or element.table_data]
+            return write_styled_document(plan, elements, output_path)
             
-            if "width" in page_style:
-                section.page_width = Inches(page_style["width"])
-            if "height" in page_style:
-                section.page_height = Inches(page_style["height"])
-            if "margin_top" in page_style:
-                section.top_margin = Inches(page_style["margin_top"])
-            if "margin_bottom" in page_style:
-                section.bottom_margin = Inches(page_style["margin_bottom"])
-            if "margin_left" in page_style:
-                section.left_margin = Inches(page_style["margin_left"])
-            if "margin_right" in page_style:
-                section.right_margin = Inches(page_style["margin_right"])
-                
         except Exception as e:
-            print(f"应用页面设置失败: {e}")
+            return {"error": f"Word文档生成失败: {str(e)}"}
     
     def _apply_word_style(self, paragraph, style_info: Dict[str, Any]):
         try:
@@ -213,8 +197,7 @@ class ContentElement:
             try:
                 from reportlab.lib.pagesizes import A4
                 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-                from reportlab.lib.styles import getSampleStyleSheet
-                from reportlab.lib.units import inch
+                from ..tools.pdf_renderer import get_pdf_renderer
             except ImportError:
                 return {"error": "MVP: PDF生成需要安装reportlab库: pip install reportlab"}
             
@@ -229,37 +212,38 @@ class ContentElement:
             
             # 创建PDF文档
             doc = SimpleDocTemplate(output_path, pagesize=A4)
-            styles = getSampleStyleSheet()
+            # 中文字体与样式表由 PDF 渲染服务在进程内缓存
+            styles = get_pdf_renderer().stylesheet("document")
             story = []
             
             # 处理内容元素 - MVP只处理文本类型
             for element in content_elements:
                 if element.type == 'title':
                     # 标题样式
-                    title_style = styles['Heading1']
+                    title_style = styles['heading1']
                     story.append(Paragraph(element.content, title_style))
                     story.append(Spacer(1, 12))
                     
                 elif element.type == 'heading':
                     # 标题样式
-                    heading_style = styles['Heading2']
+                    heading_style = styles['heading2']
                     story.append(Paragraph(element.content, heading_style))
                     story.append(Spacer(1, 8))
                     
                 elif element.type == 'paragraph':
                     # 段落内容
-                    para_style = styles['Normal']
+                    para_style = styles['body']
                     story.append(Paragraph(element.content, para_style))
                     story.append(Spacer(1, 6))
                     
                 elif element.type == 'table':
                     # TODO: MVP仅占位，后续完善 - 表格功能暂不支持
-                    story.append(Paragraph(f"[表格内容: {len(element.table_data) if element.table_data else 0} 行]", styles['Normal']))
+                    story.append(Paragraph(f"[表格内容: {len(element.table_data) if element.table_data else 0} 行]", styles['body']))
                     story.append(Spacer(1, 6))
                     
                 elif element.type == 'list':
                     # TODO: MVP仅占位，后续完善 - 列表功能暂不支持
-                    story.append(Paragraph(f"[列表内容: {element.content}]", styles['Normal']))
+                    story.append(Paragraph(f"[列表内容: {element.content}]", styles['body']))
                     story.append(Spacer(1, 6))
             
             # 生成PDF
@@ -286,18 +270,44 @@ class ContentElement:
         # TODO: MVP仅占位，后续完善 - PowerPoint生成功能待实现
         return {"error": "MVP: PowerPoint生成功能待实现，后续使用python-pptx库完善"}
     
+    def compile_style_plan(self, target_template_id: str) -> Dict[str, Any]:
+        """加载模板并编译为样式计划（段落类型 → 样式）"""
+        template_result = self.format_extractor.load_format_template(target_template_id)
+        if "error" in template_result:
+            return template_result
+        return {
+            "success": True,
+            "plan": compile_style_plan(target_template_id, template_result["template_data"])
+        }
+    
     def batch_apply_format(self, source_files: List[str], target_template_id: str, 
-                          output_dir: str = "output/batch_formatted") -> Dict[str, Any]:
+                          output_dir: str = "output/batch_formatted",
+                          max_workers: Optional[int] = None,
+                          progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        批量应用格式。模板只加载、编译一次，Word 模板的样式计划由进程池并行应用到各文件；
+        progress_callback(已完成数, 总数, 文件名, 结果) 在每个文件完成后调用。
+        """
         try:
-            os.makedirs(output_dir, exist_ok=True)
+            plan_result = self.compile_style_plan(target_template_id)
+            if "error" in plan_result:
+                return plan_result
+            plan: StylePlan = plan_result["plan"]
             
+            if plan.document_type == "docx":
+                return BatchFormatEngine(max_workers).run(plan, source_files, output_dir, progress_callback)
+            
+            # 其他文档类型逐个文件生成
+            os.makedirs(output_dir, exist_ok=True)
             results = {}
-            for file_path in source_files:
+            for index, file_path in enumerate(source_files, 1):
                 file_name = os.path.basename(file_path)
                 output_path = os.path.join(output_dir, file_name)
                 
                 result = self.apply_format_precisely(file_path, target_template_id, output_path)
                 results[file_name] = result
+                if progress_callback:
+                    progress_callback(index, len(source_files), file_name, result)
             
             return {
                 "success": True,
@@ -308,37 +318,7 @@ class ContentElement:
             return {"error": f"批量处理失败: {str(e)}"}
     
     def _identify_content_type(self, text: str, style_name: str) -> Tuple[str, int]:
-        text = text.strip()
-        
-        # 基于样式名称判断
-        if "Title" in style_name:
-            return "title", 0
-        elif "Heading" in style_name:
-            level = 1
-            if "Heading 2" in style_name:
-                level = 2
-            elif "Heading 3" in style_name:
-                level = 3
-            return "heading", level
-        
-        # 基于文本模式判断
-        if len(text) < 50 and not text.endswith('。') and not text.endswith('：'):
-            # 可能是标题
-            if re.match(r'^[一二三四五六七八九十]+[、.]', text):
-                return "heading", 1
-            elif re.match(r'^\d+[、.]', text):
-                return "heading", 2
-            elif re.match(r'^[（(]\d+[）)]', text):
-                return "heading", 3
-            else:
-                return "title", 0
-        
-        # 列表项
-        if re.match(r'^\s*[-*+]\s', text) or re.match(r'^\s*\d+\.\s', text):
-            return "list", 1
-        
-        # 默认为段落
-        return "paragraph", 0
+        return identify_content_type(text, style_name)
     
     def _apply_table_cell_style(self, paragraph, template_data: Dict[str, Any], style_index: int):
         pass
@@ -15,7 +15,7 @@ License: MIT
 
 import json
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import hashlib
@@ -28,6 +28,8 @@ try:
 except ImportError:
     print("Warning: python-docx not installed. Word format extraction will be limited.")
 
+from ..tools.docx_reader import DocxStreamReader, DocxParagraph, DocxTable
+
 try:
     import openpyxl
     from openpyxl.styles import Font, Alignment, Border, PatternFill
@@ -208,33 +210,36 @@ class PreciseFormatExtractor:
             return {"error": f"格式提取失败: {str(e)}"}
     
     def _extract_word_format(self, file_path: str) -> Dict[str, Any]:
-        """提取Word文档格式"""
+        """提取Word文档格式（流式读取 document.xml / styles.xml，不构建 python-docx 对象）"""
         try:
-            doc = Document(file_path)
+            reader = DocxStreamReader(file_path)
             
+            # 一次遍历同时收集段落样式与表格样式
+            styles_info = self._new_styles_info()
+            table_styles = []
+            for block in reader.iter_blocks():
+                if isinstance(block, DocxTable):
+                    table_styles.append(self._extract_word_table_style(block))
+                else:
+                    self._collect_paragraph_style(styles_info, block)
+
             # 提取页面设置
-            section = doc.sections[0]
+            section = reader.section()
             page_style = PageStyle(
-                width=section.page_width.inches,
-                height=section.page_height.inches,
-                margin_top=section.top_margin.inches,
-                margin_bottom=section.bottom_margin.inches,
-                margin_left=section.left_margin.inches,
-                margin_right=section.right_margin.inches,
-                orientation="landscape" if section.page_width > section.page_height else "portrait"
+                width=section.width or PageStyle.width,
+                height=section.height or PageStyle.height,
+                margin_top=section.margin_top if section.margin_top is not None else PageStyle.margin_top,
+                margin_bottom=section.margin_bottom if section.margin_bottom is not None else PageStyle.margin_bottom,
+                margin_left=section.margin_left if section.margin_left is not None else PageStyle.margin_left,
+                margin_right=section.margin_right if section.margin_right is not None else PageStyle.margin_right,
+                orientation=section.orientation
             )
             
-            # 提取样式信息
-            styles_info = self._extract_word_styles(doc)
-            
-            # 提取表格格式
-            table_styles = self._extract_word_table_styles(doc)
-            
             # 提取标号样式
-            numbering_style = self._extract_numbering_style(doc)
+            numbering_style = self._extract_numbering_style(reader)
 
             # 提取页码样式
-            page_number_style = self._extract_page_number_style(doc)
+            page_number_style = self._extract_page_number_style(reader)
 
             return {
                 "page_style": page_style,
@@ -250,158 +255,118 @@ class PreciseFormatExtractor:
             
         except Exception as e:
             return {"error": f"Word格式提取失败: {str(e)}"}
-    
-    def _extract_word_styles(self, doc: Document) -> Dict[str, Any]:
-        """提取Word文档的样式信息"""
-        styles_info = {
+
+    def _new_styles_info(self) -> Dict[str, Any]:
+        return {
             "title": {},
             "headings": {},
             "paragraph": {},
             "list": {},
             "quote": {}
         }
+    
+    def _extract_word_styles(self, paragraphs: Iterable[DocxParagraph]) -> Dict[str, Any]:
+        """提取Word文档的样式信息"""
+        styles_info = self._new_styles_info()
+        for paragraph in paragraphs:
+            self._collect_paragraph_style(styles_info, paragraph)
+        return styles_info
+
+    def _collect_paragraph_style(self, styles_info: Dict[str, Any], paragraph: DocxParagraph):
+        """根据样式名称和内容特征，把段落的实际样式归入标题 / 各级标题 / 正文"""
+        if not paragraph.text.strip():
+            return
         
-        # 分析文档中的实际样式使用
-        for paragraph in doc.paragraphs:
-            if not paragraph.text.strip():
-                continue
-            
-            # 获取段落样式
-            style_name = paragraph.style.name if paragraph.style else "Normal"
-            
-            # 提取字体信息
-            font_info = self._extract_font_info(paragraph)
-            
-            # 提取段落格式信息
-            para_info = self._extract_paragraph_info(paragraph)
-            
-            # 根据样式名称和内容特征分类
-            if "Title" in style_name or self._is_title(paragraph.text):
-                styles_info["title"] = {
-                    "font": font_info,
-                    "paragraph": para_info,
-                    "style_name": style_name
-                }
-            elif "Heading" in style_name or self._is_heading(paragraph.text):
-                level = self._extract_heading_level(style_name, paragraph.text)
-                styles_info["headings"][level] = {
-                    "font": font_info,
-                    "paragraph": para_info,
-                    "style_name": style_name
-                }
-            elif not styles_info["paragraph"]:  # 使用第一个普通段落作为默认样式
-                styles_info["paragraph"] = {
-                    "font": font_info,
-                    "paragraph": para_info,
-                    "style_name": style_name
-                }
+        # 获取段落样式
+        style_name = paragraph.style_name or "Normal"
         
-        return styles_info
-    
-    def _extract_font_info(self, paragraph) -> Dict[str, Any]:
-        """提取字体信息"""
-        try:
-            run = paragraph.runs[0] if paragraph.runs else None
-            if not run:
-                return {"name": "宋体", "size": 12.0, "bold": False, "italic": False}
-            
-            font = run.font
-            return {
-                "name": font.name or "宋体",
-                "size": float(font.size.pt) if font.size else 12.0,
-                "bold": font.bold or False,
-                "italic": font.italic or False,
-                "underline": font.underline or False,
-                "color": str(font.color.rgb) if font.color and font.color.rgb else "#000000"
+        # 提取字体信息
+        font_info = self._extract_font_info(paragraph)
+        
+        # 提取段落格式信息
+        para_info = self._extract_paragraph_info(paragraph)
+        
+        # 根据样式名称和内容特征分类
+        if "Title" in style_name or self._is_title(paragraph.text):
+            styles_info["title"] = {
+                "font": font_info,
+                "paragraph": para_info,
+                "style_name": style_name
             }
-        except:
+        elif "Heading" in style_name or self._is_heading(paragraph.text):
+            level = self._extract_heading_level(style_name, paragraph.text)
+            styles_info["headings"][level] = {
+                "font": font_info,
+                "paragraph": para_info,
+                "style_name": style_name
+            }
+        elif not styles_info["paragraph"]:  # 使用第一个普通段落作为默认样式
+            styles_info["paragraph"] = {
+                "font": font_info,
+                "paragraph": para_info,
+                "style_name": style_name
+            }
+    
+    def _extract_font_info(self, paragraph: DocxParagraph) -> Dict[str, Any]:
+        """提取字体信息（取第一个 run 的直接格式）"""
+        run = paragraph.runs[0] if paragraph.runs else None
+        if not run:
             return {"name": "宋体", "size": 12.0, "bold": False, "italic": False}
+        
+        return {
+            "name": run.font_name or run.east_asia_font or "宋体",
+            "size": run.size or 12.0,
+            "bold": run.bold or False,
+            "italic": run.italic or False,
+            "underline": run.underline or False,
+            "color": run.color or "#000000"
+        }
     
-    def _extract_paragraph_info(self, paragraph) -> Dict[str, Any]:
+    def _extract_paragraph_info(self, paragraph: DocxParagraph) -> Dict[str, Any]:
         """提取段落格式信息"""
-        try:
-            fmt = paragraph.paragraph_format
-            
-            # 对齐方式映射
-            alignment_map = {
-                WD_ALIGN_PARAGRAPH.LEFT: "left",
-                WD_ALIGN_PARAGRAPH.CENTER: "center",
-                WD_ALIGN_PARAGRAPH.RIGHT: "right",
-                WD_ALIGN_PARAGRAPH.JUSTIFY: "justify"
-            }
-            
-            return {
-                "alignment": alignment_map.get(fmt.alignment, "left"),
-                "line_spacing": float(fmt.line_spacing) if fmt.line_spacing else 1.0,
-                "space_before": float(fmt.space_before.pt) if fmt.space_before else 0.0,
-                "space_after": float(fmt.space_after.pt) if fmt.space_after else 0.0,
-                "first_line_indent": float(fmt.first_line_indent.pt) if fmt.first_line_indent else 0.0,
-                "left_indent": float(fmt.left_indent.pt) if fmt.left_indent else 0.0,
-                "right_indent": float(fmt.right_indent.pt) if fmt.right_indent else 0.0
-            }
-        except:
-            return {"alignment": "left", "line_spacing": 1.0}
+        return {
+            "alignment": paragraph.alignment or "left",
+            "line_spacing": paragraph.line_spacing or 1.0,
+            "space_before": paragraph.space_before or 0.0,
+            "space_after": paragraph.space_after or 0.0,
+            "first_line_indent": paragraph.first_line_indent or 0.0,
+            "left_indent": paragraph.left_indent or 0.0,
+            "right_indent": paragraph.right_indent or 0.0
+        }
     
-    def _extract_word_table_styles(self, doc: Document) -> List[Dict[str, Any]]:
+    def _extract_word_table_styles(self, tables: Iterable[DocxTable]) -> List[Dict[str, Any]]:
         """提取Word表格样式"""
-        table_styles = []
+        return [self._extract_word_table_style(table) for table in tables]
+
+    def _extract_word_table_style(self, table: DocxTable) -> Dict[str, Any]:
+        """提取单个表格的样式"""
+        table_info = {
+            "rows": table.row_count,
+            "columns": table.column_count,
+            "style_name": table.style_name or "Table Grid",
+            "alignment": table.alignment or "left",
+            "column_widths": list(table.column_widths) or [1.0] * table.column_count,  # 默认宽度
+            "row_heights": [height or 0.3 for height in table.row_heights],  # 默认高度
+            "border_style": "single",
+            "cell_styles": []
+        }
         
-        for table in doc.tables:
-            try:
-                # 提取表格基本信息
-                table_info = {
-                    "rows": len(table.rows),
-                    "columns": len(table.columns),
-                    "style_name": table.style.name if table.style else "Table Grid",
-                    "alignment": "left",  # 默认值
-                    "column_widths": [],
-                    "row_heights": [],
-                    "border_style": "single",
-                    "cell_styles": []
-                }
-                
-                # 提取列宽
-                for col_idx in range(len(table.columns)):
-                    try:
-                        width = table.columns[col_idx].width.inches
-                        table_info["column_widths"].append(width)
-                    except:
-                        table_info["column_widths"].append(1.0)  # 默认宽度
-                
-                # 提取行高
-                for row in table.rows:
-                    try:
-                        height = row.height.inches if row.height else 0.3
-                        table_info["row_heights"].append(height)
-                    except:
-                        table_info["row_heights"].append(0.3)  # 默认高度
-                
-                # 提取单元格样式（取第一个单元格作为样本）
-                if table.rows and table.rows[0].cells:
-                    cell = table.rows[0].cells[0]
-                    if cell.paragraphs:
-                        cell_font = self._extract_font_info(cell.paragraphs[0])
-                        cell_para = self._extract_paragraph_info(cell.paragraphs[0])
-                        table_info["cell_styles"] = {
-                            "font": cell_font,
-                            "paragraph": cell_para
-                        }
-                
-                table_styles.append(table_info)
-                
-            except Exception as e:
-                # 如果提取失败，添加默认样式
-                table_styles.append({
-                    "rows": 1,
-                    "columns": 1,
-                    "style_name": "Table Grid",
-                    "alignment": "left",
-                    "column_widths": [1.0],
-                    "row_heights": [0.3],
-                    "border_style": "single"
-                })
+        # 提取单元格样式（取第一个单元格作为样本）
+        if table.first_cell_paragraph is not None:
+            table_info["cell_styles"] = {
+                "font": self._extract_font_info(table.first_cell_paragraph),
+                "paragraph": self._extract_paragraph_info(table.first_cell_paragraph)
+            }
         
-        return table_styles
+        return table_info
+
+    def _extract_numbering_style(self, reader: DocxStreamReader) -> NumberingStyle:
+        """提取标号样式（暂未解析 numbering.xml，使用默认公文标号）"""
+        return NumberingStyle()
+
+    def _extract_page_number_style(self, reader: DocxStreamReader) -> PageNumberStyle:
+        """提取页码样式（暂未解析页脚，使用默认页码样式）"""
+        return PageNumberStyle()
     
     def _is_title(self, text: str) -> bool:
         """判断是否为标题"""
@@ -2,7 +2,7 @@
 from .database_manager import DatabaseManager, get_database_manager
 from .models import (
     AppSettings, DocumentRecord, PersonalTemplate, ProcessingResult,
-    PerformanceRecord, BatchProcessingRecord,
+    PerformanceRecord, BatchProcessingRecord, BatchFileRecord,
     DocumentType, IntentType, ProcessingStatus, TemplateCategory, ResultType
 )
 from .repositories import (
@@ -11,7 +11,8 @@ from .repositories import (
     TemplateRepository,
     ProcessingResultRepository,
     PerformanceRepository,
-    BatchProcessingRepository
+    BatchProcessingRepository,
+    BatchFileRepository
 )
 
 __all__ = [
@@ -23,6 +24,7 @@ __all__ = [
     'ProcessingResult',
     'PerformanceRecord',
     'BatchProcessingRecord',
+    'BatchFileRecord',
     'DocumentType',
     'IntentType',
     'ProcessingStatus',
@@ -33,5 +35,6 @@ __all__ = [
     'TemplateRepository',
     'ProcessingResultRepository',
     'PerformanceRepository',
-    'BatchProcessingRepository'
+    'BatchProcessingRepository',
+    'BatchFileRepository'
 ]
@@ -170,9 +170,32 @@ class DatabaseManager:
                             total_duration_ms REAL DEFAULT 0,
                             error_summary TEXT,
                             configuration TEXT DEFAULT '{}',
+                            job_id TEXT,
                             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                         )
                     """)
+                    # 旧版本数据库的批量处理记录表没有 job_id 列
+                    self._ensure_column(conn, 'batch_processing_records', 'job_id', 'TEXT')
+
+                    # 创建批量处理文件记录表（每个文件的处理状态，进程重启后据此续跑）
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS batch_file_records (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            batch_id INTEGER NOT NULL,
+                            file_index INTEGER NOT NULL,
+                            file_path TEXT NOT NULL,
+                            file_hash TEXT,
+                            config_hash TEXT,
+                            status TEXT DEFAULT 'pending',
+                            attempts INTEGER DEFAULT 0,
+                            result TEXT,
+                            error_message TEXT,
+                            reused_from INTEGER,
+                            started_at DATETIME,
+                            completed_at DATETIME,
+                            FOREIGN KEY (batch_id) REFERENCES batch_processing_records (id) ON DELETE CASCADE
+                        )
+                    """)
 
                     # 创建索引
                     self._create_indexes(conn)
@@ -203,12 +226,22 @@ class DatabaseManager:
             "CREATE INDEX IF NOT EXISTS idx_performance_records_api ON performance_records(api_endpoint)",
             # 批量处理记录表索引
             "CREATE INDEX IF NOT EXISTS idx_batch_processing_status ON batch_processing_records(processing_status)",
-            "CREATE INDEX IF NOT EXISTS idx_batch_processing_created ON batch_processing_records(created_at)"
+            "CREATE INDEX IF NOT EXISTS idx_batch_processing_created ON batch_processing_records(created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_batch_processing_job ON batch_processing_records(job_id)",
+            "CREATE INDEX IF NOT EXISTS idx_batch_file_records_batch ON batch_file_records(batch_id, status)",
+            "CREATE INDEX IF NOT EXISTS idx_batch_file_records_hash ON batch_file_records(file_hash, config_hash, status)"
         ]
         
         for index_sql in indexes:
             conn.execute(index_sql)
     
+    def _ensure_column(self, conn: sqlite3.Connection, table_name: str, column_name: str, definition: str):
+        """表中缺少指定列时补充该列"""
+        columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()}
+        if column_name not in columns:
+            conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+            logger.info(f"Added column {table_name}.{column_name}")
+    
     def _insert_default_settings(self, conn: sqlite3.Connection):
         """插入默认应用设置"""
         default_settings = [
@@ -29,6 +29,7 @@ class DatabaseMigration:
             self._migration_001_initial_schema,
             self._migration_002_add_indexes,
             self._migration_003_add_default_settings,
+            self._migration_004_batch_file_records,
             # 在这里添加新的迁移函数
         ]
     
@@ -129,6 +130,18 @@ class DatabaseMigration:
             logger.error(f"Migration 003 failed: {e}")
             return False
     
+    def _migration_004_batch_file_records(self) -> bool:
+        """迁移004: 批量处理文件记录表与批量处理记录的 job_id 列"""
+        try:
+            with self.db.get_connection() as conn:
+                # 表、列和索引在DatabaseManager初始化时已经创建
+                # 这里只是为了版本控制
+                pass
+            return True
+        except Exception as e:
+            logger.error(f"Migration 004 failed: {e}")
+            return False
+    
     def rollback_migration(self, target_version: int) -> bool:
         """回滚到指定版本（谨慎使用）"""
         current_version = self.get_current_version()
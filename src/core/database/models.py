@@ -283,6 +283,7 @@ class BatchProcessingRecord:
     total_duration_ms: float = 0.0
     error_summary: Optional[str] = None
     configuration: str = "{}"  # JSON字符串
+    job_id: Optional[str] = None  # BatchProcessor 作业ID
     created_at: Optional[datetime] = None
 
     def get_configuration(self) -> Dict[str, Any]:
@@ -325,5 +326,56 @@ class BatchProcessingRecord:
             'configuration': self.get_configuration(),
             'progress_percentage': self.get_progress_percentage(),
             'success_rate': self.get_success_rate(),
+            'job_id': self.job_id,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+@dataclass
+class BatchFileRecord:
+    """批量处理文件记录模型"""
+    id: Optional[int] = None
+    batch_id: int = 0
+    file_index: int = 0
+    file_path: str = ""
+    file_hash: Optional[str] = None  # 文件内容 SHA-256
+    config_hash: Optional[str] = None  # 处理配置摘要，内容与配置都相同的结果才可复用
+    status: str = "pending"  # pending, processing, completed, failed, skipped, cancelled
+    attempts: int = 0
+    result: Optional[str] = None  # JSON字符串
+    error_message: Optional[str] = None
+    reused_from: Optional[int] = None  # 复用结果时指向原文件记录
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    def get_result(self) -> Any:
+        """获取处理结果"""
+        try:
+            return json.loads(self.result) if self.result else None
+        except json.JSONDecodeError:
+            return None
+
+    def set_result(self, result: Any):
+        """设置处理结果"""
+        self.result = json.dumps(result, ensure_ascii=False, default=str) if result is not None else None
+
+    def is_finished(self) -> bool:
+        """文件是否已处理结束（成功、失败或复用）"""
+        return self.status in ("completed", "failed", "skipped")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'batch_id': self.batch_id,
+            'file_index': self.file_index,
+            'file_path': self.file_path,
+            'file_hash': self.file_hash,
+            'status': self.status,
+            'attempts': self.attempts,
+            'result': self.get_result(),
+            'error_message': self.error_message,
+            'reused_from': self.reused_from,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -19,7 +19,7 @@ from datetime import datetime, timedelta
 from .database_manager import get_database_manager
 from .models import (
     AppSettings, DocumentRecord, PersonalTemplate, ProcessingResult,
-    PerformanceRecord, BatchProcessingRecord
+    PerformanceRecord, BatchProcessingRecord, BatchFileRecord
 )
 
 logger = logging.getLogger(__name__)
@@ -214,7 +214,7 @@ class DocumentRepository(BaseRepository):
             stats['total_documents'] = result[0]['count'] if result else 0
             
             # 各状态文档数
-            for status in ['pending', 'processing', 'completed', 'failed']:
+            for status in ['pending', 'processing', 'completed', 'failed', 'cancelled']:
                 result = self.db.execute_query(
                     "SELECT COUNT(*) as count FROM document_records WHERE processing_status = ?",
                     (status,)
@@ -497,6 +497,25 @@ class PerformanceRepository(BaseRepository):
 class BatchProcessingRepository(BaseRepository):
     """批量处理记录仓库"""
 
+    @staticmethod
+    def _row_to_record(row) -> BatchProcessingRecord:
+        return BatchProcessingRecord(
+            id=row['id'],
+            batch_name=row['batch_name'],
+            total_files=row['total_files'],
+            processed_files=row['processed_files'],
+            successful_files=row['successful_files'],
+            failed_files=row['failed_files'],
+            processing_status=row['processing_status'],
+            start_time=datetime.fromisoformat(row['start_time']) if row['start_time'] else None,
+            end_time=datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
+            total_duration_ms=row['total_duration_ms'],
+            error_summary=row['error_summary'],
+            configuration=row['configuration'],
+            job_id=row['job_id'],
+            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
+        )
+
     def create_batch_record(self, record: BatchProcessingRecord) -> Optional[int]:
         """创建批量处理记录"""
         try:
@@ -504,20 +523,54 @@ class BatchProcessingRepository(BaseRepository):
                 INSERT INTO batch_processing_records
                 (batch_name, total_files, processed_files, successful_files, failed_files,
                  processing_status, start_time, end_time, total_duration_ms,
-                 error_summary, configuration, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                 error_summary, configuration, job_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             """, (
                 record.batch_name, record.total_files, record.processed_files,
                 record.successful_files, record.failed_files, record.processing_status,
                 record.start_time.isoformat() if record.start_time else None,
                 record.end_time.isoformat() if record.end_time else None,
-                record.total_duration_ms, record.error_summary, record.configuration
+                record.total_duration_ms, record.error_summary, record.configuration,
+                record.job_id
             ))
             return record_id
         except Exception as e:
             logger.error(f"Failed to create batch processing record: {e}")
             return None
 
+    def create_batch_with_files(self, record: BatchProcessingRecord,
+                                file_records: List[BatchFileRecord]) -> Optional[int]:
+        """
+        在同一个事务中创建批量处理记录及其文件记录，任一写入失败时全部回滚。
+        成功时回填 file_records 的 id / batch_id 并返回批次ID
+        """
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.execute("""
+                    INSERT INTO batch_processing_records
+                    (batch_name, total_files, processing_status, configuration, job_id, created_at)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, (record.batch_name, record.total_files, record.processing_status,
+                      record.configuration, record.job_id))
+                batch_id = cursor.lastrowid
+                file_ids = []
+                for file_record in file_records:
+                    cursor = conn.execute("""
+                        INSERT INTO batch_file_records
+                        (batch_id, file_index, file_path, file_hash, config_hash, status)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (batch_id, file_record.file_index, file_record.file_path,
+                          file_record.file_hash, file_record.config_hash, file_record.status))
+                    file_ids.append(cursor.lastrowid)
+        except Exception as e:
+            logger.error(f"Failed to create batch with file records: {e}")
+            return None
+
+        for file_record, file_id in zip(file_records, file_ids):
+            file_record.batch_id = batch_id
+            file_record.id = file_id
+        return batch_id
+
     def update_batch_progress(self, batch_id: int, processed_files: int,
                             successful_files: int, failed_files: int) -> bool:
         """更新批量处理进度"""
@@ -532,10 +585,24 @@ class BatchProcessingRepository(BaseRepository):
             logger.error(f"Failed to update batch progress: {e}")
             return False
 
-    def complete_batch(self, batch_id: int, success: bool, error_summary: str = None) -> bool:
-        """完成批量处理"""
+    def start_batch(self, batch_id: int) -> bool:
+        """标记批量处理开始（续跑时保留首次开始时间）"""
+        try:
+            self.db.execute_update("""
+                UPDATE batch_processing_records
+                SET processing_status = 'processing', start_time = COALESCE(start_time, CURRENT_TIMESTAMP)
+                WHERE id = ?
+            """, (batch_id,))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start batch: {e}")
+            return False
+
+    def complete_batch(self, batch_id: int, success: bool, error_summary: str = None,
+                       status: str = None) -> bool:
+        """完成批量处理，status 可显式指定（如 cancelled）"""
         try:
-            status = "completed" if success else "failed"
+            status = status or ("completed" if success else "failed")
             self.db.execute_update("""
                 UPDATE batch_processing_records
                 SET processing_status = ?, end_time = CURRENT_TIMESTAMP, error_summary = ?
@@ -554,22 +621,7 @@ class BatchProcessingRepository(BaseRepository):
             """, (batch_id,))
 
             if results:
-                row = results[0]
-                return BatchProcessingRecord(
-                    id=row['id'],
-                    batch_name=row['batch_name'],
-                    total_files=row['total_files'],
-                    processed_files=row['processed_files'],
-                    successful_files=row['successful_files'],
-                    failed_files=row['failed_files'],
-                    processing_status=row['processing_status'],
-                    start_time=datetime.fromisoformat(row['start_time']) if row['start_time'] else None,
-                    end_time=datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
-                    total_duration_ms=row['total_duration_ms'],
-                    error_summary=row['error_summary'],
-                    configuration=row['configuration'],
-                    created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
-                )
+                return self._row_to_record(results[0])
             return None
         except Exception as e:
             logger.error(f"Failed to get batch record: {e}")
@@ -584,30 +636,26 @@ class BatchProcessingRepository(BaseRepository):
                 LIMIT ?
             """, (limit,))
 
-            batches = []
-            for row in results:
-                batch = BatchProcessingRecord(
-                    id=row['id'],
-                    batch_name=row['batch_name'],
-                    total_files=row['total_files'],
-                    processed_files=row['processed_files'],
-                    successful_files=row['successful_files'],
-                    failed_files=row['failed_files'],
-                    processing_status=row['processing_status'],
-                    start_time=datetime.fromisoformat(row['start_time']) if row['start_time'] else None,
-                    end_time=datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
-                    total_duration_ms=row['total_duration_ms'],
-                    error_summary=row['error_summary'],
-                    configuration=row['configuration'],
-                    created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
-                )
-                batches.append(batch)
+            batches = [self._row_to_record(row) for row in results]
 
             return batches
         except Exception as e:
             logger.error(f"Failed to get recent batches: {e}")
             return []
 
+    def get_unfinished_batches(self) -> List[BatchProcessingRecord]:
+        """获取由 BatchProcessor 创建、尚未结束的批量处理记录"""
+        try:
+            results = self.db.execute_query("""
+                SELECT * FROM batch_processing_records
+                WHERE processing_status IN ('pending', 'processing') AND job_id IS NOT NULL
+                ORDER BY created_at, id
+            """)
+            return [self._row_to_record(row) for row in results]
+        except Exception as e:
+            logger.error(f"Failed to get unfinished batches: {e}")
+            return []
+
     def get_batch_statistics(self) -> Dict[str, Any]:
         """获取批量处理统计"""
         try:
@@ -618,7 +666,7 @@ class BatchProcessingRepository(BaseRepository):
             stats['total_batches'] = result[0]['count'] if result else 0
 
             # 各状态批次数
-            for status in ['pending', 'processing', 'completed', 'failed']:
+            for status in ['pending', 'processing', 'completed', 'failed', 'cancelled']:
                 result = self.db.execute_query(
                     "SELECT COUNT(*) as count FROM batch_processing_records WHERE processing_status = ?",
                     (status,)
@@ -662,3 +710,100 @@ class BatchProcessingRepository(BaseRepository):
         except Exception as e:
             logger.error(f"Failed to get batch statistics: {e}")
             return {}
+
+
+class BatchFileRepository(BaseRepository):
+    """批量处理文件记录仓库"""
+
+    @staticmethod
+    def _row_to_record(row) -> BatchFileRecord:
+        return BatchFileRecord(
+            id=row['id'],
+            batch_id=row['batch_id'],
+            file_index=row['file_index'],
+            file_path=row['file_path'],
+            file_hash=row['file_hash'],
+            config_hash=row['config_hash'],
+            status=row['status'],
+            attempts=row['attempts'],
+            result=row['result'],
+            error_message=row['error_message'],
+            reused_from=row['reused_from'],
+            started_at=datetime.fromisoformat(row['started_at']) if row['started_at'] else None,
+            completed_at=datetime.fromisoformat(row['completed_at']) if row['completed_at'] else None
+        )
+
+    def get_batch_files(self, batch_id: int) -> List[BatchFileRecord]:
+        """获取批次的全部文件记录（按提交顺序）"""
+        try:
+            results = self.db.execute_query("""
+                SELECT * FROM batch_file_records WHERE batch_id = ? ORDER BY file_index
+            """, (batch_id,))
+            return [self._row_to_record(row) for row in results]
+        except Exception as e:
+            logger.error(f"Failed to get batch files: {e}")
+            return []
+
+    def mark_file_processing(self, record_id: int) -> bool:
+        """标记文件开始处理，尝试次数加一"""
+        try:
+            self.db.execute_update("""
+                UPDATE batch_file_records
+                SET status = 'processing', attempts = attempts + 1, started_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (record_id,))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to mark batch file processing: {e}")
+            return False
+
+    def finish_file(self, record_id: int, status: str, result: Optional[str] = None,
+                    error_message: str = None, reused_from: int = None) -> bool:
+        """记录文件处理结束：completed / failed / skipped / cancelled"""
+        try:
+            self.db.execute_update("""
+                UPDATE batch_file_records
+                SET status = ?, result = ?, error_message = ?, reused_from = ?,
+                    completed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (status, result, error_message, reused_from, record_id))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to finish batch file: {e}")
+            return False
+
+    def reset_interrupted_files(self, batch_id: int, max_attempts: int) -> int:
+        """
+        处理上次进程退出时仍在处理中的文件：尝试次数已达 max_attempts 的标记为失败
+        （多半是该文件导致进程崩溃），其余恢复为待处理。返回恢复为待处理的文件数
+        """
+        try:
+            with self.db.get_connection() as conn:
+                conn.execute("""
+                    UPDATE batch_file_records
+                    SET status = 'failed', completed_at = CURRENT_TIMESTAMP,
+                        error_message = 'Processing interrupted ' || attempts || ' times, giving up'
+                    WHERE batch_id = ? AND status = 'processing' AND attempts >= ?
+                """, (batch_id, max_attempts))
+                cursor = conn.execute("""
+                    UPDATE batch_file_records SET status = 'pending', started_at = NULL
+                    WHERE batch_id = ? AND status = 'processing'
+                """, (batch_id,))
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Failed to reset interrupted batch files: {e}")
+            return 0
+
+    def find_successful_result(self, file_hash: str, config_hash: str) -> Optional[BatchFileRecord]:
+        """查找相同文件内容、相同处理配置的最近一次成功结果"""
+        try:
+            results = self.db.execute_query("""
+                SELECT * FROM batch_file_records
+                WHERE file_hash = ? AND config_hash = ? AND status = 'completed'
+                ORDER BY completed_at DESC, id DESC
+                LIMIT 1
+            """, (file_hash, config_hash))
+            return self._row_to_record(results[0]) if results else None
+        except Exception as e:
+            logger.error(f"Failed to find successful batch file result: {e}")
+            return None
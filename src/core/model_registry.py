@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型注册表
+
+统一管理进程内的重量级模型（OCR、版面分析、Sentence-BERT 等）：
+- 注册时只记录加载函数，首次使用时才加载（懒加载），同名模型每个进程只保留一份实例；
+- 支持在服务启动时后台预热；
+- 后台巡检线程卸载空闲超时的模型，使用中的模型不会被卸载。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import gc
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认空闲卸载时间（秒），0 或 None 表示不卸载
+DEFAULT_IDLE_TIMEOUT = 900
+
+# 未加载标记（加载函数本身可能返回 None）
+_NOT_LOADED = object()
+
+
+@dataclass
+class _ModelEntry:
+    """注册的模型及其运行状态"""
+    name: str
+    loader: Callable[[], Any]
+    idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT
+    unloader: Optional[Callable[[Any], None]] = None
+    instance: Any = _NOT_LOADED
+    last_used: float = 0.0
+    load_seconds: float = 0.0
+    in_use: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def loaded(self) -> bool:
+        return self.instance is not _NOT_LOADED
+
+
+class ModelRegistry:
+    """懒加载 + 预热 + 空闲卸载的模型注册表"""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.RLock()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+                 unloader: Optional[Callable[[Any], None]] = None) -> str:
+        """
+        注册模型加载函数（不会立即加载）。同名模型已注册时保留原注册，保证每个进程只有一份实例。
+
+        Args:
+            name: 模型名称，建议包含影响模型行为的配置（如模型 ID）
+            loader: 无参加载函数，返回模型实例
+            idle_timeout: 空闲多少秒后卸载，0 / None 表示常驻
+            unloader: 卸载时的清理函数（如释放显存），可选
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _ModelEntry(name, loader, idle_timeout, unloader)
+        return name
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._entries
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return bool(entry and entry.loaded)
+
+    def get(self, name: str) -> Any:
+        """获取模型实例，未加载时在当前线程加载"""
+        entry = self._get_entry(name)
+        entry.last_used = time.time()
+        instance = entry.instance
+        if instance is not _NOT_LOADED:
+            return instance
+
+        with entry.lock:
+            if not entry.loaded:
+                start = time.time()
+                logger.info(f"Loading model: {name}")
+                entry.instance = entry.loader()
+                entry.load_seconds = time.time() - start
+                logger.info(f"Model {name} loaded in {entry.load_seconds:.2f}s")
+                self._ensure_sweeper()
+            entry.last_used = time.time()
+            return entry.instance
+
+    @contextmanager
+    def use(self, name: str):
+        """在上下文中使用模型，期间不会被空闲巡检卸载"""
+        entry = self._get_entry(name)
+        with self._lock:
+            entry.in_use += 1
+        try:
+            yield self.get(name)
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """预热模型（默认全部已注册模型）。background=True 时在后台线程加载并返回该线程"""
+        names = list(names) if names is not None else list(self._entries)
+
+        def _load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.error(f"Model warm-up failed for {name}: {e}")
+
+        if not background:
+            _load_all()
+            return None
+        thread = threading.Thread(target=_load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self, name: str) -> bool:
+        """卸载模型（保留注册信息，下次使用时重新加载）"""
+        entry = self._entries.get(name)
+        if not entry or not entry.loaded:
+            return False
+
+        with entry.lock:
+            with self._lock:
+                if entry.in_use > 0:
+                    return False
+                instance, entry.instance = entry.instance, _NOT_LOADED
+            if entry.unloader is not None:
+                try:
+                    entry.unloader(instance)
+                except Exception as e:
+                    logger.warning(f"Model unloader failed for {name}: {e}")
+            del instance
+        gc.collect()
+        logger.info(f"Model unloaded: {name}")
+        return True
+
+    def unload_idle(self, now: Optional[float] = None) -> List[str]:
+        """卸载空闲超时的模型，返回被卸载的模型名称"""
+        now = now or time.time()
+        unloaded = []
+        for name, entry in list(self._entries.items()):
+            if (entry.loaded and entry.idle_timeout and entry.in_use == 0
+                    and now - entry.last_used > entry.idle_timeout):
+                if self.unload(name):
+                    unloaded.append(name)
+        return unloaded
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """各模型的加载状态"""
+        now = time.time()
+        return {
+            name: {
+                "loaded": entry.loaded,
+                "in_use": entry.in_use,
+                "idle_seconds": round(now - entry.last_used, 1) if entry.last_used else None,
+                "idle_timeout": entry.idle_timeout,
+                "load_seconds": round(entry.load_seconds, 2),
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def _get_entry(self, name: str) -> _ModelEntry:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Model not registered: {name}")
+        return entry
+
+    def _ensure_sweeper(self):
+        with self._lock:
+            if self._sweeper is None or not self._sweeper.is_alive():
+                self._sweeper = threading.Thread(target=self._sweep_loop, name="model-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.unload_idle()
+            except Exception as e:
+                logger.warning(f"Model idle sweep failed: {e}")
+            with self._lock:
+                # 没有已加载的模型时退出，下次加载时重新启动
+                if not any(entry.loaded for entry in self._entries.values()):
+                    self._sweeper = None
+                    return
+
+
+# 全局模型注册表实例
+_global_model_registry = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """获取全局模型注册表实例"""
+    global _global_model_registry
+    if _global_model_registry is None:
+        _global_model_registry = ModelRegistry()
+    return _global_model_registry
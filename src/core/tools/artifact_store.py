@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Artifact Store - 核心模块
+
+生成文件（智能填报的年度总结与简历、文风统一与导出结果、代理协调器的处理报告等）的托管存储：
+- 文件按内容 SHA-256 命名存放在 data/artifacts/objects 下，相同内容只存一份；
+  下载文件名 → 内容摘要的映射保存在 index.json 中；
+- 内容摘要在写入时计算一次，直接作为 ETag，下载时不必再读文件；
+- 超过保存期限（TTL）的文件在写入时顺带清理（按间隔节流），总大小超过上限时按创建时间淘汰最旧的文件，
+  磁盘占用保持有界；
+- 写入采用临时文件 + 原子替换，下载方不会读到写了一半的文件；
+- 多个进程（如多个 Web worker）可以共用同一存储目录：修改索引和清理前在文件锁下重新读取磁盘上的索引，
+  查询前索引文件有变化时重新载入，一个进程不会按过期的索引删除其他进程刚写入的文件。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.2
+License: MIT
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import mimetypes
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows 没有 fcntl，使用 msvcrt 的字节锁
+    import msvcrt
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_CLEANUP_INTERVAL = 10 * 60
+_HASH_CHUNK_SIZE = 1024 * 1024
+# 未被索引引用的文件至少保留的时间，避免删除写入后尚未登记的文件
+_UNREFERENCED_GRACE_SECONDS = 60
+
+
+@dataclass
+class StoredArtifact:
+    """存储中的一个文件：filename 为下载文件名，path 为按内容摘要命名的实际文件"""
+    filename: str
+    path: str
+    size: int
+    digest: str
+    created: float
+
+    @property
+    def etag(self) -> str:
+        return self.digest
+
+    @property
+    def mimetype(self) -> str:
+        return mimetypes.guess_type(self.filename)[0] or "application/octet-stream"
+
+
+class ArtifactStore:
+    """按内容摘要命名、按保存期限和总大小自动清理的生成文件存储"""
+
+    def __init__(self, root: Optional[str] = None, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, cleanup_interval: int = DEFAULT_CLEANUP_INTERVAL):
+        """
+        Args:
+            root: 存储目录，默认为项目根目录下的 data/artifacts
+            ttl_seconds: 文件保存期限（秒）
+            max_bytes: 存储总大小上限（字节）
+            cleanup_interval: 两次自动清理之间的最短间隔（秒）
+        """
+        if root is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+            root = os.path.join(project_root, "data", "artifacts")
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.cleanup_interval = cleanup_interval
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._last_cleanup = 0.0
+        self._index_path = os.path.join(root, "index.json")
+        self._lock_path = os.path.join(root, "index.lock")
+        self._index_stamp: Optional[Tuple[int, int]] = None
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+
+    # ---------- 写入 ----------
+
+    def put(self, data: bytes, filename: str) -> StoredArtifact:
+        """写入文件内容；同名文件指向新内容，相同内容复用已有文件"""
+        self._check_filename(filename)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest, filename)
+        if not self._touch(path):
+            self._write_atomic(path, lambda file: file.write(data))
+        return self._register(filename, digest, path, len(data))
+
+    def put_file(self, source_path: str, filename: Optional[str] = None, move: bool = False) -> StoredArtifact:
+        """
+        把已有文件放入存储。
+
+        Args:
+            source_path: 源文件路径
+            filename: 下载文件名，默认使用源文件名
+            move: 是否移走源文件（否则复制）
+        """
+        filename = filename or os.path.basename(source_path)
+        self._check_filename(filename)
+        sha256 = hashlib.sha256()
+        with open(source_path, "rb") as file:
+            for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        size = os.path.getsize(source_path)
+        path = self._object_path(digest, filename)
+
+        if self._touch(path):
+            if move:
+                os.remove(source_path)
+        elif move:
+            try:
+                os.replace(source_path, path)
+            except OSError:
+                # 跨文件系统时无法直接重命名
+                self._write_atomic(path, lambda file: _copy_into(source_path, file))
+                os.remove(source_path)
+        else:
+            self._write_atomic(path, lambda file: _copy_into(source_path, file))
+        return self._register(filename, digest, path, size)
+
+    # ---------- 查询 ----------
+
+    def get(self, filename: str) -> Optional[StoredArtifact]:
+        """按下载文件名查找未过期的文件"""
+        self._refresh_index()
+        with self._lock:
+            entry = self._index.get(filename)
+        if entry is None or time.time() - entry["created"] > self.ttl_seconds:
+            return None
+        artifact = self._artifact(filename, entry)
+        return artifact if os.path.exists(artifact.path) else None
+
+    def find_latest(self, keyword: str, extension: str = "") -> Optional[StoredArtifact]:
+        """查找下载文件名包含关键词的最新文件"""
+        self._refresh_index()
+        with self._lock:
+            matches = sorted(((entry["created"], name) for name, entry in self._index.items()
+                              if keyword in name and name.endswith(extension)), reverse=True)
+        for _, name in matches:
+            artifact = self.get(name)
+            if artifact:
+                return artifact
+        return None
+
+    def list(self) -> List[str]:
+        self._refresh_index()
+        with self._lock:
+            return list(self._index)
+
+    def stats(self) -> Dict[str, int]:
+        self._refresh_index()
+        with self._lock:
+            digests = {entry["digest"]: entry["size"] for entry in self._index.values()}
+        return {"entries": len(self._index), "objects": len(digests), "bytes": sum(digests.values())}
+
+    # ---------- 清理 ----------
+
+    def cleanup(self, force: bool = False) -> int:
+        """
+        删除过期条目，总大小超限时按创建时间淘汰最旧的条目，再删除不再被引用的文件。
+        返回删除的条目数；未到清理间隔且 force=False 时直接返回 0。
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_cleanup < self.cleanup_interval:
+                return 0
+            self._last_cleanup = now
+
+        # 在文件锁下按磁盘上的最新索引淘汰与删除，其他进程此时无法登记新文件
+        with self._index_locked():
+            expired = [name for name, entry in self._index.items() if now - entry["created"] > self.ttl_seconds]
+            for name in expired:
+                del self._index[name]
+            removed = len(expired)
+
+            # 同一内容可能对应多个文件名，按内容去重后统计大小
+            objects: Dict[str, int] = {}
+            for entry in self._index.values():
+                objects[entry["path"]] = entry["size"]
+            total = sum(objects.values())
+            for name, entry in sorted(self._index.items(), key=lambda item: item[1]["created"]):
+                if total <= self.max_bytes:
+                    break
+                del self._index[name]
+                removed += 1
+                if entry["path"] in objects and not any(e["path"] == entry["path"] for e in self._index.values()):
+                    total -= objects.pop(entry["path"])
+
+            referenced = {entry["path"] for entry in self._index.values()}
+            self._save_index()
+
+            for name in os.listdir(self.objects_dir):
+                path = os.path.join(self.objects_dir, name)
+                if name in referenced:
+                    continue
+                try:
+                    # 刚写入、尚未登记的文件（含正在写入的临时文件）暂不删除
+                    grace = self.ttl_seconds if name.endswith(".tmp") else _UNREFERENCED_GRACE_SECONDS
+                    if now - os.stat(path).st_mtime > grace:
+                        os.remove(path)
+                except OSError:
+                    continue
+        if removed:
+            logger.info(f"🧹 已清理生成文件 {removed} 个")
+        return removed
+
+    # ---------- 内部 ----------
+
+    @staticmethod
+    def _check_filename(filename: str):
+        name = os.path.basename(filename or "")
+        if not name or name != filename or name in (".", ".."):
+            raise ValueError(f"非法的文件名: {filename}")
+
+    def _object_path(self, digest: str, filename: str) -> str:
+        return os.path.join(self.objects_dir, digest + os.path.splitext(filename)[1].lower())
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """内容已存在时更新修改时间并返回 True"""
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def _write_atomic(self, path: str, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                write(file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _register(self, filename: str, digest: str, path: str, size: int) -> StoredArtifact:
+        entry = {"digest": digest, "path": os.path.basename(path), "size": size, "created": time.time()}
+        with self._index_locked():
+            self._index[filename] = entry
+            self._save_index()
+        self.cleanup()
+        return self._artifact(filename, entry)
+
+    def _artifact(self, filename: str, entry: Dict[str, Any]) -> StoredArtifact:
+        return StoredArtifact(filename, os.path.join(self.objects_dir, entry["path"]), entry["size"],
+                              entry["digest"], entry["created"])
+
+    @contextmanager
+    def _index_locked(self):
+        """持有进程内锁与跨进程文件锁，并把内存索引替换为磁盘上的最新内容"""
+        with self._lock:
+            with open(self._lock_path, "a+b") as lock_file:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    self._index = self._load_index()
+                    yield
+                finally:
+                    if FCNTL_AVAILABLE:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _refresh_index(self):
+        """索引文件被其他进程更新过时重新载入（索引文件整体原子替换，读取无需文件锁）"""
+        if self._stat_index() != self._index_stamp:
+            with self._lock:
+                if self._stat_index() != self._index_stamp:
+                    self._index = self._load_index()
+
+    def _stat_index(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._index_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        self._index_stamp = self._stat_index()
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ 生成文件索引读取失败，将重新建立: {e}")
+            return {}
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self._index, file, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._index_stamp = self._stat_index()
+
+
+def _copy_into(source_path: str, target):
+    with open(source_path, "rb") as source:
+        shutil.copyfileobj(source, target, _HASH_CHUNK_SIZE)
+
+
+# 全局生成文件存储实例
+_global_artifact_store = None
+_global_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """获取全局生成文件存储实例"""
+    global _global_artifact_store
+    if _global_artifact_store is None:
+        with _global_artifact_store_lock:
+            if _global_artifact_store is None:
+                _global_artifact_store = ArtifactStore()
+    return _global_artifact_store
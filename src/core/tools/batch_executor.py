@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Executor - 核心模块
+
+LLM 调用与 CPU 计算分别限流的批量执行器：
+- 每个文档在线程池中处理，处理期间占用一个 CPU 槽位（上限 cpu_workers）；
+- 经由 wrap_llm_client 包装的客户端发起 LLM 请求时占用一个 LLM 槽位（上限 llm_concurrency），
+  并在等待响应期间让出 CPU 槽位，其他文档可以同时进行特征提取；
+- 结果按输入顺序返回，进度按完成顺序回调。
+批量吞吐因此取决于 API 允许的并发数，而不是逐个文档的串行延迟。
+所有文档都在同一进程的线程中处理（不使用进程池），CPU 槽位限制的是同时计算的线程数，
+纯 Python 计算仍受 GIL 约束，不能据此获得多核加速。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.1
+License: MIT
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional, Sequence
+
+DEFAULT_LLM_CONCURRENCY = 4
+
+# 进度回调：(已完成数, 总数, 完成项的输入序号)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+class BatchExecutor:
+    """LLM 并发数与 CPU 工作数分别限制的批量执行器"""
+
+    def __init__(self, llm_concurrency: int = DEFAULT_LLM_CONCURRENCY, cpu_workers: Optional[int] = None):
+        """
+        Args:
+            llm_concurrency: 同时进行的 LLM 请求数上限
+            cpu_workers: 同时进行 CPU 计算的文档数上限，默认为 CPU 核数。
+                         这里限制的是线程数，计算仍在同一进程中受 GIL 约束，并不等于真正的多核并行
+        """
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.cpu_workers = max(1, cpu_workers or os.cpu_count() or 1)
+        self._llm_slots = threading.BoundedSemaphore(self.llm_concurrency)
+        self._cpu_slots = threading.BoundedSemaphore(self.cpu_workers)
+        self._local = threading.local()
+
+    @contextmanager
+    def llm_call(self):
+        """LLM 请求期间占用 LLM 槽位；当前线程持有 CPU 槽位时先让出，请求结束后再取回"""
+        holds_cpu = getattr(self._local, "holds_cpu", False)
+        if holds_cpu:
+            self._local.holds_cpu = False
+            self._cpu_slots.release()
+        self._llm_slots.acquire()
+        try:
+            yield
+        finally:
+            self._llm_slots.release()
+            if holds_cpu:
+                self._cpu_slots.acquire()
+                self._local.holds_cpu = True
+
+    @contextmanager
+    def cpu_task(self):
+        """
+        占用 CPU 槽位执行一段计算。可以嵌套：当前线程已持有槽位时内层不再获取，
+        槽位由获取它的那一层释放
+        """
+        acquired = not getattr(self._local, "holds_cpu", False)
+        if acquired:
+            self._cpu_slots.acquire()
+            self._local.holds_cpu = True
+        try:
+            yield
+        finally:
+            if acquired:
+                self._local.holds_cpu = False
+                self._cpu_slots.release()
+
+    def wrap_llm_client(self, llm_client: Any) -> Any:
+        """
+        包装 LLM 客户端：通过包装对象调用的方法都计入 LLM 并发数。
+        客户端已由其他执行器包装时再包一层，两个执行器的限制同时生效。
+        """
+        if llm_client is None or (isinstance(llm_client, LimitedLLMClient) and llm_client._executor is self):
+            return llm_client
+        return LimitedLLMClient(llm_client, self)
+
+    def map(self, func: Callable[[Any], Any], items: Sequence[Any],
+            progress_callback: Optional[ProgressCallback] = None,
+            on_error: Optional[Callable[[int, Any, Exception], Any]] = None) -> List[Any]:
+        """
+        并发执行 func(item)，结果按输入顺序返回。
+
+        Args:
+            func: 处理单项的函数，在 CPU 槽位内执行
+            items: 输入列表
+            progress_callback: 每完成一项调用一次
+            on_error: 单项出错时生成替代结果的函数 (序号, 输入, 异常)；为 None 时异常直接抛出
+        """
+        total = len(items)
+        results: List[Any] = [None] * total
+        if total == 0:
+            return results
+
+        def run(item):
+            with self.cpu_task():
+                return func(item)
+
+        # 线程数足够让 CPU 槽位与 LLM 槽位同时占满
+        workers = min(total, self.cpu_workers + self.llm_concurrency)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+            futures = {pool.submit(run, item): index for index, item in enumerate(items)}
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    results[index] = on_error(index, items[index], e)
+                if progress_callback:
+                    progress_callback(done, total, index)
+        return results
+
+
+class LimitedLLMClient:
+    """限制并发的 LLM 客户端代理：方法调用经过执行器的 LLM 槽位，其他属性原样转发"""
+
+    def __init__(self, llm_client: Any, executor: BatchExecutor):
+        self._llm_client = llm_client
+        self._executor = executor
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._llm_client, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def limited(*args, **kwargs):
+            with self._executor.llm_call():
+                return attribute(*args, **kwargs)
+        return limited
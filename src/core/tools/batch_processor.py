@@ -3,37 +3,70 @@
 """
 Batch Processor - 核心模块
 
+批量处理作业持久化在数据库中：
+- 每个文件一条 batch_file_records 记录，处理状态随处理进度写入；
+- 进程重启后 resume_unfinished_jobs 恢复未结束的作业，只处理尚未完成的文件；
+- 文件内容与处理配置都相同、且已有成功结果的文件直接复用结果（状态 skipped）；
+- 取消作业为协作式：已在处理的文件处理完为止，尚未开始的文件不再处理（状态 cancelled）。
+
+作业协调与文件处理使用不同的线程：每个作业由协调线程池中的一个线程提交文件并等待结束，
+文件任务交给 BatchScheduler 的工作线程，按作业轮转执行、按操作类型限制并发，
+CPU 密集的处理器可以注册为在进程池中执行。
+
 Author: AI Assistant (Claude)
 Created: 2025-01-28
 Last Modified: 2025-01-28
 Modified By: AI Assistant (Claude)
 AI Assisted: 是 - Claude 3.5 Sonnet
-Version: v1.0
+Version: v1.2
 License: MIT
 """
 
 
 import os
+import json
 import time
 import uuid
+import hashlib
 import threading
 from typing import List, Dict, Any, Optional, Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 
 from ..database import (
     BatchProcessingRepository, 
+    BatchFileRepository,
     DocumentRepository,
     BatchProcessingRecord,
+    BatchFileRecord,
     DocumentRecord,
     get_database_manager
 )
 from ..monitoring import PerformanceTimer, record_performance
+from .batch_scheduler import BatchScheduler
 
 logger = logging.getLogger(__name__)
 
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_content_hash(file_path: str) -> str:
+    """文件内容的 SHA-256"""
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def config_hash(processing_config: Dict[str, Any]) -> str:
+    """处理配置的摘要（按排序后的 JSON 计算）"""
+    data = json.dumps(processing_config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
 @dataclass
 class BatchJob:
     """批量处理作业"""
@@ -46,47 +79,79 @@ class BatchJob:
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     progress: Dict[str, Any] = None
+    file_records: List[BatchFileRecord] = field(default_factory=list)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
     
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.now()
         if self.progress is None:
+            finished = [record for record in self.file_records if record.is_finished()]
             self.progress = {
                 'total': len(self.files),
-                'processed': 0,
-                'successful': 0,
-                'failed': 0,
+                'processed': len(finished),
+                'successful': sum(1 for record in finished if record.status != "failed"),
+                'failed': sum(1 for record in finished if record.status == "failed"),
+                'skipped': sum(1 for record in finished if record.status == "skipped"),
                 'current_file': None
             }
 
 class BatchProcessor:
     """批量处理器"""
     
-    def __init__(self, max_workers: int = 3):
+    def __init__(self, max_workers: int = 3, coordinator_workers: int = 8,
+                 process_workers: Optional[int] = None, max_attempts: int = 3):
         """
         初始化批量处理器
         
         Args:
-            max_workers: 最大并行处理数
+            max_workers: 最大并行处理文件数（所有作业共享）
+            coordinator_workers: 同时运行的作业数上限，超出的作业排队等待
+            process_workers: 进程池大小，供注册时指定 use_process_pool 的处理器使用
+            max_attempts: 文件处理中进程退出的次数达到该值后，恢复作业时不再重试该文件而记为失败
         """
         self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_attempts = max(1, max_attempts)
+        # 协调线程只提交文件并等待结果，文件处理在调度器的工作线程中进行，两者互不占用
+        self.coordinator_executor = ThreadPoolExecutor(max_workers=coordinator_workers,
+                                                       thread_name_prefix="batch-job")
+        self.scheduler = BatchScheduler(max_workers=max_workers, process_workers=process_workers)
         self.active_jobs: Dict[str, BatchJob] = {}
         self.job_lock = threading.RLock()
         
         # 数据库仓库
         self.batch_repo = BatchProcessingRepository()
+        self.file_repo = BatchFileRepository()
         self.doc_repo = DocumentRepository()
         
         # 处理器映射
         self.processors = {}
+        # 从数据库恢复、等待对应处理器注册后启动的作业
+        self._recovered_jobs = set()
         
         logger.info(f"BatchProcessor initialized with {max_workers} workers")
     
-    def register_processor(self, operation_type: str, processor_func: Callable):
-        """注册处理器函数"""
+    def register_processor(self, operation_type: str, processor_func: Callable,
+                           max_concurrency: Optional[int] = None, use_process_pool: bool = False):
+        """
+        注册处理器函数
+        
+        Args:
+            operation_type: 操作类型
+            processor_func: 处理函数 (file_path, processing_config) -> 结果
+            max_concurrency: 该操作同时处理的文件数上限，默认只受 max_workers 限制
+            use_process_pool: 在进程池中执行处理函数（适合 CPU 密集的处理器，函数需可 pickle）
+        """
         self.processors[operation_type] = processor_func
+        self.scheduler.configure_operation(operation_type, max_concurrency, use_process_pool)
         logger.info(f"Registered processor for operation: {operation_type}")
+        
+        with self.job_lock:
+            waiting = [job_id for job_id in self._recovered_jobs
+                       if self.active_jobs[job_id].processing_config.get('operation', 'default') == operation_type]
+        for job_id in waiting:
+            self._recovered_jobs.discard(job_id)
+            self.start_batch_job(job_id)
     
     def create_batch_job(self, name: str, files: List[str], 
                         processing_config: Dict[str, Any]) -> str:
@@ -128,28 +193,44 @@ class BatchProcessor:
         if not valid_files:
             raise ValueError("No valid files provided for batch processing")
         
+        # 每个文件的内容摘要，用于复用相同文件的已有结果
+        settings_hash = config_hash(processing_config)
+        file_records = []
+        for index, file_path in enumerate(valid_files):
+            try:
+                file_hash = file_content_hash(file_path)
+            except OSError as e:
+                logger.warning(f"Error hashing file {file_path}: {e}")
+                file_hash = None
+            file_records.append(BatchFileRecord(file_index=index, file_path=file_path,
+                                                file_hash=file_hash, config_hash=settings_hash))
+        
         # 创建作业
         job = BatchJob(
             id=job_id,
             name=name,
             files=valid_files,
-            processing_config=processing_config
+            processing_config=processing_config,
+            file_records=file_records
         )
         
-        with self.job_lock:
-            self.active_jobs[job_id] = job
-        
         # 保存到数据库
         batch_record = BatchProcessingRecord(
             batch_name=name,
             total_files=len(valid_files),
-            configuration=processing_config
+            job_id=job_id
         )
         batch_record.set_configuration(processing_config)
         
-        db_id = self.batch_repo.create_batch_record(batch_record)
+        # 批次与文件记录在同一事务中写入；写入失败时作业只在内存中运行，不会被恢复
+        db_id = self.batch_repo.create_batch_with_files(batch_record, file_records)
         if db_id:
             job.progress['db_id'] = db_id
+        else:
+            logger.warning(f"Batch job {job_id} is not persisted and cannot be resumed after restart")
+        
+        with self.job_lock:
+            self.active_jobs[job_id] = job
         
         logger.info(f"Created batch job {job_id} with {len(valid_files)} files")
         return job_id
@@ -177,8 +258,11 @@ class BatchProcessor:
             job.status = "processing"
             job.started_at = datetime.now()
         
-        # 提交到线程池执行
-        future = self.executor.submit(self._process_batch_job, job_id)
+        if 'db_id' in job.progress:
+            self.batch_repo.start_batch(job.progress['db_id'])
+        
+        # 提交到协调线程池执行
+        self.coordinator_executor.submit(self._process_batch_job, job_id)
         
         logger.info(f"Started batch job {job_id}")
         return True
@@ -202,7 +286,7 @@ class BatchProcessor:
             with PerformanceTimer(f"batch_processing_{operation_type}"):
                 self._process_files_parallel(job, processor_func)
             
-            # 判断作业是否成功
+            # 判断作业是否成功（已取消的作业由 _complete_job 保持取消状态）
             success = job.progress['failed'] == 0
             self._complete_job(job_id, success)
             
@@ -211,74 +295,123 @@ class BatchProcessor:
             self._complete_job(job_id, False, str(e))
     
     def _process_files_parallel(self, job: BatchJob, processor_func: Callable):
-        """并行处理文件"""
+        """并行处理尚未完成的文件"""
         futures = {}
+        operation_type = job.processing_config.get('operation', 'default')
         
-        # 提交所有文件处理任务
-        for file_path in job.files:
-            future = self.executor.submit(self._process_single_file, 
-                                        job, file_path, processor_func)
-            futures[future] = file_path
+        # 提交所有未完成文件的处理任务（续跑时跳过已完成的文件）
+        for record in job.file_records:
+            if record.is_finished():
+                continue
+            future = self.scheduler.submit(job.id, operation_type, self._process_single_file,
+                                           job, record, processor_func)
+            futures[future] = record
         
         # 等待所有任务完成
         for future in as_completed(futures):
-            file_path = futures[future]
+            record = futures[future]
+            file_path = record.file_path
+            
+            # 取消作业时调度器直接丢弃尚未开始的任务
+            if future.cancelled():
+                self._finish_file(record, "cancelled")
+                continue
             
             try:
-                success = future.result()
-                
-                with self.job_lock:
-                    job.progress['processed'] += 1
-                    if success:
-                        job.progress['successful'] += 1
-                    else:
-                        job.progress['failed'] += 1
-                    
-                    job.progress['current_file'] = file_path
-                    
-                    # 更新数据库进度
-                    if 'db_id' in job.progress:
-                        self.batch_repo.update_batch_progress(
-                            job.progress['db_id'],
-                            job.progress['processed'],
-                            job.progress['successful'],
-                            job.progress['failed']
-                        )
-                
-                logger.info(f"Processed file {file_path} in job {job.id}: {'success' if success else 'failed'}")
-                
+                status = future.result()
             except Exception as e:
                 logger.error(f"Error processing file {file_path} in job {job.id}: {e}")
-                
-                with self.job_lock:
-                    job.progress['processed'] += 1
+                status = "failed"
+            
+            if status == "cancelled":
+                continue
+            
+            with self.job_lock:
+                job.progress['processed'] += 1
+                if status == "failed":
                     job.progress['failed'] += 1
+                else:
+                    job.progress['successful'] += 1
+                    if status == "skipped":
+                        job.progress['skipped'] += 1
+                
+                job.progress['current_file'] = file_path
+                
+                # 更新数据库进度
+                if 'db_id' in job.progress:
+                    self.batch_repo.update_batch_progress(
+                        job.progress['db_id'],
+                        job.progress['processed'],
+                        job.progress['successful'],
+                        job.progress['failed']
+                    )
+            
+            logger.info(f"Processed file {file_path} in job {job.id}: {status}")
     
-    def _process_single_file(self, job: BatchJob, file_path: str, 
-                           processor_func: Callable) -> bool:
-        """处理单个文件"""
+    def _process_single_file(self, job: BatchJob, record: BatchFileRecord, 
+                           processor_func: Callable) -> str:
+        """
+        处理单个文件并记录文件状态
+        
+        Returns:
+            文件最终状态：completed / failed / skipped / cancelled
+        """
+        if job.cancel_event.is_set():
+            self._finish_file(record, "cancelled")
+            return record.status
+        
+        # 相同内容、相同配置已有成功结果时直接复用
+        if record.file_hash:
+            previous = self.file_repo.find_successful_result(record.file_hash, record.config_hash)
+            if previous and previous.id != record.id:
+                self._finish_file(record, "skipped", previous.result, reused_from=previous.id)
+                logger.info(f"Reused result of file record {previous.id} for {record.file_path}")
+                return record.status
+        
+        record.attempts += 1
+        if record.id:
+            self.file_repo.mark_file_processing(record.id)
+        
         try:
             start_time = time.time()
             
-            # 调用处理器函数
-            result = processor_func(file_path, job.processing_config)
+            # 调用处理器函数（按注册配置在当前工作线程或进程池中执行）
+            result = self.scheduler.call_processor(job.processing_config.get('operation', 'default'),
+                                                   processor_func, record.file_path, job.processing_config)
             
             processing_time = (time.time() - start_time) * 1000
+            success = result.get('success', False) if isinstance(result, dict) else bool(result)
+            error_message = result.get('error') if isinstance(result, dict) else None
             
             # 记录性能指标
             record_performance(
                 f"batch_file_processing",
                 processing_time,
-                result.get('success', False) if isinstance(result, dict) else bool(result),
-                result.get('error') if isinstance(result, dict) else None
+                success,
+                error_message
             )
             
-            return result.get('success', False) if isinstance(result, dict) else bool(result)
+            record.set_result(result if isinstance(result, dict) else {'success': success})
+            self._finish_file(record, "completed" if success else "failed", record.result,
+                              error_message=error_message)
             
         except Exception as e:
-            logger.error(f"Error processing file {file_path}: {e}")
+            logger.error(f"Error processing file {record.file_path}: {e}")
             record_performance(f"batch_file_processing", 0, False, str(e))
-            return False
+            self._finish_file(record, "failed", error_message=str(e))
+        
+        return record.status
+    
+    def _finish_file(self, record: BatchFileRecord, status: str, result: Optional[str] = None,
+                     error_message: str = None, reused_from: int = None):
+        """更新文件记录的最终状态并写入数据库"""
+        record.status = status
+        record.result = result
+        record.error_message = error_message
+        record.reused_from = reused_from
+        record.completed_at = datetime.now()
+        if record.id:
+            self.file_repo.finish_file(record.id, status, result, error_message, reused_from)
     
     def _complete_job(self, job_id: str, success: bool, error_message: str = None):
         """完成作业"""
@@ -287,6 +420,11 @@ class BatchProcessor:
             if not job:
                 return
             
+            # 取消时 cancel_job 已经记录了作业状态
+            if job.cancel_event.is_set():
+                logger.info(f"Batch job {job_id} stopped after cancellation")
+                return
+            
             job.status = "completed" if success else "failed"
             job.completed_at = datetime.now()
             
@@ -319,8 +457,18 @@ class BatchProcessor:
                 'processing_config': job.processing_config
             }
     
+    def get_job_files(self, job_id: str) -> Optional[List[Dict[str, Any]]]:
+        """获取作业中每个文件的处理状态"""
+        with self.job_lock:
+            job = self.active_jobs.get(job_id)
+            if not job:
+                return None
+            return [record.to_dict() for record in job.file_records]
+    
     def cancel_job(self, job_id: str) -> bool:
-        """取消作业"""
+        """
+        取消作业（协作式）：正在处理的文件处理完为止，尚未开始的文件不再处理
+        """
         with self.job_lock:
             job = self.active_jobs.get(job_id)
             if not job:
@@ -329,17 +477,28 @@ class BatchProcessor:
             if job.status in ["completed", "failed", "cancelled"]:
                 return False
             
+            not_started = job.status == "pending"
+            job.cancel_event.set()
             job.status = "cancelled"
             job.completed_at = datetime.now()
+            self._recovered_jobs.discard(job_id)
             
             # 更新数据库
             if 'db_id' in job.progress:
                 self.batch_repo.complete_batch(
                     job.progress['db_id'], 
                     False, 
-                    "Job cancelled by user"
+                    "Job cancelled by user",
+                    status="cancelled"
                 )
         
+        # 丢弃排队中的文件任务；尚未启动的作业不会再有处理线程，直接标记其文件
+        self.scheduler.cancel_job(job_id)
+        if not_started:
+            for record in job.file_records:
+                if not record.is_finished():
+                    self._finish_file(record, "cancelled")
+        
         logger.info(f"Batch job {job_id} cancelled")
         return True
     
@@ -369,10 +528,63 @@ class BatchProcessor:
         logger.info(f"Cleaned up {len(jobs_to_remove)} completed jobs")
         return len(jobs_to_remove)
     
+    def resume_unfinished_jobs(self) -> int:
+        """
+        恢复数据库中未结束的作业（进程重启后调用）。
+        上次退出时正在处理的文件恢复为待处理（已中断 max_attempts 次的记为失败），已完成的文件不再处理；
+        对应处理器已注册的作业立即启动，否则在 register_processor 时启动。
+        创建后尚未启动的作业只重新载入为 pending，仍由调用方通过 start_batch_job 启动。
+        
+        Returns:
+            恢复的（重新启动的）作业数
+        """
+        resumed = 0
+        for batch in self.batch_repo.get_unfinished_batches():
+            with self.job_lock:
+                if batch.job_id in self.active_jobs:
+                    continue
+            
+            interrupted = batch.processing_status == "processing"
+            if interrupted:
+                self.file_repo.reset_interrupted_files(batch.id, self.max_attempts)
+            file_records = self.file_repo.get_batch_files(batch.id)
+            job = BatchJob(
+                id=batch.job_id,
+                name=batch.batch_name,
+                files=[record.file_path for record in file_records],
+                processing_config=batch.get_configuration(),
+                created_at=batch.created_at,
+                file_records=file_records
+            )
+            job.progress['db_id'] = batch.id
+            
+            with self.job_lock:
+                self.active_jobs[job.id] = job
+                if interrupted:
+                    self._recovered_jobs.add(job.id)
+            
+            if not interrupted:
+                logger.info(f"Reloaded pending batch job {job.id}")
+                continue
+            
+            # 放弃重试的文件计入失败数
+            self.batch_repo.update_batch_progress(batch.id, job.progress['processed'],
+                                                  job.progress['successful'], job.progress['failed'])
+            resumed += 1
+            logger.info(f"Recovered batch job {job.id}: "
+                        f"{job.progress['processed']}/{job.progress['total']} files already processed")
+            
+            if job.processing_config.get('operation', 'default') in self.processors:
+                self._recovered_jobs.discard(job.id)
+                self.start_batch_job(job.id)
+        
+        return resumed
+    
     def shutdown(self):
         """关闭批量处理器"""
         logger.info("Shutting down BatchProcessor")
-        self.executor.shutdown(wait=True)
+        self.coordinator_executor.shutdown(wait=True)
+        self.scheduler.shutdown(wait=True)
 
 # 全局批量处理器实例
 _global_batch_processor = None
@@ -382,4 +594,5 @@ def get_batch_processor() -> BatchProcessor:
     global _global_batch_processor
     if _global_batch_processor is None:
         _global_batch_processor = BatchProcessor()
+        _global_batch_processor.resume_unfinished_jobs()
     return _global_batch_processor
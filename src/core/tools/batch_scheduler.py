@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Scheduler - 核心模块
+
+BatchProcessor 的文件任务调度器：
+- 文件任务由独立的工作线程执行，与等待作业结束的协调线程分开，
+  多个批量作业同时运行时协调线程不会占满工作线程而互相等待；
+- 各作业的任务分别排队，工作线程空闲时按作业轮转取任务，后提交的小作业不必等大作业全部处理完；
+- 可以按操作类型限制同时处理的文件数（如调用外部 API 的操作）；
+- CPU 密集的操作可以配置为在进程池中执行处理函数（处理函数必须可以 pickle，即模块级函数）。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """按作业轮转分配工作线程、按操作类型限制并发的文件任务调度器"""
+
+    def __init__(self, max_workers: int = 3, process_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: 工作线程数，即同时处理的文件数上限
+            process_workers: 进程池大小，默认为 min(max_workers, CPU 核数)；仅在有操作使用进程池时创建
+        """
+        self.max_workers = max(1, max_workers)
+        self.process_workers = max(1, process_workers or min(self.max_workers, os.cpu_count() or 1))
+
+        self._condition = threading.Condition()
+        # 作业ID → 任务队列；有序字典的顺序即轮转顺序
+        self._queues: "OrderedDict[str, Deque[tuple]]" = OrderedDict()
+        self._operation_limits: Dict[str, int] = {}
+        self._process_operations = set()
+        self._running: Dict[str, int] = defaultdict(int)
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_lock = threading.Lock()
+        self._shutdown = False
+
+        self._workers = [threading.Thread(target=self._worker_loop, name=f"batch-worker-{index}", daemon=True)
+                         for index in range(self.max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def configure_operation(self, operation: str, max_concurrency: Optional[int] = None,
+                            use_process_pool: bool = False):
+        """
+        配置操作类型的调度方式
+
+        Args:
+            operation: 操作类型
+            max_concurrency: 该操作同时处理的文件数上限，None 表示只受工作线程数限制
+            use_process_pool: 处理函数是否在进程池中执行
+        """
+        with self._condition:
+            if max_concurrency:
+                self._operation_limits[operation] = max(1, max_concurrency)
+            else:
+                self._operation_limits.pop(operation, None)
+            if use_process_pool:
+                self._process_operations.add(operation)
+            else:
+                self._process_operations.discard(operation)
+            self._condition.notify_all()
+
+    def submit(self, job_id: str, operation: str, fn: Callable, *args, **kwargs) -> Future:
+        """把作业的一个任务加入队列，任务在工作线程中执行"""
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new tasks after shutdown")
+            self._queues.setdefault(job_id, deque()).append((operation, future, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def cancel_job(self, job_id: str) -> int:
+        """取消作业中尚未开始的任务，返回取消的任务数"""
+        with self._condition:
+            queue = self._queues.pop(job_id, None)
+        cancelled = 0
+        for _, future, _, _, _ in queue or ():
+            # 取消后还需标记为已通知，as_completed / wait 才会收到取消
+            if future.cancel():
+                future.set_running_or_notify_cancel()
+                cancelled += 1
+        return cancelled
+
+    def call_processor(self, operation: str, processor_func: Callable, *args) -> Any:
+        """执行处理函数：配置为使用进程池的操作在进程池中执行，其余在当前线程中执行"""
+        if operation not in self._process_operations:
+            return processor_func(*args)
+        return self._get_process_pool().submit(processor_func, *args).result()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取排队与运行中的任务数"""
+        with self._condition:
+            return {
+                'max_workers': self.max_workers,
+                'queued': {job_id: len(queue) for job_id, queue in self._queues.items()},
+                'running': {operation: count for operation, count in self._running.items() if count},
+                'operation_limits': dict(self._operation_limits),
+                'process_operations': sorted(self._process_operations)
+            }
+
+    def shutdown(self, wait: bool = True):
+        """关闭调度器：已排队的任务处理完后工作线程退出"""
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=wait)
+                self._process_pool = None
+
+    # ---------- 内部 ----------
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._process_pool
+
+    def _next_task(self) -> Optional[tuple]:
+        """按轮转顺序找出第一个未达到操作并发上限的作业，取出其队首任务（调用方持有锁）"""
+        for job_id, queue in self._queues.items():
+            operation = queue[0][0]
+            if self._running[operation] >= self._operation_limits.get(operation, self.max_workers):
+                continue
+            task = queue.popleft()
+            if queue:
+                self._queues.move_to_end(job_id)
+            else:
+                del self._queues[job_id]
+            self._running[operation] += 1
+            return task
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                task = self._next_task()
+                while task is None:
+                    if self._shutdown and not self._queues:
+                        return
+                    self._condition.wait()
+                    task = self._next_task()
+
+            operation, future, fn, args, kwargs = task
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running[operation] -= 1
+                    self._condition.notify_all()
@@ -19,6 +19,8 @@ from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime
 import hashlib
 
+from .structure_patterns import get_pattern_registry
+
 class ComplexDocumentFiller:
     
     def __init__(self, llm_client=None):
@@ -141,35 +143,41 @@ class ComplexDocumentFiller:
         fill_fields = []
         lines = content.split('\n')
         
+        # 所有字段模式预编译为一个集合，不含任何字段的行只需一次预筛选匹配
+        field_patterns = get_pattern_registry().pattern_set(
+            ((field_type, pattern)
+             for field_type, field_info in self.fill_patterns.items()
+             for pattern in field_info["patterns"]),
+            re.IGNORECASE
+        )
+        
         for line_num, line in enumerate(lines):
             line = line.strip()
             if not line:
                 continue
             
             # 检查每种字段类型
-            for field_type, field_info in self.fill_patterns.items():
-                for pattern in field_info["patterns"]:
-                    matches = re.finditer(pattern, line, re.IGNORECASE)
-                    for match in matches:
-                        field = {
-                            "field_id": f"field_{len(fill_fields) + 1}",
-                            "field_type": field_type,
-                            "category": field_info["category"],
-                            "line_number": line_num + 1,
-                            "line_content": line,
-                            "match_text": match.group(),
-                            "position": match.span(),
-                            "context": self._extract_context(lines, line_num),
-                            "required_info": field_info["required_info"],
-                            "confidence": 0.8,
-                            "filled": False,
-                            "value": None
-                        }
-                        
-                        # 尝试从上下文推断字段含义
-                        field["inferred_meaning"] = self._infer_field_meaning(field)
-                        
-                        fill_fields.append(field)
+            for field_type, match in field_patterns.finditer(line):
+                field_info = self.fill_patterns[field_type]
+                field = {
+                    "field_id": f"field_{len(fill_fields) + 1}",
+                    "field_type": field_type,
+                    "category": field_info["category"],
+                    "line_number": line_num + 1,
+                    "line_content": line,
+                    "match_text": match.group(),
+                    "position": match.span(),
+                    "context": self._extract_context(lines, line_num),
+                    "required_info": field_info["required_info"],
+                    "confidence": 0.8,
+                    "filled": False,
+                    "value": None
+                }
+                
+                # 尝试从上下文推断字段含义
+                field["inferred_meaning"] = self._infer_field_meaning(field)
+                
+                fill_fields.append(field)
         
         return fill_fields
     
@@ -228,8 +236,8 @@ class ComplexDocumentFiller:
     
     def _is_table_header(self, line: str) -> bool:
         """判断是否是表格标题行"""
-        indicators = self.table_patterns["header_indicators"]
-        return any(indicator in line for indicator in indicators)
+        indicators = get_pattern_registry().keyword_pattern(self.table_patterns["header_indicators"])
+        return indicators.search(line) is not None
     
     def _is_table_row(self, line: str) -> bool:
         """判断是否是表格数据行"""
@@ -272,11 +280,10 @@ class ComplexDocumentFiller:
         if not cell or cell.isspace():
             return True
         
-        for pattern in self.table_patterns["empty_cell_patterns"]:
-            if re.match(pattern, cell):
-                return True
-        
-        return False
+        empty_cell_patterns = get_pattern_registry().pattern_set(
+            (pattern, pattern) for pattern in self.table_patterns["empty_cell_patterns"]
+        )
+        return empty_cell_patterns.match_any(cell)
     
     def _extract_context(self, lines: List[str], line_num: int, context_size: int = 2) -> Dict[str, str]:
         """提取字段上下文"""
@@ -15,6 +15,7 @@ License: MIT
 
 import json
 import os
+import time
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 
@@ -22,6 +23,7 @@ from .enhanced_style_extractor import EnhancedStyleExtractor
 from .llm_style_analyzer import AdvancedLLMStyleAnalyzer
 from .feature_fusion_processor import FeatureFusionProcessor
 from .style_alignment_engine import StyleAlignmentEngine
+from .batch_executor import BatchExecutor, DEFAULT_LLM_CONCURRENCY
 
 # 导入语义空间行为算法组件
 try:
@@ -35,14 +37,20 @@ except ImportError:
 class ComprehensiveStyleProcessor:
     """综合文风处理器 - 主接口类"""
     
-    def __init__(self, llm_client=None, storage_path: str = "src/core/knowledge_base/comprehensive_style"):
+    def __init__(self, llm_client=None, storage_path: str = "src/core/knowledge_base/comprehensive_style",
+                 llm_concurrency: int = DEFAULT_LLM_CONCURRENCY, cpu_workers: Optional[int] = None):
         """
         初始化综合文风处理器
         
         Args:
             llm_client: LLM客户端
             storage_path: 存储路径
+            llm_concurrency: 批量处理时同时进行的LLM请求数上限
+            cpu_workers: 批量处理时同时进行特征计算的文档数上限，默认为CPU核数
         """
+        # 各组件共用同一个限流后的客户端，批量处理时LLM请求总数受 llm_concurrency 限制
+        self.batch_executor = BatchExecutor(llm_concurrency, cpu_workers)
+        llm_client = self.batch_executor.wrap_llm_client(llm_client)
         self.llm_client = llm_client
         self.storage_path = storage_path
         os.makedirs(storage_path, exist_ok=True)
@@ -147,7 +155,8 @@ class ComprehensiveStyleProcessor:
         return result
     
     def compare_document_styles(self, text1: str, text2: str, 
-                              doc1_name: str = None, doc2_name: str = None) -> Dict[str, Any]:
+                              doc1_name: str = None, doc2_name: str = None,
+                              doc2_features: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         比较两个文档的文风
         
@@ -156,6 +165,7 @@ class ComprehensiveStyleProcessor:
             text2: 第二个文档文本
             doc1_name: 第一个文档名称
             doc2_name: 第二个文档名称
+            doc2_features: 第二个文档已提取的特征（批量对比同一参考文档时复用）
         """
         print(f"开始比较文档风格: {doc1_name or '文档1'} vs {doc2_name or '文档2'}")
         
@@ -178,8 +188,9 @@ class ComprehensiveStyleProcessor:
             doc1_features = self.extract_comprehensive_style_features(text1, doc1_name, True)
             result["document1_features"] = doc1_features
             
-            print("正在提取第二个文档的特征...")
-            doc2_features = self.extract_comprehensive_style_features(text2, doc2_name, True)
+            if doc2_features is None:
+                print("正在提取第二个文档的特征...")
+                doc2_features = self.extract_comprehensive_style_features(text2, doc2_name, True)
             result["document2_features"] = doc2_features
             
             # 2. 计算相似度
@@ -214,7 +225,8 @@ class ComprehensiveStyleProcessor:
         return result
     
     def align_text_style(self, source_text: str, target_text: str, content_to_align: str,
-                        source_name: str = None, target_name: str = None) -> Dict[str, Any]:
+                        source_name: str = None, target_name: str = None,
+                        target_features: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         将文本对齐到目标风格
         
@@ -224,6 +236,7 @@ class ComprehensiveStyleProcessor:
             content_to_align: 需要对齐的内容
             source_name: 源文档名称
             target_name: 目标文档名称
+            target_features: 目标文档已提取的特征（批量对齐到同一目标文档时复用）
         """
         print(f"开始文风对齐: {source_name or '源文档'} -> {target_name or '目标文档'}")
         
@@ -247,8 +260,9 @@ class ComprehensiveStyleProcessor:
             source_features = self.extract_comprehensive_style_features(source_text, source_name, True)
             result["source_features"] = source_features
             
-            print("正在分析目标文档风格...")
-            target_features = self.extract_comprehensive_style_features(target_text, target_name, True)
+            if target_features is None:
+                print("正在分析目标文档风格...")
+                target_features = self.extract_comprehensive_style_features(target_text, target_name, True)
             result["target_features"] = target_features
             
             # 2. 执行文风对齐
@@ -543,13 +557,19 @@ class ComprehensiveStyleProcessor:
         return insights
 
     def batch_process_documents(self, documents: List[Dict[str, str]],
-                              processing_type: str = "extract") -> Dict[str, Any]:
+                              processing_type: str = "extract",
+                              reference: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
-        批量处理文档
+        批量处理文档。文档并发处理：LLM请求数与特征计算数分别受 llm_concurrency、cpu_workers 限制，
+        结果按输入顺序返回。
         
         Args:
-            documents: 文档列表，每个文档包含 {"text": "...", "name": "..."}
+            documents: 文档列表，每个文档包含 {"text": "...", "name": "..."}；
+                       compare / align 时可用 "reference_text"、"reference_name" 单独指定参考文档，
+                       align 时可用 "content_to_align" 指定需要对齐的内容（默认为 text）
             processing_type: 处理类型 ("extract", "compare", "align")
+            reference: compare 的对比文档 / align 的目标风格文档 {"text": "...", "name": "..."}，
+                       其特征只提取一次，供所有文档复用
         """
         print(f"开始批量处理 {len(documents)} 个文档，处理类型: {processing_type}")
         
@@ -565,40 +585,50 @@ class ComprehensiveStyleProcessor:
         }
         
         try:
-            for i, doc in enumerate(documents):
-                print(f"处理文档 {i+1}/{len(documents)}: {doc.get('name', f'文档{i+1}')}")
-                
-                try:
-                    if processing_type == "extract":
-                        process_result = self.extract_comprehensive_style_features(
-                            doc["text"], doc.get("name", f"文档{i+1}")
-                        )
-                    else:
-                        # 其他处理类型的实现
-                        process_result = {"error": f"Unsupported processing type: {processing_type}"}
-                    
-                    if process_result.get("success"):
-                        result["successful_processes"] += 1
-                    else:
-                        result["failed_processes"] += 1
-                    
-                    process_result["batch_index"] = i
-                    result["processing_results"].append(process_result)
-                    
-                except Exception as e:
+            if processing_type not in ("extract", "compare", "align"):
+                raise ValueError(f"Unsupported processing type: {processing_type}")
+
+            reference_features = None
+            if processing_type != "extract" and reference and reference.get("text"):
+                print(f"正在提取参考文档特征: {reference.get('name', '参考文档')}")
+                with self.batch_executor.cpu_task():
+                    reference_features = self.extract_comprehensive_style_features(
+                        reference["text"], reference.get("name", "参考文档"), True)
+
+            start_time = time.time()
+            indexed = list(enumerate(documents))
+
+            def process(item):
+                i, doc = item
+                return self._process_batch_document(i, doc, processing_type, reference, reference_features)
+
+            def on_progress(done, total, index):
+                print(f"处理文档 {done}/{total} 完成: {documents[index].get('name', f'文档{index+1}')}")
+
+            def on_error(index, item, error):
+                return {
+                    "document_name": item[1].get("name", f"文档{index+1}"),
+                    "success": False,
+                    "error": str(error)
+                }
+
+            for i, process_result in enumerate(self.batch_executor.map(process, indexed, on_progress, on_error)):
+                if process_result.get("success"):
+                    result["successful_processes"] += 1
+                else:
                     result["failed_processes"] += 1
-                    result["processing_results"].append({
-                        "batch_index": i,
-                        "document_name": doc.get("name", f"文档{i+1}"),
-                        "success": False,
-                        "error": str(e)
-                    })
-            
+                process_result["batch_index"] = i
+                result["processing_results"].append(process_result)
+            elapsed = time.time() - start_time
+
             # 生成批量摘要
             result["batch_summary"] = {
                 "success_rate": result["successful_processes"] / result["total_documents"] if result["total_documents"] > 0 else 0,
                 "processing_time": datetime.now().isoformat(),
-                "average_processing_time": "未计算"  # 可以添加时间统计
+                "elapsed_seconds": round(elapsed, 3),
+                "average_processing_time": round(elapsed / len(documents), 3) if documents else 0,
+                "llm_concurrency": self.batch_executor.llm_concurrency,
+                "cpu_workers": self.batch_executor.cpu_workers
             }
             
             print("批量处理完成!")
@@ -608,6 +638,29 @@ class ComprehensiveStyleProcessor:
             print(f"批量处理失败: {str(e)}")
         
         return result
+
+    def _process_batch_document(self, index: int, doc: Dict[str, str], processing_type: str,
+                                reference: Optional[Dict[str, str]],
+                                reference_features: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """批量处理中的单个文档"""
+        name = doc.get("name", f"文档{index+1}")
+        if processing_type == "extract":
+            return self.extract_comprehensive_style_features(doc["text"], name)
+
+        # 文档自带参考文档时使用自己的，否则使用批量共享的参考文档及其已提取的特征
+        if doc.get("reference_text"):
+            reference_text, reference_name, features = doc["reference_text"], doc.get("reference_name"), None
+        elif reference and reference.get("text"):
+            reference_text, reference_name, features = reference["text"], reference.get("name"), reference_features
+        else:
+            return {"document_name": name, "success": False,
+                    "error": f"{processing_type} 需要参考文档（reference 或 reference_text）"}
+
+        if processing_type == "compare":
+            return self.compare_document_styles(doc["text"], reference_text, name, reference_name,
+                                                doc2_features=features)
+        return self.align_text_style(doc["text"], reference_text, doc.get("content_to_align", doc["text"]),
+                                     name, reference_name, target_features=features)
     
     def _generate_processing_id(self) -> str:
         """生成处理ID"""
@@ -15,11 +15,189 @@ License: MIT
 import re
 import json
 import os
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Iterable, Iterator
 from datetime import datetime
+from collections import Counter
 import hashlib
 import time
 
+from .structure_patterns import get_pattern_registry, iter_text_lines
+
+# 行分类器（标题/列表/日期），所有实例共享
+LINE_CLASSIFIER = get_pattern_registry().get("format_line")
+
+
+def _most_common(counter: Counter, default: Any) -> Any:
+    """取众数（并列时取最先出现的值）"""
+    return max(counter, key=counter.get) if counter else default
+
+
+class FormatStatistics:
+    """
+    格式统计累加器
+
+    按行增量汇总标题/段落/列表/特殊元素的格式统计，只保留计数器，
+    内存占用与文档长度无关；格式规则由统计结果直接生成。
+    """
+
+    def __init__(self):
+        self.total_lines = 0
+        self.confidence_sum = 0.0
+        self.heading_levels: Dict[int, int] = {}
+        # 标题级别 -> 字体属性 -> 取值计数（仅统计高置信度标题）
+        self.heading_fonts: Dict[int, Dict[str, Counter]] = {}
+        self.paragraph_count = 0
+        self.paragraph_families = Counter()
+        self.paragraph_sizes = Counter()
+        self.list_types = Counter()
+        self.special_elements = Counter()
+
+        # 流式后处理所需的前一项状态（与 _post_process_structure 规则一致）
+        self._prev_heading_level: Optional[int] = None
+        self._prev_list: Optional[Tuple[int, str, float]] = None
+
+    def add_heading(self, level: int, confidence: float, font: Dict[str, Any]):
+        """累加一个标题"""
+        self.heading_levels[level] = self.heading_levels.get(level, 0) + 1
+        fonts = self.heading_fonts.setdefault(level, {})
+        # 只考虑高置信度的标题
+        if confidence > 0.7:
+            for key, value in font.items():
+                fonts.setdefault(key, Counter())[value] += 1
+
+    def add_paragraph(self, font: Dict[str, Any]):
+        """累加一个正文段落"""
+        self.paragraph_count += 1
+        self.paragraph_families[font.get("family", "宋体")] += 1
+        self.paragraph_sizes[font.get("size", "小四")] += 1
+
+    def add_list(self, list_type: str):
+        """累加一个列表项"""
+        self.list_types[list_type] += 1
+
+    def add_special(self, element_type: str):
+        """累加一个特殊元素（表格行、引用、代码、日期）"""
+        self.special_elements[element_type] += 1
+
+    def add_line_analysis(self, analysis: Dict[str, Any]):
+        """
+        累加一行的分析结果，并在线执行标题层级/列表类型的后处理
+
+        Args:
+            analysis: iter_line_analyses 产出的单行分析结果
+        """
+        self.total_lines += 1
+        line_type = analysis["type"]
+        confidence = analysis.get("confidence", 0.5)
+        self.confidence_sum += confidence
+
+        if line_type == "heading":
+            level = analysis["level"]
+            # 层级跳跃过大时调整为上一级 + 1，并降低置信度
+            if self._prev_heading_level is not None and level > self._prev_heading_level + 1:
+                level = self._prev_heading_level + 1
+                confidence *= 0.8
+            self._prev_heading_level = level
+            self.add_heading(level, confidence, analysis.get("font_info", {}))
+        elif line_type == "paragraph":
+            self.add_paragraph(analysis.get("font_info", {}))
+        elif line_type == "list":
+            line_number = analysis["line_number"]
+            list_type = analysis.get("list_type", "bullet")
+            # 相邻列表项保持类型一致，取置信度更高的一项
+            if self._prev_list and self._prev_list[0] == line_number - 1:
+                if list_type != self._prev_list[1] and confidence < self._prev_list[2]:
+                    list_type = self._prev_list[1]
+            self._prev_list = (line_number, list_type, confidence)
+            self.add_list(list_type)
+        elif line_type in ["table_row", "quote", "code", "date"]:
+            self.add_special(line_type)
+
+    @classmethod
+    def from_structure(cls, structure: Dict[str, Any]) -> 'FormatStatistics':
+        """由（已后处理的）完整结构分析结果构建统计"""
+        stats = cls()
+        stats.total_lines = structure.get("total_lines", 0)
+        for heading in structure["headings"]:
+            stats.add_heading(heading["level"], heading.get("confidence", 0.5), heading["estimated_font"])
+        for paragraph in structure["paragraphs"]:
+            stats.add_paragraph(paragraph["estimated_font"])
+        for item in structure["lists"]:
+            stats.add_list(item.get("list_type", "bullet"))
+        for element in structure.get("special_elements", []):
+            stats.add_special(element["type"])
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        """结构统计摘要"""
+        return {
+            "total_lines": self.total_lines,
+            "heading_count": sum(self.heading_levels.values()),
+            "heading_levels": {f"level_{level}": count for level, count in self.heading_levels.items()},
+            "paragraph_count": self.paragraph_count,
+            "list_count": sum(self.list_types.values()),
+            "list_types": dict(self.list_types),
+            "special_elements": dict(self.special_elements),
+            "analysis_confidence": self.confidence_sum / self.total_lines if self.total_lines else 0.0
+        }
+
+    def format_rules(self) -> Dict[str, Any]:
+        """由统计结果生成格式规则"""
+        rules = {
+            "heading_formats": {},
+            "paragraph_format": {},
+            "list_format": {},
+            "general_settings": {}
+        }
+
+        # 标题格式：每个属性取众数
+        for level, fonts in self.heading_fonts.items():
+            if not fonts:
+                continue
+
+            final_format = {
+                "font_family": _most_common(fonts.get("family", Counter()), "黑体"),
+                "font_size": _most_common(fonts.get("size", Counter()), "小四"),
+                "font_weight": "bold",
+                "line_height": "1.5"
+            }
+
+            # 处理其他属性
+            for key, values in fonts.items():
+                if key in final_format:
+                    continue
+                if isinstance(next(iter(values)), str):
+                    final_format[key] = _most_common(values, None)
+                else:
+                    try:
+                        final_format[key] = sum(v * c for v, c in values.items()) / sum(values.values())
+                    except TypeError:
+                        final_format[key] = next(iter(values))
+
+            rules["heading_formats"][f"level_{level}"] = final_format
+
+        # 正文格式
+        rules["paragraph_format"] = {
+            "font_family": _most_common(self.paragraph_families, "宋体"),
+            "font_size": _most_common(self.paragraph_sizes, "小四"),
+            "text_align": "left",
+            "text_indent": "2em",
+            "line_height": "1.5",
+            "margin_bottom": "0"
+        }
+
+        # 列表格式
+        rules["list_format"] = {
+            "list_type": _most_common(self.list_types, "bullet"),
+            "font_family": "宋体",
+            "font_size": "小四",
+            "line_height": "1.5",
+            "margin_left": "2em"
+        }
+
+        return rules
+
+
 class DocumentFormatExtractor:
     
     def __init__(self, storage_path: str = "src/core/knowledge_base/format_templates", spark_x1_client=None):
@@ -87,6 +265,93 @@ class DocumentFormatExtractor:
         except Exception as e:
             return {"error": f"格式提取失败: {str(e)}"}
     
+    def extract_format_from_stream(self, source, document_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        流式提取格式信息：逐行读取并分类，只保留统计量，适合超大纯文本文件
+        
+        Args:
+            source: 文件路径、文本文件句柄或字符串行迭代器
+            document_name: 文档名称
+            
+        Returns:
+            格式分析结果（以 structure_summary 代替逐行的 structure_analysis）
+        """
+        try:
+            stats = self.analyze_structure_stream(iter_text_lines(source))
+            format_rules = stats.format_rules()
+            
+            doc_name = document_name or "未命名文档"
+            template_id = self._generate_template_id(doc_name, format_rules)
+            
+            return {
+                "template_id": template_id,
+                "document_name": doc_name,
+                "structure_summary": stats.summary(),
+                "format_rules": format_rules,
+                "format_prompt": self._generate_format_prompt(format_rules),
+                "demo_document": self.generate_format_demo_document(format_rules),
+                "created_time": datetime.now().isoformat(),
+                "html_template": self._generate_html_template(format_rules),
+                "streaming": True
+            }
+            
+        except Exception as e:
+            return {"error": f"格式提取失败: {str(e)}"}
+    
+    def analyze_structure_stream(self, lines: Iterable[str]) -> FormatStatistics:
+        """
+        流式结构分析：逐行分类并累加统计，内存占用与文档长度无关
+        
+        Args:
+            lines: 字符串行迭代器（不含换行符）
+            
+        Returns:
+            格式统计
+        """
+        stats = FormatStatistics()
+        for analysis in self.iter_line_analyses(lines):
+            stats.add_line_analysis(analysis)
+        return stats
+    
+    def iter_line_analyses(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        逐行分析生成器，分类规则与 _analyze_document_structure 一致：
+        跳过空行，行号按非空行计数，首行去掉前导空白、末行去掉尾随空白
+        
+        Args:
+            lines: 字符串行迭代器（不含换行符）
+        """
+        line_number = 0
+        pending = None
+        for line in lines:
+            if not line.strip():
+                continue
+            if pending is None:
+                # 相当于对整篇文本 strip() 后的首行
+                pending = line.lstrip()
+                continue
+            yield self._analyze_stream_line(pending, line_number)
+            line_number += 1
+            pending = line
+        
+        if pending is not None:
+            yield self._analyze_stream_line(pending.rstrip(), line_number)
+    
+    def _analyze_stream_line(self, line: str, line_number: int) -> Dict[str, Any]:
+        """分析单行，失败时按普通段落处理"""
+        try:
+            analysis = self._analyze_line(line, line_number)
+        except Exception as e:
+            analysis = {
+                "type": "paragraph",
+                "level": 0,
+                "confidence": 0.3,
+                "font_info": self._estimate_font_info(line, "paragraph", 0, 0),
+                "analysis_error": str(e)
+            }
+        analysis["line_number"] = line_number
+        return analysis
+    
     def save_format_template(self, format_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         保存格式模板到持久化存储
@@ -609,46 +874,14 @@ class DocumentFormatExtractor:
             analysis["type"] = "empty"
             return analysis
 
-        # 增强的标题检测模式
-        heading_patterns = [
-            # 中文数字标题
-            (r'^[一二三四五六七八九十百千万]+[、．.，,]', 1, 0.9),
-            (r'^第[一二三四五六七八九十百千万]+[章节部分条款项][、．.，,]?', 1, 0.95),
-
-            # 阿拉伯数字标题
-            (r'^[1-9]\d*[、．.，,]', 1, 0.9),
-            (r'^[1-9]\d*\.[1-9]\d*[、．.，,]?', 2, 0.85),
-            (r'^[1-9]\d*\.[1-9]\d*\.[1-9]\d*[、．.，,]?', 3, 0.8),
-            (r'^[1-9]\d*\.[1-9]\d*\.[1-9]\d*\.[1-9]\d*[、．.，,]?', 4, 0.75),
-
-            # 括号标题
-            (r'^（[一二三四五六七八九十]+）', 2, 0.85),
-            (r'^\([1-9]\d*\)', 2, 0.85),
-            (r'^【[^】]+】', 2, 0.8),
-            (r'^\[[^\]]+\]', 2, 0.75),
-
-            # 字母标题
-            (r'^[A-Z][、．.，,]', 2, 0.7),
-            (r'^[a-z][、．.，,]', 3, 0.65),
-
-            # 特殊标题格式
-            (r'^附件[1-9]\d*[：:]', 1, 0.9),
-            (r'^附录[A-Z]?[：:]', 1, 0.9),
-        ]
-
-        max_confidence = 0
-        best_match = None
+        # 标题、列表、日期由预编译的组合分类器一次匹配完成
+        _, meta, _ = LINE_CLASSIFIER.classify(stripped_line)
+        category = meta[0] if meta else None
 
-        for pattern, level, confidence in heading_patterns:
-            if re.match(pattern, stripped_line):
-                if confidence > max_confidence:
-                    max_confidence = confidence
-                    best_match = (level, confidence)
-
-        if best_match:
+        if category == "heading":
             analysis["type"] = "heading"
-            analysis["level"] = best_match[0]
-            analysis["confidence"] = best_match[1]
+            analysis["level"] = meta[1]
+            analysis["confidence"] = meta[2]
 
             # 根据内容长度和位置调整置信度
             if len(stripped_line) > 50:  # 标题通常较短
@@ -657,23 +890,11 @@ class DocumentFormatExtractor:
                 analysis["confidence"] *= 1.2
                 analysis["level"] = 0  # 文档标题级别
 
-        # 增强的列表检测
-        if analysis["type"] == "paragraph":  # 只有非标题才检测列表
-            list_patterns = [
-                (r'^[•·▪▫◦‣⁃⁌⁍]', "bullet", 0.9),
-                (r'^[-*+](?=\s)', "bullet", 0.85),
-                (r'^[1-9]\d*[)）](?=\s)', "numbered", 0.9),
-                (r'^[a-z][)）](?=\s)', "lettered", 0.8),
-                (r'^[A-Z][)）](?=\s)', "lettered", 0.8),
-                (r'^[ivxlcdm]+[)）](?=\s)', "roman", 0.75),
-            ]
-
-            for pattern, list_type, confidence in list_patterns:
-                if re.match(pattern, stripped_line):
-                    analysis["type"] = "list"
-                    analysis["list_type"] = list_type
-                    analysis["confidence"] = confidence
-                    break
+        # 列表检测（只有非标题才会命中列表分支）
+        elif category == "list":
+            analysis["type"] = "list"
+            analysis["list_type"] = meta[1]
+            analysis["confidence"] = meta[2]
 
         # 检测特殊内容类型
         if analysis["type"] == "paragraph":
@@ -693,9 +914,9 @@ class DocumentFormatExtractor:
                 analysis["confidence"] = 0.8
 
             # 日期检测
-            elif re.match(r'^\d{4}[年-]\d{1,2}[月-]\d{1,2}[日]?', stripped_line):
+            elif category == "date":
                 analysis["type"] = "date"
-                analysis["confidence"] = 0.9
+                analysis["confidence"] = meta[1]
 
         # 估算字体信息（基于内容特征和上下文）
         analysis["font_info"] = self._estimate_font_info(
@@ -786,116 +1007,8 @@ class DocumentFormatExtractor:
         return font_info
     
     def _extract_format_rules(self, structure: Dict[str, Any]) -> Dict[str, Any]:
-        """提取格式规则"""
-        rules = {
-            "heading_formats": {},
-            "paragraph_format": {},
-            "list_format": {},
-            "general_settings": {}
-        }
-        
-        # 分析标题格式 - 使用统计方法
-        heading_levels = {}
-        for heading in structure["headings"]:
-            level = heading["level"]
-            confidence = heading.get("confidence", 0.5)
-
-            if level not in heading_levels:
-                heading_levels[level] = []
-
-            # 只考虑高置信度的标题
-            if confidence > 0.7:
-                heading_levels[level].append(heading["estimated_font"])
-
-        for level, fonts in heading_levels.items():
-            if not fonts:
-                continue
-
-            # 统计最常见的格式属性
-            font_families = [f.get("family", "黑体") for f in fonts]
-            font_sizes = [f.get("size", "小四") for f in fonts]
-
-            # 取众数
-            common_family = max(set(font_families), key=font_families.count) if font_families else "黑体"
-            common_size = max(set(font_sizes), key=font_sizes.count) if font_sizes else "小四"
-
-            # 合并所有属性
-            merged_format = {}
-            for font in fonts:
-                for key, value in font.items():
-                    if key not in merged_format:
-                        merged_format[key] = []
-                    merged_format[key].append(value)
-
-            # 取每个属性的众数或平均值
-            final_format = {
-                "font_family": common_family,
-                "font_size": common_size,
-                "font_weight": "bold",
-                "line_height": "1.5"
-            }
-
-            # 处理其他属性
-            for key, values in merged_format.items():
-                if key not in final_format:
-                    if isinstance(values[0], str):
-                        final_format[key] = max(set(values), key=values.count)
-                    else:
-                        try:
-                            final_format[key] = sum(values) / len(values)
-                        except:
-                            final_format[key] = values[0]
-
-            rules["heading_formats"][f"level_{level}"] = final_format
-
-        # 分析正文格式
-        if structure["paragraphs"]:
-            para_fonts = [p["estimated_font"] for p in structure["paragraphs"]]
-
-            # 统计正文格式
-            families = [f.get("family", "宋体") for f in para_fonts]
-            sizes = [f.get("size", "小四") for f in para_fonts]
-
-            rules["paragraph_format"] = {
-                "font_family": max(set(families), key=families.count) if families else "宋体",
-                "font_size": max(set(sizes), key=sizes.count) if sizes else "小四",
-                "text_align": "left",
-                "text_indent": "2em",
-                "line_height": "1.5",
-                "margin_bottom": "0"
-            }
-        else:
-            rules["paragraph_format"] = {
-                "font_family": "宋体",
-                "font_size": "小四",
-                "text_align": "left",
-                "text_indent": "2em",
-                "line_height": "1.5",
-                "margin_bottom": "0"
-            }
-
-        # 分析列表格式
-        if structure["lists"]:
-            list_types = [l.get("list_type", "bullet") for l in structure["lists"]]
-            common_list_type = max(set(list_types), key=list_types.count) if list_types else "bullet"
-
-            rules["list_format"] = {
-                "list_type": common_list_type,
-                "font_family": "宋体",
-                "font_size": "小四",
-                "line_height": "1.5",
-                "margin_left": "2em"
-            }
-        else:
-            rules["list_format"] = {
-                "list_type": "bullet",
-                "font_family": "宋体",
-                "font_size": "小四",
-                "line_height": "1.5",
-                "margin_left": "2em"
-            }
-        
-        return rules
+        """提取格式规则 - 使用统计方法"""
+        return FormatStatistics.from_structure(structure).format_rules()
     
     def _generate_format_prompt(self, format_rules: Dict[str, Any]) -> str:
         """生成格式提示词"""
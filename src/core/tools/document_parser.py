@@ -12,14 +12,19 @@ Version: v1.0
 License: MIT
 """
 
-import PyPDF2
 import re
 import json
-from typing import Dict, List, Any, Optional, Tuple
-from docx import Document
-from docx.shared import Inches
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+import io
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
 from .base_tool import BaseTool
+from .structure_patterns import get_pattern_registry, iter_text_lines
+from .pdf_text_extractor import get_pdf_text_extractor
+from .docx_reader import DocxStreamReader, DocxTable
+
+# Shared precompiled line classifiers (headings + list items, list items only) and column-gap pattern
+LINE_CLASSIFIER = get_pattern_registry().get("parser_line")
+LIST_CLASSIFIER = get_pattern_registry().get("parser_list")
+COLUMN_GAP_PATTERN = get_pattern_registry().get("parser_column_gap")
 
 class EnhancedDocumentParserTool(BaseTool):
 
@@ -41,14 +46,18 @@ class EnhancedDocumentParserTool(BaseTool):
             r'\t.*\t',  # Tab-separated
         ]
 
-    def execute(self, file_path: str, file_type: str = None, analysis_depth: str = "deep") -> dict:
+    def execute(self, file_path: str, file_type: str = None, analysis_depth: str = "deep",
+                page_range: Optional[Tuple[int, Optional[int]]] = None) -> dict:
         """
         Execute enhanced document parsing with configurable analysis depth.
 
         Args:
             file_path: Path to the document file
             file_type: Document type (auto-detected if None)
-            analysis_depth: "basic", "standard", or "deep"
+            analysis_depth: "basic", "standard", "deep", or "streaming"
+                ("streaming" classifies lines on the fly and returns only
+                aggregate statistics; plain-text files are never fully loaded)
+            page_range: Optional [start, end) page range (0-based) for PDFs
         """
         if file_type is None:
             file_type = self._detect_file_type(file_path)
@@ -56,8 +65,11 @@ class EnhancedDocumentParserTool(BaseTool):
                 return {"error": "Unsupported file type or cannot infer from path."}
 
         try:
+            if analysis_depth == "streaming":
+                return self._execute_streaming(file_path, file_type)
+
             # Basic content extraction
-            extraction_result = self._extract_content(file_path, file_type)
+            extraction_result = self._extract_content(file_path, file_type, page_range)
             if "error" in extraction_result:
                 return extraction_result
 
@@ -94,6 +106,31 @@ class EnhancedDocumentParserTool(BaseTool):
         except Exception as e:
             return {"error": f"Error parsing document {file_path}: {e}"}
 
+    def _execute_streaming(self, file_path: str, file_type: str) -> dict:
+        """Streaming structure analysis: emit only the structure summary."""
+        if file_type in ["txt", "markdown"]:
+            summary = self.summarize_structure_stream(iter_text_lines(file_path))
+        elif file_type == "pdf":
+            # Pages are extracted lazily and dropped once their lines are classified
+            summary = self.summarize_structure_stream(
+                line
+                for page in get_pdf_text_extractor().iter_pages(file_path)
+                for line in page.text.split('\n')
+            )
+        else:
+            extraction_result = self._extract_content(file_path, file_type)
+            if "error" in extraction_result:
+                return extraction_result
+            summary = self.summarize_structure_stream(
+                iter_text_lines(io.StringIO(extraction_result["text_content"]))
+            )
+
+        return {
+            "structure_summary": summary,
+            "file_type": file_type,
+            "analysis_depth": "streaming"
+        }
+
     def _detect_file_type(self, file_path: str) -> Optional[str]:
         """Detect file type from extension."""
         if file_path.lower().endswith(".docx"):
@@ -106,44 +143,58 @@ class EnhancedDocumentParserTool(BaseTool):
             return "markdown"
         return None
 
-    def _extract_content(self, file_path: str, file_type: str) -> dict:
-        """Extract basic content from document."""
+    def _extract_content(self, file_path: str, file_type: str,
+                         page_range: Optional[Tuple[int, Optional[int]]] = None) -> dict:
+        """
+        Extract basic content from document.
+
+        page_range: optional [start, end) page range (0-based) for PDFs.
+        """
         text_content = ""
         structure_info = {}
 
         if file_type == "docx":
-            doc = Document(file_path)
+            # Stream document.xml instead of building the python-docx object graph
             paragraphs = []
-            for para in doc.paragraphs:
-                if para.text.strip():
+            texts = []
+            table_count = 0
+            for block in DocxStreamReader(file_path).iter_blocks():
+                if isinstance(block, DocxTable):
+                    table_count += 1
+                elif block.text.strip():
                     paragraphs.append({
-                        "text": para.text,
-                        "style": para.style.name if para.style else "Normal",
-                        "alignment": str(para.alignment) if para.alignment else "LEFT"
+                        "text": block.text,
+                        "style": block.style_name or "Normal",
+                        "alignment": block.alignment.upper() if block.alignment else "LEFT"
                     })
-                    text_content += para.text + "\n"
+                    texts.append(block.text)
+            text_content = "\n".join(texts)
 
             structure_info = {
                 "paragraphs": len(paragraphs),
                 "paragraph_details": paragraphs,
-                "has_tables": len(doc.tables) > 0,
-                "table_count": len(doc.tables)
+                "has_tables": table_count > 0,
+                "table_count": table_count
             }
 
         elif file_type == "pdf":
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                pages_content = []
-                for page_num in range(len(reader.pages)):
-                    page = reader.pages[page_num]
-                    page_text = page.extract_text()
-                    pages_content.append(page_text)
-                    text_content += page_text + "\n"
-
-                structure_info = {
-                    "pages": len(reader.pages),
-                    "pages_content": pages_content
-                }
+            start, end = page_range or (0, None)
+            pages = get_pdf_text_extractor().extract_pages(file_path, start, end)
+            text_content = "\n".join(pages)
+
+            # Page start offsets into text_content instead of a second copy of every page
+            page_offsets = []
+            offset = 0
+            for page_text in pages:
+                page_offsets.append(offset)
+                offset += len(page_text) + 1
+
+            # Keep offsets aligned with the stripped text returned below
+            leading = len(text_content) - len(text_content.lstrip())
+            structure_info = {
+                "pages": len(pages),
+                "page_offsets": [max(0, o - leading) for o in page_offsets]
+            }
 
         elif file_type in ["txt", "markdown"]:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -174,103 +225,153 @@ class EnhancedDocumentParserTool(BaseTool):
         current_section = None
         paragraph_buffer = []
 
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                if paragraph_buffer:
-                    structure["paragraphs"].append({
-                        "content": " ".join(paragraph_buffer),
-                        "line_start": i - len(paragraph_buffer),
-                        "line_end": i,
-                        "section": current_section
-                    })
-                    paragraph_buffer = []
-                continue
-
-            # Check for headings
-            heading_match = self._match_heading(line)
-            if heading_match:
-                if paragraph_buffer:
-                    structure["paragraphs"].append({
-                        "content": " ".join(paragraph_buffer),
-                        "line_start": i - len(paragraph_buffer),
-                        "line_end": i,
-                        "section": current_section
-                    })
-                    paragraph_buffer = []
-
-                heading_info = {
-                    "text": heading_match["text"],
-                    "level": heading_match["level"],
+        def flush_paragraph(line_end: int):
+            if paragraph_buffer:
+                structure["paragraphs"].append({
+                    "content": " ".join(paragraph_buffer),
+                    "line_start": line_end - len(paragraph_buffer),
+                    "line_end": line_end,
+                    "section": current_section
+                })
+                paragraph_buffer.clear()
+
+        for i, kind, line, info in self.iter_structure(lines):
+            if kind == "blank":
+                flush_paragraph(i)
+            elif kind == "heading":
+                flush_paragraph(i)
+                structure["headings"].append({
+                    "text": info["text"],
+                    "level": info["level"],
                     "line_number": i,
-                    "type": heading_match["type"]
-                }
-                structure["headings"].append(heading_info)
-                current_section = heading_match["text"]
-                continue
-
-            # Check for lists
-            list_match = self._match_list_item(line)
-            if list_match:
-                if paragraph_buffer:
-                    structure["paragraphs"].append({
-                        "content": " ".join(paragraph_buffer),
-                        "line_start": i - len(paragraph_buffer),
-                        "line_end": i,
-                        "section": current_section
-                    })
-                    paragraph_buffer = []
-
+                    "type": info["type"]
+                })
+                current_section = info["text"]
+            elif kind == "list":
+                flush_paragraph(i)
                 structure["lists"].append({
-                    "content": list_match["content"],
-                    "type": list_match["type"],
+                    "content": info["content"],
+                    "type": info["type"],
                     "line_number": i,
                     "section": current_section
                 })
-                continue
-
-            # Check for tables
-            if self._is_table_row(line):
+            elif kind == "table":
                 structure["tables"].append({
                     "content": line,
                     "line_number": i,
                     "section": current_section
                 })
-                continue
-
-            # Regular paragraph content
-            paragraph_buffer.append(line)
+            else:
+                # Regular paragraph content
+                paragraph_buffer.append(line)
 
         # Handle remaining paragraph buffer
-        if paragraph_buffer:
-            structure["paragraphs"].append({
-                "content": " ".join(paragraph_buffer),
-                "line_start": len(lines) - len(paragraph_buffer),
-                "line_end": len(lines),
-                "section": current_section
-            })
+        flush_paragraph(len(lines))
 
         # Generate document tree
         structure["document_tree"] = self._generate_document_tree(structure["headings"])
 
         return structure
 
-    def _match_heading(self, line: str) -> Optional[dict]:
+    def iter_structure(self, lines: Iterable[str]) -> Iterator[Tuple[int, str, str, Optional[dict]]]:
+        """
+        Classify lines one at a time without holding the document in memory.
+
+        Args:
+            lines: Any iterable of text lines (file handle, generator, list)
+
+        Yields:
+            (line_number, kind, stripped_line, info) where kind is one of
+            "blank", "heading", "list", "table" or "text"
+        """
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                yield i, "blank", line, None
+                continue
+
+            # One combined regex match classifies headings and list items
+            line_match = LINE_CLASSIFIER.match(line)
+
+            heading_match = self._match_heading(line, line_match)
+            if heading_match:
+                yield i, "heading", line, heading_match
+                continue
+
+            list_match = self._match_list_item(line, line_match)
+            if list_match:
+                yield i, "list", line, list_match
+                continue
+
+            if self._is_table_row(line):
+                yield i, "table", line, None
+                continue
+
+            yield i, "text", line, None
+
+    def summarize_structure_stream(self, lines: Iterable[str]) -> dict:
+        """
+        Aggregate heading/list/table/paragraph statistics from a line stream.
+
+        Only counters are kept, so memory use does not grow with document size.
+        """
+        summary = {
+            "lines": 0,
+            "non_empty_lines": 0,
+            "headings": 0,
+            "heading_levels": {},
+            "heading_types": {},
+            "lists": 0,
+            "list_types": {},
+            "table_rows": 0,
+            "paragraphs": 0
+        }
+        in_paragraph = False
+
+        for i, kind, line, info in self.iter_structure(lines):
+            summary["lines"] = i + 1
+            if kind == "blank":
+                in_paragraph = False
+                continue
+
+            summary["non_empty_lines"] += 1
+            if kind == "heading":
+                in_paragraph = False
+                summary["headings"] += 1
+                level = info["level"]
+                summary["heading_levels"][level] = summary["heading_levels"].get(level, 0) + 1
+                summary["heading_types"][info["type"]] = summary["heading_types"].get(info["type"], 0) + 1
+            elif kind == "list":
+                in_paragraph = False
+                summary["lists"] += 1
+                summary["list_types"][info["type"]] = summary["list_types"].get(info["type"], 0) + 1
+            elif kind == "table":
+                # Table rows do not interrupt a paragraph (same as _analyze_document_structure)
+                summary["table_rows"] += 1
+            elif not in_paragraph:
+                in_paragraph = True
+                summary["paragraphs"] += 1
+
+        return summary
+
+    def _match_heading(self, line: str, line_match=None) -> Optional[dict]:
         """Match line against heading patterns."""
+        if line_match is None:
+            line_match = LINE_CLASSIFIER.match(line)
+        kind = LINE_CLASSIFIER.kind_of(line_match)
+
         # Markdown style headings
-        markdown_match = re.match(r'^(#{1,6})\s+(.+)$', line)
-        if markdown_match:
+        if kind == "markdown":
             return {
-                "text": markdown_match.group(2),
-                "level": len(markdown_match.group(1)),
+                "text": line_match.group("markdown_text"),
+                "level": len(line_match.group("markdown_hashes")),
                 "type": "markdown"
             }
 
-        # Numbered headings
-        numbered_match = re.match(r'^(\d+\.?\s+)(.+)$', line)
-        if numbered_match and len(line) < 100:  # Likely a heading, not a long sentence
+        # Numbered headings (the pattern only accepts lines shorter than 100 chars)
+        if kind == "numbered":
             return {
-                "text": numbered_match.group(2),
+                "text": line_match.group("numbered_text"),
                 "level": 1,
                 "type": "numbered"
             }
@@ -283,43 +384,45 @@ class EnhancedDocumentParserTool(BaseTool):
                 "type": "caps"
             }
 
-        # Colon-ended headings
-        colon_match = re.match(r'^(.+)[:：]\s*$', line)
-        if colon_match and len(line) < 80:
+        # Colon-ended headings (the pattern only accepts lines shorter than 80 chars)
+        if kind == "colon":
             return {
-                "text": colon_match.group(1),
+                "text": line_match.group("colon_text"),
                 "level": 2,
                 "type": "colon"
             }
 
         return None
 
-    def _match_list_item(self, line: str) -> Optional[dict]:
+    def _match_list_item(self, line: str, line_match=None) -> Optional[dict]:
         """Match line against list item patterns."""
+        classifier = LINE_CLASSIFIER
+        if line_match is None:
+            classifier = LIST_CLASSIFIER
+            line_match = classifier.match(line)
+        kind = classifier.kind_of(line_match)
+
         # Bullet lists
-        bullet_match = re.match(r'^\s*[-*+]\s+(.+)$', line)
-        if bullet_match:
+        if kind == "bullet":
             return {
-                "content": bullet_match.group(1),
+                "content": line_match.group("bullet_content"),
                 "type": "bullet"
             }
 
         # Numbered lists
-        numbered_match = re.match(r'^\s*(\d+)[.)]\s+(.+)$', line)
-        if numbered_match:
+        if kind == "ordered":
             return {
-                "content": numbered_match.group(2),
+                "content": line_match.group("ordered_content"),
                 "type": "numbered",
-                "number": numbered_match.group(1)
+                "number": line_match.group("ordered_number")
             }
 
         # Lettered lists
-        lettered_match = re.match(r'^\s*([a-zA-Z])[.)]\s+(.+)$', line)
-        if lettered_match:
+        if kind == "lettered":
             return {
-                "content": lettered_match.group(2),
+                "content": line_match.group("lettered_content"),
                 "type": "lettered",
-                "letter": lettered_match.group(1)
+                "letter": line_match.group("lettered_letter")
             }
 
         return None
@@ -335,7 +438,7 @@ class EnhancedDocumentParserTool(BaseTool):
             return True
 
         # Multiple spaces (potential column alignment)
-        if re.search(r'\s{3,}', line) and len(line.split()) >= 3:
+        if COLUMN_GAP_PATTERN.search(line) and len(line.split()) >= 3:
             return True
 
         return False
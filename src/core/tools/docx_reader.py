@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Docx Reader - 核心模块
+
+轻量级 .docx 只读解析器：直接打开 zip 包，用 lxml iterparse 流式解析 word/document.xml 与 word/styles.xml，
+按文档顺序逐个产出段落（含 run 格式）、表格与样式，处理完的元素立即释放，内存占用与文档长度无关。
+只需要读取文本、样式名、对齐方式等信息时使用本模块；写入 / 生成文档仍使用 python-docx。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Iterator, Union
+
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = "{%s}" % W_NS
+
+_NSMAP = {"w": W_NS}
+
+# 段落的直接 run（含超链接、修订插入中的 run，不含删除的内容和嵌套文本框）
+_RUN_XPATH = "./w:r | ./w:hyperlink/w:r | ./w:ins/w:r"
+
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+
+# 1 英寸 = 1440 twips，1 磅 = 20 twips
+TWIPS_PER_INCH = 1440.0
+TWIPS_PER_PT = 20.0
+
+# w:jc 取值 → 对齐方式
+_ALIGNMENT_MAP = {
+    "left": "left", "start": "left",
+    "center": "center",
+    "right": "right", "end": "right",
+    "both": "justify", "distribute": "justify",
+}
+
+# 与 python-docx 一致：部分内置样式在 styles.xml 中使用小写名称
+_BUILTIN_STYLE_NAMES = dict(
+    [("caption", "Caption"), ("footer", "Footer"), ("header", "Header")] +
+    [(f"heading {i}", f"Heading {i}") for i in range(1, 10)]
+)
+
+
+def _w(tag: str) -> str:
+    return _W + tag
+
+
+def _attr(element, name: str) -> Optional[str]:
+    return element.get(_W + name) if element is not None else None
+
+
+def _on_off(element) -> Optional[bool]:
+    """<w:b/>、<w:b w:val="0"/> 等开关属性"""
+    if element is None:
+        return None
+    return _attr(element, "val") not in ("0", "false", "off")
+
+
+def _twips(value: Optional[str], unit: float) -> Optional[float]:
+    try:
+        return float(value) / unit if value is not None else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class DocxRun:
+    """文字片段及其直接格式"""
+    text: str
+    bold: Optional[bool] = None
+    italic: Optional[bool] = None
+    underline: Optional[bool] = None
+    font_name: Optional[str] = None
+    east_asia_font: Optional[str] = None
+    size: Optional[float] = None  # 磅
+    color: Optional[str] = None   # 十六进制 RGB，如 "FF0000"
+
+
+@dataclass
+class DocxParagraph:
+    """段落：文本、样式、对齐方式、段落格式与 run 列表"""
+    index: int
+    text: str
+    style_id: Optional[str] = None
+    style_name: str = "Normal"
+    alignment: Optional[str] = None  # left / center / right / justify，None 表示未直接设置
+    line_spacing: Optional[float] = None  # 倍数（auto）或磅（exact / atLeast）
+    space_before: Optional[float] = None  # 磅
+    space_after: Optional[float] = None
+    first_line_indent: Optional[float] = None
+    left_indent: Optional[float] = None
+    right_indent: Optional[float] = None
+    runs: List[DocxRun] = field(default_factory=list)
+
+
+@dataclass
+class DocxTable:
+    """表格：单元格文本、样式、列宽 / 行高（英寸）及第一个单元格的首段（用于取样式）"""
+    index: int
+    rows: List[List[str]] = field(default_factory=list)
+    style_id: Optional[str] = None
+    style_name: Optional[str] = None
+    alignment: Optional[str] = None
+    column_widths: List[float] = field(default_factory=list)
+    row_heights: List[Optional[float]] = field(default_factory=list)
+    first_cell_paragraph: Optional[DocxParagraph] = None
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def column_count(self) -> int:
+        return len(self.column_widths) or max((len(row) for row in self.rows), default=0)
+
+
+@dataclass
+class DocxStyle:
+    """styles.xml 中的样式定义"""
+    style_id: str
+    name: str
+    type: str = "paragraph"
+    based_on: Optional[str] = None
+    is_default: bool = False
+    paragraph: Dict[str, Any] = field(default_factory=dict)
+    run: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class DocxSection:
+    """页面设置（英寸）"""
+    width: Optional[float] = None
+    height: Optional[float] = None
+    margin_top: Optional[float] = None
+    margin_bottom: Optional[float] = None
+    margin_left: Optional[float] = None
+    margin_right: Optional[float] = None
+    orientation: str = "portrait"
+
+
+def _parse_run(run) -> DocxRun:
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W + "t":
+            parts.append(child.text or "")
+        elif tag in (_W + "tab", _W + "ptab"):
+            parts.append("\t")
+        elif tag in (_W + "br", _W + "cr"):
+            parts.append("\n")
+        elif tag == _W + "noBreakHyphen":
+            parts.append("-")
+
+    rpr = run.find(_w("rPr"))
+    if rpr is None:
+        return DocxRun("".join(parts))
+    props = _parse_run_properties(rpr)
+    return DocxRun("".join(parts), **props)
+
+
+def _parse_run_properties(rpr) -> Dict[str, Any]:
+    fonts = rpr.find(_w("rFonts"))
+    size = rpr.find(_w("sz"))
+    color = rpr.find(_w("color"))
+    underline = rpr.find(_w("u"))
+    color_value = _attr(color, "val")
+    return {
+        "bold": _on_off(rpr.find(_w("b"))),
+        "italic": _on_off(rpr.find(_w("i"))),
+        "underline": None if underline is None else _attr(underline, "val") not in ("none", "0", "false"),
+        "font_name": _attr(fonts, "ascii"),
+        "east_asia_font": _attr(fonts, "eastAsia"),
+        # w:sz 以半磅为单位
+        "size": _twips(_attr(size, "val"), 2.0),
+        "color": None if color_value in (None, "auto") else color_value.upper(),
+    }
+
+
+def _parse_paragraph_properties(ppr) -> Dict[str, Any]:
+    if ppr is None:
+        return {}
+    props: Dict[str, Any] = {}
+    style = ppr.find(_w("pStyle"))
+    if style is not None:
+        props["style_id"] = _attr(style, "val")
+    jc = ppr.find(_w("jc"))
+    if jc is not None:
+        props["alignment"] = _ALIGNMENT_MAP.get(_attr(jc, "val"), "left")
+
+    spacing = ppr.find(_w("spacing"))
+    if spacing is not None:
+        props["space_before"] = _twips(_attr(spacing, "before"), TWIPS_PER_PT)
+        props["space_after"] = _twips(_attr(spacing, "after"), TWIPS_PER_PT)
+        line = _attr(spacing, "line")
+        if line is not None:
+            rule = _attr(spacing, "lineRule") or "auto"
+            # auto: 以 1/240 行为单位的倍数；exact / atLeast: twips
+            props["line_spacing"] = _twips(line, 240.0 if rule == "auto" else TWIPS_PER_PT)
+
+    ind = ppr.find(_w("ind"))
+    if ind is not None:
+        props["left_indent"] = _twips(_attr(ind, "left") or _attr(ind, "start"), TWIPS_PER_PT)
+        props["right_indent"] = _twips(_attr(ind, "right") or _attr(ind, "end"), TWIPS_PER_PT)
+        first_line = _twips(_attr(ind, "firstLine"), TWIPS_PER_PT)
+        hanging = _twips(_attr(ind, "hanging"), TWIPS_PER_PT)
+        props["first_line_indent"] = -hanging if hanging is not None else first_line
+    return props
+
+
+def _parse_section(sect_pr) -> DocxSection:
+    size = sect_pr.find(_w("pgSz"))
+    margin = sect_pr.find(_w("pgMar"))
+    section = DocxSection(
+        width=_twips(_attr(size, "w"), TWIPS_PER_INCH),
+        height=_twips(_attr(size, "h"), TWIPS_PER_INCH),
+        margin_top=_twips(_attr(margin, "top"), TWIPS_PER_INCH),
+        margin_bottom=_twips(_attr(margin, "bottom"), TWIPS_PER_INCH),
+        margin_left=_twips(_attr(margin, "left"), TWIPS_PER_INCH),
+        margin_right=_twips(_attr(margin, "right"), TWIPS_PER_INCH),
+    )
+    if _attr(size, "orient") == "landscape" or (section.width and section.height and section.width > section.height):
+        section.orientation = "landscape"
+    return section
+
+
+def _release(element):
+    """释放已处理的元素及其之前的兄弟节点，保持常量内存"""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+class DocxStreamReader:
+    """流式 .docx 读取器"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._styles: Optional[Dict[str, DocxStyle]] = None
+        self._default_paragraph_style: Optional[DocxStyle] = None
+        self.first_section: Optional[DocxSection] = None
+
+        if not zipfile.is_zipfile(file_path):
+            raise ValueError(f"Not a valid .docx file: {file_path}")
+
+    # ------------------------------------------------------------------
+    # 样式
+    # ------------------------------------------------------------------
+
+    def styles(self) -> Dict[str, DocxStyle]:
+        """style_id → 样式定义（首次调用时解析 styles.xml）"""
+        if self._styles is None:
+            self._styles = {}
+            with zipfile.ZipFile(self.file_path) as package:
+                if STYLES_PART in package.namelist():
+                    with package.open(STYLES_PART) as stream:
+                        for _, element in etree.iterparse(stream, events=("end",), tag=_w("style")):
+                            style = self._parse_style(element)
+                            self._styles[style.style_id] = style
+                            if style.is_default and style.type == "paragraph":
+                                self._default_paragraph_style = style
+                            _release(element)
+        return self._styles
+
+    def iter_styles(self) -> Iterator[DocxStyle]:
+        yield from self.styles().values()
+
+    def style_name(self, style_id: Optional[str], style_type: str = "paragraph") -> Optional[str]:
+        """样式 ID → 样式名称；未指定样式的段落使用默认段落样式"""
+        styles = self.styles()
+        style = styles.get(style_id) if style_id else None
+        if style is None and style_type == "paragraph":
+            style = self._default_paragraph_style
+        return style.name if style else None
+
+    @staticmethod
+    def _parse_style(element) -> DocxStyle:
+        name_element = element.find(_w("name"))
+        name = _attr(name_element, "val") or _attr(element, "styleId") or ""
+        based_on = element.find(_w("basedOn"))
+        rpr = element.find(_w("rPr"))
+        return DocxStyle(
+            style_id=_attr(element, "styleId") or name,
+            name=_BUILTIN_STYLE_NAMES.get(name, name),
+            type=_attr(element, "type") or "paragraph",
+            based_on=_attr(based_on, "val"),
+            is_default=_attr(element, "default") in ("1", "true", "on"),
+            paragraph=_parse_paragraph_properties(element.find(_w("pPr"))),
+            run=_parse_run_properties(rpr) if rpr is not None else {},
+        )
+
+    # ------------------------------------------------------------------
+    # 正文
+    # ------------------------------------------------------------------
+
+    def iter_blocks(self) -> Iterator[Union[DocxParagraph, DocxTable]]:
+        """按文档顺序产出正文（w:body 直接子元素）中的段落与表格，表格内的段落包含在表格中"""
+        self.styles()
+        paragraph_index = 0
+        table_index = 0
+        body_tag = _w("body")
+
+        with zipfile.ZipFile(self.file_path) as package:
+            with package.open(DOCUMENT_PART) as stream:
+                for _, element in etree.iterparse(stream, events=("end",),
+                                                  tag=(_w("p"), _w("tbl"), _w("sectPr"))):
+                    tag = element.tag
+                    if tag == _w("sectPr"):
+                        if self.first_section is None:
+                            self.first_section = _parse_section(element)
+                        continue
+                    # 表格单元格、文本框等内部的元素随所在的正文元素一起处理
+                    if element.getparent().tag != body_tag:
+                        continue
+                    if tag == _w("p"):
+                        yield self._parse_paragraph(element, paragraph_index)
+                        paragraph_index += 1
+                    else:
+                        yield self._parse_table(element, table_index)
+                        table_index += 1
+                    _release(element)
+
+    def iter_paragraphs(self) -> Iterator[DocxParagraph]:
+        """正文段落（不含表格内段落，与 python-docx 的 Document.paragraphs 一致）"""
+        for block in self.iter_blocks():
+            if isinstance(block, DocxParagraph):
+                yield block
+
+    def iter_tables(self) -> Iterator[DocxTable]:
+        """正文表格（与 python-docx 的 Document.tables 一致）"""
+        for block in self.iter_blocks():
+            if isinstance(block, DocxTable):
+                yield block
+
+    def iter_runs(self) -> Iterator[DocxRun]:
+        for paragraph in self.iter_paragraphs():
+            yield from paragraph.runs
+
+    def section(self) -> DocxSection:
+        """第一节的页面设置（需要时流式扫描整篇文档）"""
+        if self.first_section is None:
+            for _ in self.iter_blocks():
+                pass
+        return self.first_section or DocxSection()
+
+    def _parse_paragraph(self, element, index: int) -> DocxParagraph:
+        props = _parse_paragraph_properties(element.find(_w("pPr")))
+        runs = [_parse_run(run) for run in element.xpath(_RUN_XPATH, namespaces=_NSMAP)]
+        style_id = props.pop("style_id", None)
+        return DocxParagraph(
+            index=index,
+            text="".join(run.text for run in runs),
+            style_id=style_id,
+            style_name=self.style_name(style_id) or "Normal",
+            runs=runs,
+            **props,
+        )
+
+    def _parse_table(self, element, index: int) -> DocxTable:
+        tbl_pr = element.find(_w("tblPr"))
+        style_id = _attr(tbl_pr.find(_w("tblStyle")), "val") if tbl_pr is not None else None
+        jc = tbl_pr.find(_w("jc")) if tbl_pr is not None else None
+        grid = element.find(_w("tblGrid"))
+
+        table = DocxTable(
+            index=index,
+            style_id=style_id,
+            style_name=self.style_name(style_id, "table") if style_id else None,
+            alignment=_ALIGNMENT_MAP.get(_attr(jc, "val")) if jc is not None else None,
+            column_widths=[_twips(_attr(col, "w"), TWIPS_PER_INCH) or 0.0
+                           for col in (grid.findall(_w("gridCol")) if grid is not None else [])],
+        )
+        for row in element.findall(_w("tr")):
+            height = row.find(f"{_w('trPr')}/{_w('trHeight')}")
+            table.row_heights.append(_twips(_attr(height, "val"), TWIPS_PER_INCH))
+            cells = []
+            for cell in row.findall(_w("tc")):
+                paragraphs = [self._parse_paragraph(p, -1) for p in cell.findall(_w("p"))]
+                if table.first_cell_paragraph is None and paragraphs:
+                    table.first_cell_paragraph = paragraphs[0]
+                cells.append("\n".join(p.text for p in paragraphs))
+            table.rows.append(cells)
+        return table
+
+
+def iter_docx_paragraphs(file_path: str) -> Iterator[DocxParagraph]:
+    """便捷函数：流式读取 .docx 正文段落"""
+    return DocxStreamReader(file_path).iter_paragraphs()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Docx Skeleton - 核心模块
+
+预编译的 .docx 骨架模板，用于智能填报（年度总结、个人简历）等固定版式的文档：
+- 每种文档类型的骨架只构建一次：样式、标题、固定小节写好后保存，document.xml 按占位符切分成静态片段；
+- 除 document.xml 外的包内文件（styles.xml、numbering.xml 等）预先压缩成 zip 前缀；
+- 填充时只把文本 / 段落 XML 代入占位符，压缩一个 document.xml 追加到 zip 前缀之后，
+  不再经过 python-docx 的对象模型，每次生成只需几毫秒。
+
+占位符写在骨架段落中：
+- {{text:名称}}  行内文本，替换为转义后的文本；
+- {{block:名称}} 所在整个段落替换为若干段落 XML（可以为空，即整段删除）。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import io
+import re
+import zipfile
+import threading
+from typing import Dict, List, Callable, Iterable, Union
+
+from .docx_writer import StyledDocxWriter, paragraph_xml, _text_xml
+from .export_engine import ExportBlock
+
+DOCUMENT_PART = "word/document.xml"
+
+_SLOT_RE = re.compile(
+    r"<w:p>(?:(?!<w:p[ >]).)*?\{\{block:(?P<block>\w+)\}\}.*?</w:p>"
+    r"|\{\{text:(?P<text>\w+)\}\}",
+    re.DOTALL)
+
+
+def text_slot(name: str) -> str:
+    return "{{text:%s}}" % name
+
+
+def block_slot(name: str) -> str:
+    return "{{block:%s}}" % name
+
+
+class DocxSkeleton:
+    """编译后的骨架：静态 XML 片段 + 占位符，填充时做字符串代入"""
+
+    def __init__(self, name: str, package: bytes, style_ids: Dict[str, str]):
+        """
+        Args:
+            name: 骨架名称
+            package: 含占位符的完整 .docx 字节
+            style_ids: 逻辑样式名 → 样式 ID，供调用方生成段落片段
+        """
+        self.name = name
+        self.style_ids = style_ids
+
+        with zipfile.ZipFile(io.BytesIO(package)) as source:
+            document_xml = source.read(DOCUMENT_PART).decode("utf-8")
+            prefix = io.BytesIO()
+            with zipfile.ZipFile(prefix, "w", zipfile.ZIP_DEFLATED) as target:
+                for info in source.infolist():
+                    if info.filename != DOCUMENT_PART:
+                        target.writestr(info.filename, source.read(info.filename))
+        self._prefix = prefix.getvalue()
+
+        # document.xml 切分为 [静态, 占位符, 静态, 占位符, ..., 静态]
+        self._pieces: List[str] = []
+        self._slots: List[tuple] = []
+        position = 0
+        for match in _SLOT_RE.finditer(document_xml):
+            self._pieces.append(document_xml[position:match.start()])
+            self._slots.append(("block", match.group("block")) if match.group("block")
+                               else ("text", match.group("text")))
+            position = match.end()
+        self._pieces.append(document_xml[position:])
+
+    @property
+    def slot_names(self) -> List[str]:
+        return [name for _, name in self._slots]
+
+    def fill(self, values: Dict[str, Union[str, Iterable[str]]]) -> bytes:
+        """
+        代入占位符并生成 .docx 字节。
+
+        Args:
+            values: text 占位符 → 文本；block 占位符 → 段落 XML 片段（字符串或片段列表）。
+                    未提供的占位符按空内容处理。
+        """
+        parts = [self._pieces[0]]
+        for (kind, name), piece in zip(self._slots, self._pieces[1:]):
+            value = values.get(name, "")
+            if kind == "text":
+                parts.append(_inline_text(str(value)) if value else "")
+            else:
+                parts.append(value if isinstance(value, str) else "".join(value))
+            parts.append(piece)
+
+        output = io.BytesIO(self._prefix)
+        output.seek(0, io.SEEK_END)
+        with zipfile.ZipFile(output, "a", zipfile.ZIP_DEFLATED) as package:
+            package.writestr(DOCUMENT_PART, "".join(parts).encode("utf-8"))
+        return output.getvalue()
+
+
+def _inline_text(value: str) -> str:
+    """行内占位符位于 w:t 内部：文本转义后，换行处关闭 w:t、插入软回车再重开"""
+    return _text_xml(value).replace('<w:t xml:space="preserve">', "").replace(
+        "</w:t>", "").replace("<w:br/>", '</w:t><w:br/><w:t xml:space="preserve">')
+
+
+def compile_skeleton(name: str, build: Callable[[StyledDocxWriter], Dict[str, str]]) -> DocxSkeleton:
+    """
+    构建并编译骨架。
+
+    Args:
+        name: 骨架名称
+        build: 向 writer 写入样式与带占位符段落的函数，返回逻辑样式名 → 样式 ID
+    """
+    writer = StyledDocxWriter()
+    style_ids = build(writer)
+    return DocxSkeleton(name, writer.to_bytes(), style_ids)
+
+
+def blocks_xml(blocks: Iterable[ExportBlock], style_ids: Dict[str, str]) -> List[str]:
+    """把 ExportBlock 列表转换为段落 XML 片段，样式取自骨架的 heading1-3 / body / bullet / numbered"""
+    fragments = []
+    for block in blocks:
+        if block.kind == "heading":
+            fragments.append(paragraph_xml(block.text, style_ids.get(f"heading{min(block.level, 3)}")))
+        elif block.kind in ("bullet", "numbered"):
+            fragments.append(paragraph_xml(block.text, style_ids.get(block.kind)))
+        elif block.kind == "table":
+            for row in block.rows:
+                fragments.append(paragraph_xml(" | ".join(row), style_ids.get("body")))
+        else:
+            text = [(block.text, {"bold": True})] if block.bold else block.text
+            fragments.append(paragraph_xml(text, style_ids.get("body"), block.align or None))
+    return fragments
+
+
+# ==================== 智能填报骨架 ====================
+
+def _base_style_ids(writer: StyledDocxWriter) -> Dict[str, str]:
+    return {
+        "title": writer.style_id("Title"),
+        "heading1": writer.style_id("Heading 1"),
+        "heading2": writer.style_id("Heading 2"),
+        "heading3": writer.style_id("Heading 3"),
+        "body": writer.style_id("Normal"),
+        "bullet": writer.style_id("List Bullet"),
+        "numbered": writer.style_id("List Number"),
+    }
+
+
+def _build_summary(writer: StyledDocxWriter) -> Dict[str, str]:
+    style_ids = _base_style_ids(writer)
+    writer.add_paragraph("年度工作总结", style_ids["title"], alignment="center")
+    writer.add_paragraph("日期：" + text_slot("date"), style_ids["body"], alignment="right")
+    writer.add_paragraph(block_slot("body"))
+    return style_ids
+
+
+def _build_resume(writer: StyledDocxWriter) -> Dict[str, str]:
+    style_ids = _base_style_ids(writer)
+    writer.add_paragraph("个人简历", style_ids["title"], alignment="center")
+    writer.add_paragraph("基本信息", style_ids["heading1"])
+    writer.add_paragraph(f"姓名：{text_slot('name')}\n电话：{text_slot('phone')}\n邮箱：{text_slot('email')}",
+                         style_ids["body"])
+    # 个人陈述、专业技能没有内容时整节省略，小节标题随内容一起代入
+    writer.add_paragraph(block_slot("statement"))
+    for heading, slot in (("教育背景", "education"), ("工作经验", "work"), ("项目经验", "projects")):
+        writer.add_paragraph(heading, style_ids["heading1"])
+        writer.add_paragraph(block_slot(slot))
+    writer.add_paragraph(block_slot("skills"))
+    return style_ids
+
+
+SMART_FILL_SKELETONS: Dict[str, Callable[[StyledDocxWriter], Dict[str, str]]] = {
+    "summary": _build_summary,
+    "resume": _build_resume,
+}
+
+_skeletons: Dict[str, DocxSkeleton] = {}
+_skeletons_lock = threading.Lock()
+
+
+def get_smart_fill_skeleton(kind: str) -> DocxSkeleton:
+    """获取智能填报类型对应的骨架（每个进程首次使用时编译）"""
+    skeleton = _skeletons.get(kind)
+    if skeleton is None:
+        if kind not in SMART_FILL_SKELETONS:
+            raise ValueError(f"未知的智能填报类型: {kind}")
+        with _skeletons_lock:
+            skeleton = _skeletons.get(kind)
+            if skeleton is None:
+                skeleton = compile_skeleton(kind, SMART_FILL_SKELETONS[kind])
+                _skeletons[kind] = skeleton
+    return skeleton
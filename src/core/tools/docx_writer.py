@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Docx Writer - 核心模块
+
+批量写入带样式段落的 .docx 生成器：
+- 命名样式只在 styles.xml 中定义一次（字体、东亚字体、字号、对齐、间距、缩进），段落通过样式 ID 引用，
+  不再在每个 run 上重复设置字体、字号和 w:eastAsia；
+- 段落与表格先以 XML 片段缓存，flush 时一次解析后批量插入 body，
+  生成数百页的文档基本上只有一次解析和一次序列化。
+仍使用 python-docx 的 Document 管理包结构、节属性和核心属性，与其他写入代码兼容。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import io
+import re
+from typing import Dict, List, Any, Optional, Union, Tuple, Iterable
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.oxml import parse_xml
+
+from .docx_reader import W_NS
+
+# 对齐方式 → w:jc 取值
+_JC_VALUES = {"left": "left", "center": "center", "right": "right", "justify": "both", "both": "both"}
+
+# XML 1.0 不允许的控制字符
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# run 片段：纯文本，或 (文本, 直接格式)；直接格式可包含 bold / italic / underline / color / size / font_name
+RunSpec = Union[str, Tuple[str, Dict[str, Any]]]
+
+
+def _twips(points: float) -> int:
+    return int(round(points * 20))
+
+
+def _text_xml(text: str) -> str:
+    """文本 → w:t / w:br 序列，换行转为软回车"""
+    parts = []
+    for index, line in enumerate(_INVALID_XML_CHARS.sub("", text).split("\n")):
+        if index:
+            parts.append("<w:br/>")
+        if line:
+            parts.append(f'<w:t xml:space="preserve">{escape(line)}</w:t>')
+    return "".join(parts)
+
+
+def _rpr_xml(font_name: Optional[str] = None, east_asia_font: Optional[str] = None,
+             size: Optional[float] = None, bold: Optional[bool] = None, italic: Optional[bool] = None,
+             underline: Optional[bool] = None, color: Optional[str] = None) -> str:
+    """w:rPr 内容（子元素按 schema 顺序）"""
+    parts = []
+    east_asia_font = east_asia_font or font_name
+    if font_name or east_asia_font:
+        attrs = ""
+        if font_name:
+            name = escape(font_name, {'"': "&quot;"})
+            attrs += f' w:ascii="{name}" w:hAnsi="{name}" w:cs="{name}"'
+        if east_asia_font:
+            attrs += f' w:eastAsia="{escape(east_asia_font, {chr(34): "&quot;"})}"'
+        parts.append(f"<w:rFonts{attrs}/>")
+    if bold is not None:
+        parts.append("<w:b/><w:bCs/>" if bold else '<w:b w:val="0"/><w:bCs w:val="0"/>')
+    if italic is not None:
+        parts.append("<w:i/><w:iCs/>" if italic else '<w:i w:val="0"/><w:iCs w:val="0"/>')
+    if color:
+        parts.append(f'<w:color w:val="{color.lstrip("#").upper()}"/>')
+    if size:
+        half_points = int(round(size * 2))
+        parts.append(f'<w:sz w:val="{half_points}"/><w:szCs w:val="{half_points}"/>')
+    if underline is not None:
+        parts.append(f'<w:u w:val="{"single" if underline else "none"}"/>')
+    return "".join(parts)
+
+
+def _ppr_xml(alignment: Optional[str] = None, line_spacing: Optional[float] = None,
+             space_before: Optional[float] = None, space_after: Optional[float] = None,
+             first_line_indent: Optional[float] = None, left_indent: Optional[float] = None,
+             right_indent: Optional[float] = None, outline_level: Optional[int] = None,
+             keep_next: bool = False) -> str:
+    """w:pPr 内容（子元素按 schema 顺序）。间距、缩进单位为磅；行距不大于 5 时为倍数，否则为固定磅值"""
+    parts = []
+    if keep_next:
+        parts.append("<w:keepNext/>")
+    spacing = ""
+    if space_before is not None:
+        spacing += f' w:before="{_twips(space_before)}"'
+    if space_after is not None:
+        spacing += f' w:after="{_twips(space_after)}"'
+    if line_spacing:
+        if line_spacing > 5:
+            spacing += f' w:line="{_twips(line_spacing)}" w:lineRule="exact"'
+        else:
+            spacing += f' w:line="{int(round(line_spacing * 240))}" w:lineRule="auto"'
+    if spacing:
+        parts.append(f"<w:spacing{spacing}/>")
+    indent = ""
+    if left_indent:
+        indent += f' w:left="{_twips(left_indent)}"'
+    if right_indent:
+        indent += f' w:right="{_twips(right_indent)}"'
+    if first_line_indent:
+        indent += (f' w:firstLine="{_twips(first_line_indent)}"' if first_line_indent > 0
+                   else f' w:hanging="{_twips(-first_line_indent)}"')
+    if indent:
+        parts.append(f"<w:ind{indent}/>")
+    if alignment in _JC_VALUES:
+        parts.append(f'<w:jc w:val="{_JC_VALUES[alignment]}"/>')
+    if outline_level is not None:
+        parts.append(f'<w:outlineLvl w:val="{outline_level}"/>')
+    return "".join(parts)
+
+
+def paragraph_xml(text: Union[str, Iterable[RunSpec]] = "", style_id: Optional[str] = None,
+                  alignment: Optional[str] = None) -> str:
+    """段落 XML 片段（未声明命名空间，需放入声明了 w 前缀的容器中）"""
+    ppr = (f'<w:pStyle w:val="{style_id}"/>' if style_id else "") + (
+        f'<w:jc w:val="{_JC_VALUES[alignment]}"/>' if alignment in _JC_VALUES else "")
+    runs = [text] if isinstance(text, str) else list(text)
+    body = []
+    for run in runs:
+        run_text, run_format = (run, None) if isinstance(run, str) else run
+        if not run_text:
+            continue
+        rpr = _rpr_xml(**run_format) if run_format else ""
+        body.append(f"<w:r>{'<w:rPr>' + rpr + '</w:rPr>' if rpr else ''}{_text_xml(run_text)}</w:r>")
+    return f"<w:p>{'<w:pPr>' + ppr + '</w:pPr>' if ppr else ''}{''.join(body)}</w:p>"
+
+
+class StyledDocxWriter:
+    """按样式 ID 批量写入段落的 .docx 生成器"""
+
+    def __init__(self, template_path: Optional[str] = None):
+        """
+        Args:
+            template_path: 作为底稿的 .docx（沿用其样式与节设置），默认使用 python-docx 内置模板
+        """
+        self.document = Document(template_path)
+        self._styles_element = self.document.styles.element
+        self._style_ids = {style.get(f"{{{W_NS}}}styleId") for style in self._styles_element.iterchildren(f"{{{W_NS}}}style")}
+        self._fragments: List[str] = []
+        self.paragraph_count = 0
+
+    # ---------- 样式 ----------
+
+    def style_id(self, style_name: str) -> Optional[str]:
+        """按样式名称查找已有样式的 ID（如 "Table Grid" → "TableGrid"）"""
+        try:
+            return self.document.styles[style_name].style_id
+        except KeyError:
+            return None
+
+    def define_paragraph_style(self, name: str, based_on: str = "Normal", font_name: Optional[str] = None,
+                               east_asia_font: Optional[str] = None, size: Optional[float] = None,
+                               bold: Optional[bool] = None, italic: Optional[bool] = None,
+                               underline: Optional[bool] = None, color: Optional[str] = None,
+                               alignment: Optional[str] = None, line_spacing: Optional[float] = None,
+                               space_before: Optional[float] = None, space_after: Optional[float] = None,
+                               first_line_indent: Optional[float] = None, left_indent: Optional[float] = None,
+                               right_indent: Optional[float] = None, outline_level: Optional[int] = None) -> str:
+        """
+        在 styles.xml 中定义段落样式，返回样式 ID。同名样式已存在时直接返回其 ID。
+        字号、间距、缩进单位为磅；outline_level（0 起）使样式参与目录与导航窗格。
+        """
+        existing = self.style_id(name)
+        if existing:
+            return existing
+
+        style_id = re.sub(r"[^A-Za-z0-9]", "", name) or "Style"
+        candidate, suffix = style_id, 1
+        while candidate in self._style_ids:
+            suffix += 1
+            candidate = f"{style_id}{suffix}"
+        style_id = candidate
+
+        based_on_id = self.style_id(based_on) if based_on else None
+        ppr = _ppr_xml(alignment, line_spacing, space_before, space_after, first_line_indent,
+                       left_indent, right_indent, outline_level, keep_next=outline_level is not None)
+        rpr = _rpr_xml(font_name, east_asia_font, size, bold, italic, underline, color)
+        xml = (f'<w:style xmlns:w="{W_NS}" w:type="paragraph" w:customStyle="1" w:styleId="{style_id}">'
+               f'<w:name w:val="{escape(name, {chr(34): "&quot;"})}"/>'
+               + (f'<w:basedOn w:val="{based_on_id}"/>' if based_on_id else "")
+               + '<w:qFormat/>'
+               + (f"<w:pPr>{ppr}</w:pPr>" if ppr else "")
+               + (f"<w:rPr>{rpr}</w:rPr>" if rpr else "")
+               + "</w:style>")
+        self._styles_element.append(parse_xml(xml))
+        self._style_ids.add(style_id)
+        return style_id
+
+    # ---------- 正文 ----------
+
+    def add_paragraph(self, text: Union[str, Iterable[RunSpec]] = "", style_id: Optional[str] = None,
+                      alignment: Optional[str] = None):
+        """
+        追加段落（缓存为 XML 片段）。text 可以是字符串，也可以是 run 片段列表，
+        片段为 (文本, 直接格式) 时只给该 run 写入直接格式。
+        """
+        self._fragments.append(paragraph_xml(text, style_id, alignment))
+        self.paragraph_count += 1
+
+    def add_page_break(self):
+        self._fragments.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+
+    def add_table(self, rows: List[List[str]], style_name: str = "Table Grid",
+                  cell_style_id: Optional[str] = None):
+        """追加表格，单元格段落引用 cell_style_id"""
+        if not rows:
+            return
+        columns = max(len(row) for row in rows)
+        table_style_id = self.style_id(style_name) or self.style_id("Table Grid")
+        cell_ppr = f'<w:pPr><w:pStyle w:val="{cell_style_id}"/></w:pPr>' if cell_style_id else ""
+        parts = ['<w:tbl><w:tblPr>'
+                 + (f'<w:tblStyle w:val="{table_style_id}"/>' if table_style_id else "")
+                 + '<w:tblW w:w="0" w:type="auto"/><w:tblLook w:val="04A0"/></w:tblPr><w:tblGrid>'
+                 + '<w:gridCol/>' * columns + '</w:tblGrid>']
+        for row in rows:
+            parts.append("<w:tr>")
+            for col in range(columns):
+                value = str(row[col]) if col < len(row) and row[col] is not None else ""
+                run = f"<w:r>{_text_xml(value)}</w:r>" if value else ""
+                parts.append(f'<w:tc><w:tcPr><w:tcW w:w="0" w:type="auto"/></w:tcPr><w:p>{cell_ppr}{run}</w:p></w:tc>')
+            parts.append("</w:tr>")
+        parts.append("</w:tbl>")
+        self._fragments.append("".join(parts))
+
+    def flush(self):
+        """把缓存的片段一次解析，批量插入到 body 的节属性之前"""
+        if not self._fragments:
+            return
+        container = parse_xml(f'<w:body xmlns:w="{W_NS}">' + "".join(self._fragments) + "</w:body>")
+        self._fragments = []
+        body = self.document.element.body
+        anchor = body.sectPr
+        for child in list(container):
+            if anchor is not None:
+                anchor.addprevious(child)
+            else:
+                body.append(child)
+
+    # ---------- 输出 ----------
+
+    def save(self, path_or_stream):
+        self.flush()
+        self.document.save(path_or_stream)
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        self.save(buffer)
+        return buffer.getvalue()
@@ -22,16 +22,18 @@ from datetime import datetime
 from collections import Counter, defaultdict
 import numpy as np
 
+from .text_segmenter import get_text_segmenter, JIEBA_AVAILABLE
+
 try:
-    import jieba
-    import jieba.posseg as pseg
     from sklearn.feature_extraction.text import TfidfVectorizer
     from sklearn.preprocessing import StandardScaler, MinMaxScaler
     from sklearn.decomposition import PCA
     from sklearn.metrics.pairwise import cosine_similarity
-    DEPENDENCIES_AVAILABLE = True
+    DEPENDENCIES_AVAILABLE = JIEBA_AVAILABLE
 except ImportError:
     DEPENDENCIES_AVAILABLE = False
+
+if not DEPENDENCIES_AVAILABLE:
     print("Warning: Some dependencies not available. Install jieba, scikit-learn for full functionality.")
 
 
@@ -43,6 +45,7 @@ class QuantitativeFeatureExtractor:
         self.function_words = ['的', '了', '是', '在', '有', '和', '与', '或', '但', '而', '因为', '所以', '如果', '那么']
         self.formal_words = ['根据', '按照', '依据', '鉴于', '基于', '关于', '针对', '就', '对于', '至于']
         self.informal_words = ['挺', '蛮', '特别', '非常', '超级', '巨', '贼', '老', '可', '真']
+        self.segmenter = get_text_segmenter()
         
     def extract_lexical_features(self, text: str) -> Dict[str, Any]:
         """提取词汇特征"""
@@ -50,8 +53,8 @@ class QuantitativeFeatureExtractor:
             return {"error": "Dependencies not available"}
             
         # 分词和词性标注
-        words = list(jieba.cut(text))
-        pos_tags = list(pseg.cut(text))
+        words = self.segmenter.cut(text)
+        pos_tags = self.segmenter.posseg(text)
         
         # 基础统计
         total_chars = len(text)
@@ -329,6 +332,8 @@ class EnhancedStyleExtractor:
     
     def __init__(self, llm_client=None, storage_path: str = "src/core/knowledge_base/style_features"):
         self.quantitative_extractor = QuantitativeFeatureExtractor()
+        # 后台预加载分词词典，避免首个请求承担词典加载延迟
+        self.quantitative_extractor.segmenter.preload(background=True)
         self.llm_analyzer = LLMStyleAnalyzer(llm_client)
         self.storage_path = storage_path
         
@@ -22,6 +22,7 @@ import logging
 from .intelligent_role_selector import IntelligentRoleSelector
 from .smart_prompt_generator import SmartPromptGenerator
 from .base_tool import BaseTool
+from .text_segmenter import get_text_segmenter
 
 class EnhancedVirtualReviewer(BaseTool):
     """
@@ -427,7 +428,7 @@ class EnhancedVirtualReviewer(BaseTool):
     # 辅助方法
     def _analyze_document_characteristics(self, content: str) -> Dict[str, Any]:
         """分析文档特征"""
-        words = content.split()
+        words = get_text_segmenter().words(content)
         sentences = content.split('.')
         
         return {
@@ -459,7 +460,7 @@ class EnhancedVirtualReviewer(BaseTool):
     
     def _assess_complexity(self, content: str) -> str:
         """评估复杂度"""
-        word_count = len(content.split())
+        word_count = len(get_text_segmenter().words(content))
         if word_count > 1000:
             return "high"
         elif word_count > 500:
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export Engine - 核心模块
+
+统一的文档导出引擎：
+- 各处导出逻辑（格式对齐下载、审查报告、文风统一结果、智能填报总结）先构造同一种中间表示 ExportDocument，
+  再由 txt / html / docx / pdf 渲染器生成文件；
+- 渲染结果按 (内容哈希, 格式, 模板) 缓存在磁盘上，同一结果的重复下载直接返回缓存文件，不再构造文档、不再渲染；
+- ExportArtifact.iter_chunks 按块读取文件，Web 层据此流式返回响应，不必把整个文件读入内存。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import os
+import re
+import io
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Iterator, Callable, Union, Tuple
+from xml.sax.saxutils import escape
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE = "document"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 格式 → (Content-Type, 扩展名)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "txt": ("text/plain; charset=utf-8", ".txt"),
+    "html": ("text/html; charset=utf-8", ".html"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"),
+    "pdf": ("application/pdf", ".pdf"),
+}
+
+# 渲染失败时依次尝试的替代格式
+FALLBACK_FORMATS: Dict[str, Tuple[str, ...]] = {
+    "docx": ("txt",),
+    "pdf": ("html", "txt"),
+    "html": ("txt",),
+    "txt": (),
+}
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s*(.+)$")
+_BULLET_RE = re.compile(r"^[-*]\s+(.+)$")
+_NUMBERED_RE = re.compile(r"^\d+\.\s+(.+)$")
+
+
+@dataclass
+class ExportBlock:
+    """文档内容块：heading / paragraph / bullet / numbered / table"""
+    kind: str
+    text: str = ""
+    level: int = 1
+    bold: bool = False
+    align: Optional[str] = None
+    rows: List[List[str]] = field(default_factory=list)
+
+
+@dataclass
+class ExportDocument:
+    """导出文档的中间表示"""
+    title: str
+    blocks: List[ExportBlock] = field(default_factory=list)
+    template: str = DEFAULT_TEMPLATE
+    subtitle: str = ""
+    subtitle_align: str = "center"
+    footer: str = ""
+
+
+@dataclass(frozen=True)
+class ExportTemplate:
+    """模板决定各格式的标题字号与标题颜色"""
+    name: str
+    title_size: int = 24
+    heading_color: Optional[str] = None
+    subheading_color: Optional[str] = None
+
+
+EXPORT_TEMPLATES: Dict[str, ExportTemplate] = {
+    "document": ExportTemplate("document"),
+    "report": ExportTemplate("report", title_size=18, heading_color="#00008B", subheading_color="#006400"),
+    "style_result": ExportTemplate("style_result"),
+    "annual_summary": ExportTemplate("annual_summary"),
+}
+
+
+def get_export_template(name: str) -> ExportTemplate:
+    """获取模板，未登记的模板使用默认样式"""
+    return EXPORT_TEMPLATES.get(name) or EXPORT_TEMPLATES[DEFAULT_TEMPLATE]
+
+
+def parse_markdown(text: str, join_lines: bool = False) -> List[ExportBlock]:
+    """
+    把 Markdown 风格的文本解析为内容块：# 标题、- / * 列表、1. 编号列表、**粗体**行，其余为段落。
+
+    Args:
+        text: 原始文本
+        join_lines: True 时以空行分段，段内连续的普通行合并为一个段落；False 时每行一个段落
+    """
+    blocks: List[ExportBlock] = []
+    pending: List[str] = []
+
+    def flush():
+        if pending:
+            blocks.append(ExportBlock("paragraph", "\n".join(pending)))
+            pending.clear()
+
+    for raw_line in (text or "").splitlines():
+        line = raw_line.strip()
+        if not line:
+            flush()
+            continue
+
+        heading = _HEADING_RE.match(line)
+        bullet = _BULLET_RE.match(line)
+        numbered = _NUMBERED_RE.match(line)
+        if heading:
+            flush()
+            blocks.append(ExportBlock("heading", heading.group(2).strip(), level=len(heading.group(1))))
+        elif bullet:
+            flush()
+            blocks.append(ExportBlock("bullet", bullet.group(1)))
+        elif numbered:
+            flush()
+            blocks.append(ExportBlock("numbered", numbered.group(1)))
+        elif len(line) > 4 and line.startswith("**") and line.endswith("**"):
+            flush()
+            blocks.append(ExportBlock("paragraph", line[2:-2], bold=True))
+        elif join_lines:
+            pending.append(line)
+        else:
+            blocks.append(ExportBlock("paragraph", line))
+    flush()
+    return blocks
+
+
+def content_hash(source: Union[str, bytes, Dict[str, Any], List[Any]]) -> str:
+    """源内容的哈希：字符串 / 字节直接计算，dict / list 按排序后的 JSON 计算"""
+    if isinstance(source, str):
+        data = source.encode("utf-8")
+    elif isinstance(source, bytes):
+        data = source
+    else:
+        data = json.dumps(source, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+# ==================== 渲染器 ====================
+
+def render_txt(document: ExportDocument) -> bytes:
+    lines = [document.title, ""]
+    if document.subtitle:
+        lines += [document.subtitle, ""]
+    counter = 0
+    for block in document.blocks:
+        counter = counter + 1 if block.kind == "numbered" else 0
+        if block.kind == "heading":
+            lines += ["", "#" * block.level + " " + block.text]
+        elif block.kind == "bullet":
+            lines.append("- " + block.text)
+        elif block.kind == "numbered":
+            lines.append(f"{counter}. {block.text}")
+        elif block.kind == "table":
+            lines += ["\t".join(row) for row in block.rows] + [""]
+        else:
+            lines += [block.text, ""]
+    if document.footer:
+        lines += ["", document.footer]
+    return ("\n".join(lines).strip() + "\n").encode("utf-8")
+
+
+_HTML_STYLE = """
+        body {{
+            font-family: 'Microsoft YaHei', Arial, sans-serif;
+            line-height: 1.6;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+            color: #333;
+        }}
+        h1, h2, h3, h4, h5, h6 {{
+            color: #2c3e50;
+            margin-top: 30px;
+            margin-bottom: 15px;
+        }}
+        h1 {{ font-size: 2.5em; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
+        h2 {{ font-size: 2em; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }}
+        h3 {{ font-size: 1.5em; }}
+        .content h1 {{ color: {heading_color}; }}
+        .content h2 {{ color: {subheading_color}; }}
+        p {{ margin-bottom: 15px; text-align: justify; }}
+        ul, ol {{ margin-bottom: 15px; padding-left: 30px; }}
+        li {{ margin-bottom: 5px; }}
+        table {{ border-collapse: collapse; margin-bottom: 15px; }}
+        td {{ border: 1px solid #333; padding: 6px 12px; }}
+        td:first-child {{ background: #eee; }}
+        .header {{ text-align: center; margin-bottom: 40px; }}
+        .footer {{ text-align: center; margin-top: 40px; color: #7f8c8d; font-size: 0.9em; }}
+"""
+
+
+def _html_text(text: str) -> str:
+    return escape(text).replace("\n", "<br>\n")
+
+
+def render_html(document: ExportDocument) -> bytes:
+    template = get_export_template(document.template)
+    parts: List[str] = []
+    open_list = None
+    for block in document.blocks:
+        list_tag = {"bullet": "ul", "numbered": "ol"}.get(block.kind)
+        if open_list and list_tag != open_list:
+            parts.append(f"</{open_list}>")
+            open_list = None
+        if list_tag and not open_list:
+            parts.append(f"<{list_tag}>")
+            open_list = list_tag
+
+        if list_tag:
+            parts.append(f"<li>{_html_text(block.text)}</li>")
+        elif block.kind == "heading":
+            level = min(block.level, 6)
+            parts.append(f"<h{level}>{_html_text(block.text)}</h{level}>")
+        elif block.kind == "table":
+            rows = "\n".join("<tr>" + "".join(f"<td>{_html_text(cell)}</td>" for cell in row) + "</tr>"
+                             for row in block.rows)
+            parts.append(f"<table>\n{rows}\n</table>")
+        else:
+            text = _html_text(block.text)
+            if block.bold:
+                text = f"<strong>{text}</strong>"
+            style = f' style="text-align: {block.align}"' if block.align else ""
+            parts.append(f"<p{style}>{text}</p>")
+    if open_list:
+        parts.append(f"</{open_list}>")
+
+    style = _HTML_STYLE.format(heading_color=template.heading_color or "#2c3e50",
+                               subheading_color=template.subheading_color or "#2c3e50")
+    subtitle = (f'<p style="text-align: {document.subtitle_align}">{escape(document.subtitle)}</p>'
+                if document.subtitle else "")
+    footer = f'<div class="footer">\n        <p>{escape(document.footer)}</p>\n    </div>' if document.footer else ""
+    html = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{escape(document.title)}</title>
+    <style>{style}    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>{escape(document.title)}</h1>
+        {subtitle}
+    </div>
+    <div class="content">
+        {chr(10).join(parts)}
+    </div>
+    {footer}
+</body>
+</html>"""
+    return html.encode("utf-8")
+
+
+def render_docx(document: ExportDocument) -> bytes:
+    from docx import Document
+    from docx.shared import Pt, RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    alignments = {"left": WD_ALIGN_PARAGRAPH.LEFT, "center": WD_ALIGN_PARAGRAPH.CENTER,
+                  "right": WD_ALIGN_PARAGRAPH.RIGHT}
+    template = get_export_template(document.template)
+    heading_colors = {1: template.heading_color, 2: template.subheading_color}
+
+    doc = Document()
+    doc.add_heading(document.title, 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    if document.subtitle:
+        doc.add_paragraph(document.subtitle).alignment = alignments.get(document.subtitle_align)
+
+    for block in document.blocks:
+        if block.kind == "heading":
+            heading = doc.add_heading(block.text, min(block.level, 9))
+            color = heading_colors.get(block.level)
+            if color:
+                for run in heading.runs:
+                    run.font.color.rgb = RGBColor.from_string(color.lstrip("#"))
+        elif block.kind == "bullet":
+            doc.add_paragraph(block.text, style="List Bullet")
+        elif block.kind == "numbered":
+            doc.add_paragraph(block.text, style="List Number")
+        elif block.kind == "table":
+            if not block.rows:
+                continue
+            table = doc.add_table(rows=len(block.rows), cols=max(len(row) for row in block.rows))
+            table.style = "Table Grid"
+            for i, row in enumerate(block.rows):
+                for j, cell in enumerate(row):
+                    table.cell(i, j).text = cell
+        else:
+            paragraph = doc.add_paragraph()
+            paragraph.add_run(block.text).bold = block.bold or None
+            if block.align:
+                paragraph.alignment = alignments.get(block.align)
+
+    if document.footer:
+        doc.add_paragraph()
+        footer = doc.add_paragraph()
+        footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        footer.add_run(document.footer).font.size = Pt(8)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_pdf(document: ExportDocument) -> bytes:
+    # 字体注册、样式表与可复用段落由 PDF 渲染服务在进程内缓存
+    from .pdf_renderer import get_pdf_renderer
+    return get_pdf_renderer().render(document)
+
+
+RENDERERS: Dict[str, Callable[[ExportDocument], bytes]] = {
+    "txt": render_txt,
+    "html": render_html,
+    "docx": render_docx,
+    "pdf": render_pdf,
+}
+
+
+# ==================== 导出引擎 ====================
+
+@dataclass
+class ExportArtifact:
+    """已渲染的导出文件（位于缓存目录中）"""
+    key: str
+    format: str
+    path: str
+    size: int
+    cached: bool = False
+
+    @property
+    def mimetype(self) -> str:
+        return EXPORT_FORMATS[self.format][0]
+
+    @property
+    def extension(self) -> str:
+        return EXPORT_FORMATS[self.format][1]
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """按块读取文件内容，供流式响应使用"""
+        with open(self.path, "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as file:
+            return file.read()
+
+
+class ExportEngine:
+    """导出引擎：中间表示 → 各格式文件，渲染结果按 (内容哈希, 格式, 模板) 缓存在磁盘上"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: 缓存目录，默认为项目根目录下的 data/export_cache
+            max_entries: 缓存文件数上限
+            max_bytes: 缓存总大小上限（字节）
+        """
+        if cache_dir is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+            cache_dir = os.path.join(project_root, "data", "export_cache")
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.stats = {"hits": 0, "renders": 0, "fallbacks": 0}
+
+    @staticmethod
+    def cache_key(source_hash: str, fmt: str, template: str) -> str:
+        return hashlib.sha256(f"{source_hash}:{fmt}:{template}".encode("utf-8")).hexdigest()
+
+    def export(self, source: Union[str, bytes, Dict[str, Any], List[Any]], fmt: str,
+               template: str = DEFAULT_TEMPLATE, build: Optional[Callable[[], ExportDocument]] = None,
+               fallback: bool = True) -> ExportArtifact:
+        """
+        导出文档。缓存命中时直接返回缓存文件，build 不会被调用。
+
+        Args:
+            source: 源内容（文本或结构化数据），用于计算缓存键
+            fmt: 目标格式 txt / html / docx / pdf
+            template: 模板名称
+            build: 构造 ExportDocument 的函数，默认把 source 文本按 Markdown 解析。
+                   渲染结果按 source 缓存，build 生成的内容只能取决于 source，不要写入导出时刻等每次请求不同的值
+            fallback: 目标格式渲染失败时是否按 FALLBACK_FORMATS 改用其他格式
+
+        Returns:
+            ExportArtifact: 实际格式可能因回退而与 fmt 不同
+        """
+        fmt = fmt.lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if build is None:
+            build = lambda: ExportDocument(title="", blocks=parse_markdown(str(source)), template=template)
+
+        source_hash = content_hash(source)
+        document: List[ExportDocument] = []
+
+        def get_document() -> ExportDocument:
+            if not document:
+                document.append(build())
+            return document[0]
+
+        candidates = (fmt,) + (FALLBACK_FORMATS[fmt] if fallback else ())
+        for index, candidate in enumerate(candidates):
+            try:
+                return self._get_or_render(self.cache_key(source_hash, candidate, template), candidate, get_document)
+            except Exception as e:
+                if index == len(candidates) - 1:
+                    raise
+                self.stats["fallbacks"] += 1
+                logger.warning(f"⚠️ {candidate} 导出失败，改用 {candidates[index + 1]}: {e}")
+
+    def render(self, document: ExportDocument, fmt: str) -> bytes:
+        """直接渲染，不经过缓存"""
+        return RENDERERS[fmt.lower()](document)
+
+    def _get_or_render(self, key: str, fmt: str, get_document: Callable[[], ExportDocument]) -> ExportArtifact:
+        path = os.path.join(self.cache_dir, key + EXPORT_FORMATS[fmt][1])
+        artifact = self._lookup(key, fmt, path)
+        if artifact:
+            return artifact
+
+        with self._key_lock(key):
+            # 等锁期间其他线程可能已经渲染完成
+            artifact = self._lookup(key, fmt, path)
+            if artifact:
+                return artifact
+
+            data = RENDERERS[fmt](get_document())
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.stats["renders"] += 1
+            self._evict()
+            return ExportArtifact(key, fmt, path, len(data))
+
+    def _lookup(self, key: str, fmt: str, path: str) -> Optional[ExportArtifact]:
+        try:
+            size = os.path.getsize(path)
+            os.utime(path)  # 更新 mtime，用于 LRU 淘汰
+        except OSError:
+            return None
+        self.stats["hits"] += 1
+        return ExportArtifact(key, fmt, path, size, cached=True)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            if len(self._key_locks) > 4 * self.max_entries:
+                self._key_locks = {k: v for k, v in self._key_locks.items() if v.locked()}
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _evict(self):
+        """超出文件数或总大小上限时，按最近使用时间淘汰"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, name = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """清空缓存"""
+        for name in os.listdir(self.cache_dir):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+
+# 全局导出引擎实例
+_global_export_engine = None
+
+
+def get_export_engine() -> ExportEngine:
+    """获取全局导出引擎实例"""
+    global _global_export_engine
+    if _global_export_engine is None:
+        _global_export_engine = ExportEngine()
+    return _global_export_engine
@@ -296,13 +296,10 @@ class FeatureFusionProcessor:
             else:
                 return [0.0] * len(vector)
         
-        # 使用sklearn标准化
-        scaler_key = f"{feature_type}_scaler"
-        if scaler_key not in self.scalers:
-            self.scalers[scaler_key] = StandardScaler()
-        
+        # 使用sklearn标准化：每次都对当前向量重新拟合，使用局部 scaler，
+        # 批量处理时多个线程同时标准化不会互相覆盖拟合参数
         vector_array = np.array(vector).reshape(-1, 1)
-        normalized = self.scalers[scaler_key].fit_transform(vector_array)
+        normalized = StandardScaler().fit_transform(vector_array)
         return normalized.flatten().tolist()
     
     def _group_quantitative_features(self, vector: List[float], names: List[str]) -> Dict[str, List[float]]:
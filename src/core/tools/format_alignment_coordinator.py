@@ -15,7 +15,10 @@ License: MIT
 import os
 import json
 import uuid
-from typing import Dict, Any, List, Tuple, Optional
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple, Optional, Iterator
 from .document_format_extractor import DocumentFormatExtractor
 # 使用绝对导入避免相对导入问题
 import sys
@@ -37,9 +40,13 @@ except ImportError as e:
     SparkX1Client = None
     get_config = None
 
+# 多文件格式对齐时同时进行的星火X1调用数上限（所有批量任务共享）
+DEFAULT_BATCH_CONCURRENCY = 4
+
 class FormatAlignmentCoordinator:
     
-    def __init__(self, api_password=None, llm_client=None, spark_x1_config=None):
+    def __init__(self, api_password=None, llm_client=None, spark_x1_config=None,
+                 batch_concurrency: int = DEFAULT_BATCH_CONCURRENCY):
         self.tool_name = "文档格式对齐协调器"
         self.description = "智能处理文档格式对齐请求，支持自然语言交互和多轮对话"
         self.llm_client = llm_client
@@ -70,6 +77,12 @@ class FormatAlignmentCoordinator:
 
         # 任务管理
         self.active_tasks = {}  # 存储活跃的格式对齐任务
+
+        # 多文件批量任务：共享线程池限制并发调用数，条件变量用于按完成顺序推送结果
+        self.batch_concurrency = max(1, batch_concurrency)
+        self._batch_executor = None
+        self._batch_lock = threading.Lock()
+        self._batch_condition = threading.Condition(self._batch_lock)
     
     def process_user_request(self, user_input: str, uploaded_files: Dict[str, str] = None) -> Dict[str, Any]:
         """
@@ -451,6 +464,135 @@ class FormatAlignmentCoordinator:
         except Exception as e:
             return {"error": f"星火X1格式化失败: {str(e)}"}
 
+    def start_batch_format_task(self, files: List[Dict[str, Any]], instruction: str, **kwargs) -> Dict[str, Any]:
+        """
+        多文件格式对齐：所有文件并发调用 format_with_spark_x1（受 batch_concurrency 限制），立即返回批量任务ID。
+        每个文件完成后生成各自的格式化任务，可以通过 iter_batch_results 按完成顺序获取，
+        也可以通过 get_task_result(批量任务ID) 查看汇总状态。
+
+        Args:
+            files: 文件列表，每项包含 file_id、filename、content
+            instruction: 格式化指令
+            **kwargs: 传给 format_with_spark_x1 的参数 (temperature, max_tokens等)
+
+        Returns:
+            批量任务信息
+        """
+        if not self.spark_x1_client:
+            return {"error": "星火X1客户端未初始化"}
+        if not files:
+            return {"error": "没有需要处理的文件"}
+
+        batch_id = str(uuid.uuid4())
+        entries = [{
+            "file_id": file.get("file_id", f"file_{index}"),
+            "filename": file.get("filename", f"document_{index}.txt"),
+            "status": "pending",
+            "task_id": None,
+            "error": None
+        } for index, file in enumerate(files)]
+
+        with self._batch_lock:
+            self.active_tasks[batch_id] = {
+                "task_id": batch_id,
+                "type": "batch",
+                "status": "processing",
+                "instruction": instruction,
+                "files": entries,
+                "completed_order": [],  # 按完成顺序记录文件序号
+                "started_at": time.time(),
+                "finished_at": None,
+                "formatted_content": "",
+                "processing_log": f"多文件格式对齐进行中（共 {len(files)} 个文件）"
+            }
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(max_workers=self.batch_concurrency,
+                                                          thread_name_prefix="format-align")
+            executor = self._batch_executor
+
+        for index, file in enumerate(files):
+            executor.submit(self._run_batch_file, batch_id, index, file.get("content", ""), instruction, kwargs)
+
+        return {
+            "success": True,
+            "task_id": batch_id,
+            "status": "processing",
+            "total": len(files),
+            "concurrency": self.batch_concurrency
+        }
+
+    def _run_batch_file(self, batch_id: str, index: int, content: str, instruction: str, kwargs: Dict[str, Any]):
+        """批量任务中单个文件的处理（在线程池中执行）"""
+        with self._batch_lock:
+            self.active_tasks[batch_id]["files"][index]["status"] = "processing"
+        try:
+            result = self.format_with_spark_x1(content=content, instruction=instruction, **kwargs)
+        except Exception as e:
+            result = {"error": str(e)}
+
+        with self._batch_condition:
+            batch = self.active_tasks[batch_id]
+            entry = batch["files"][index]
+            if result.get("success"):
+                entry.update(status="completed", task_id=result["task_id"])
+            else:
+                entry.update(status="failed", error=result.get("error", "格式化失败"))
+            batch["completed_order"].append(index)
+
+            if len(batch["completed_order"]) == len(batch["files"]):
+                failed = sum(1 for item in batch["files"] if item["status"] == "failed")
+                batch["status"] = "failed" if failed == len(batch["files"]) else "completed"
+                batch["finished_at"] = time.time()
+                batch["processing_log"] = (f"多文件格式对齐完成：成功 {len(batch['files']) - failed} 个，"
+                                           f"失败 {failed} 个，耗时 {batch['finished_at'] - batch['started_at']:.1f} 秒")
+            self._batch_condition.notify_all()
+
+    def iter_batch_results(self, batch_id: str, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        按完成顺序逐个返回批量任务中各文件的结果，全部完成后结束。
+
+        Args:
+            batch_id: 批量任务ID
+            timeout: 等待下一个结果的最长时间（秒），超时后结束迭代
+        """
+        position = 0
+        while True:
+            with self._batch_condition:
+                batch = self.active_tasks.get(batch_id)
+                if batch is None or batch.get("type") != "batch":
+                    return
+                if position >= len(batch["completed_order"]):
+                    if len(batch["completed_order"]) == len(batch["files"]):
+                        return
+                    if not self._batch_condition.wait(timeout) and position >= len(batch["completed_order"]):
+                        return
+                    continue
+                index = batch["completed_order"][position]
+                entry = dict(batch["files"][index])
+                done, total = position + 1, len(batch["files"])
+            position += 1
+            yield {"index": index, "completed": done, "total": total, **entry}
+
+    def _batch_summary(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        with self._batch_lock:
+            files = [dict(entry) for entry in batch["files"]]
+            finished_at = batch["finished_at"]
+            status, log = batch["status"], batch["processing_log"]
+        return {
+            "success": True,
+            "task_id": batch["task_id"],
+            "type": "batch",
+            "status": status,
+            "total": len(files),
+            "completed": sum(1 for entry in files if entry["status"] == "completed"),
+            "failed": sum(1 for entry in files if entry["status"] == "failed"),
+            "elapsed": (finished_at or time.time()) - batch["started_at"],
+            "files": files,
+            "formatted_content": "",
+            "processing_log": log,
+            "instruction": batch.get("instruction", "")
+        }
+
     def start_conversation_task(self, instruction: str, content: str) -> Dict[str, Any]:
         """
         开始多轮对话格式化任务
@@ -553,6 +695,8 @@ class FormatAlignmentCoordinator:
             return {"error": f"任务 {task_id} 不存在"}
 
         task = self.active_tasks[task_id]
+        if task.get("type") == "batch":
+            return self._batch_summary(task)
         return {
             "success": True,
             "task_id": task_id,
@@ -17,6 +17,12 @@ import json
 from typing import Dict, Any, List
 from datetime import datetime
 
+from .structure_patterns import get_pattern_registry
+
+# 公文结构识别模式（预编译，所有实例共享）
+TITLE_KEYWORD_PATTERN = get_pattern_registry().get("gov_title_keyword")
+TAIL_LINE_CLASSIFIER = get_pattern_registry().get("gov_tail_line")
+
 class GovernmentDocumentFormatterTool:
     
     def __init__(self):
@@ -135,7 +141,7 @@ class GovernmentDocumentFormatterTool:
         
         # 识别标题（通常是第一行，包含"关于"、"通知"等关键词）
         first_line = lines[0]
-        if any(keyword in first_line for keyword in ["关于", "通知", "决定", "意见", "公告", "通报", "报告", "请示", "批复", "函"]):
+        if TITLE_KEYWORD_PATTERN.search(first_line):
             structure["has_title"] = True
             structure["title"] = first_line
         
@@ -155,12 +161,12 @@ class GovernmentDocumentFormatterTool:
             
         # 识别署名和日期（通常在最后几行）
         for line in reversed(lines[-5:]):
-            # 日期格式检查
-            if re.search(r'\d{4}年\d{1,2}月\d{1,2}日', line):
+            # 日期优先于署名（包含政府、委员会、办公室等），一次匹配完成分类
+            kind, _, _ = TAIL_LINE_CLASSIFIER.classify(line)
+            if kind == "date":
                 structure["has_date"] = True
                 structure["date"] = line
-            # 署名检查（包含政府、委员会、办公室等）
-            elif any(keyword in line for keyword in ["政府", "委员会", "办公室", "局", "厅", "部"]):
+            elif kind == "signature":
                 structure["has_signature"] = True
                 structure["signature"] = line
         
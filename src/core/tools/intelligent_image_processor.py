@@ -16,7 +16,11 @@ License: MIT
 import os
 import base64
 import hashlib
+import logging
 import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 from PIL import Image, ImageDraw, ImageFont
@@ -24,10 +28,40 @@ import io
 import json
 import svgwrite
 
+logger = logging.getLogger(__name__)
+
+# 图片数量达到该值时批量处理改用进程池
+PARALLEL_BATCH_THRESHOLD = 4
+
+# 已处理图片记录的最大条数（按内容哈希 + 处理参数去重）
+PROCESSED_CACHE_SIZE = 512
+
+# 影响处理结果的目标位置参数
+_PROCESSING_POSITION_KEYS = ("suggested_size", "add_watermark", "format")
+
+# 进程池工作进程内的处理器实例
+_worker_image_processor = None
+
+
+def _init_image_worker(image_config: Dict[str, Any], image_storage_dir: str):
+    """工作进程初始化：按父进程的配置创建处理器"""
+    global _worker_image_processor
+    _worker_image_processor = IntelligentImageProcessor(image_storage_dir=image_storage_dir)
+    _worker_image_processor.image_config = dict(image_config)
+
+
+def _process_image_job(image_bytes: bytes, image_name: str, target_position: Optional[Dict[str, Any]],
+                       content_hash: str) -> Dict[str, Any]:
+    """进程池任务：处理并保存单张已解码的图片"""
+    try:
+        return _worker_image_processor._process_image_bytes(image_bytes, image_name, target_position, content_hash)
+    except Exception as e:
+        return {"error": f"图片处理失败: {str(e)}"}
+
 class IntelligentImageProcessor:
     """智能图片处理器"""
     
-    def __init__(self):
+    def __init__(self, image_storage_dir: str = None, max_workers: int = None):
         self.tool_name = "智能图片处理器"
         self.description = "处理文档中的图片字段，智能识别位置和格式"
         
@@ -53,8 +87,15 @@ class IntelligentImageProcessor:
         }
         
         # 图片存储目录
-        self.image_storage_dir = os.path.join("uploads", "images")
+        self.image_storage_dir = image_storage_dir or os.path.join("uploads", "images")
         os.makedirs(self.image_storage_dir, exist_ok=True)
+
+        # 批量处理的进程数
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+
+        # 已处理图片：(内容哈希 + 处理参数) -> 处理结果，相同图片重复上传时直接复用
+        self._processed_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._processed_cache_lock = threading.Lock()
     
     def process_uploaded_image(self, image_data: Union[str, bytes], 
                              image_name: str = None, 
@@ -75,39 +116,82 @@ class IntelligentImageProcessor:
             image_bytes = self._parse_image_data(image_data)
             if not image_bytes:
                 return {"error": "无效的图片数据"}
-            
-            # 2. 验证图片格式
-            image_info = self._validate_image_format(image_bytes)
-            if "error" in image_info:
-                return image_info
-            
-            # 3. 处理图片
-            processed_image = self._process_image(image_bytes, target_position)
-            if "error" in processed_image:
-                return processed_image
-            
-            # 4. 保存图片
-            save_result = self._save_processed_image(processed_image, image_name)
-            if "error" in save_result:
-                return save_result
-            
-            # 5. 生成图片信息
-            image_info = self._generate_image_info(processed_image, save_result)
-            
-            return {
-                "success": True,
-                "image_id": save_result["image_id"],
-                "file_path": save_result["file_path"],
-                "file_size": save_result["file_size"],
-                "dimensions": image_info["dimensions"],
-                "format": image_info["format"],
-                "thumbnail_path": save_result.get("thumbnail_path"),
-                "position_info": target_position,
-                "processing_time": datetime.now().isoformat()
-            }
+
+            # 相同内容、相同处理参数的图片已处理过时直接复用
+            cache_key = self._processing_key(image_bytes, target_position)
+            cached = self._get_processed(cache_key, target_position)
+            if cached is not None:
+                return cached
+
+            result = self._process_image_bytes(image_bytes, image_name, target_position, cache_key)
+            self._store_processed(cache_key, result)
+            return result
             
         except Exception as e:
             return {"error": f"图片处理失败: {str(e)}"}
+
+    def _process_image_bytes(self, image_bytes: bytes, image_name: str = None,
+                             target_position: Dict[str, Any] = None, content_hash: str = None) -> Dict[str, Any]:
+        """验证、处理并保存已解码的图片（图片只打开一次）"""
+        image = Image.open(io.BytesIO(image_bytes))
+
+        # 2. 验证图片格式
+        image_info = self._validate_image_format(image)
+        if "error" in image_info:
+            return image_info
+
+        # 3. 处理图片
+        processed_image = self._process_image(image, target_position)
+        if "error" in processed_image:
+            return processed_image
+
+        # 4. 保存图片
+        save_result = self._save_processed_image(processed_image, image_name, content_hash)
+        if "error" in save_result:
+            return save_result
+
+        # 5. 生成图片信息
+        image_info = self._generate_image_info(processed_image, save_result)
+
+        return {
+            "success": True,
+            "image_id": save_result["image_id"],
+            "file_path": save_result["file_path"],
+            "file_size": save_result["file_size"],
+            "dimensions": image_info["dimensions"],
+            "format": image_info["format"],
+            "thumbnail_path": save_result.get("thumbnail_path"),
+            "position_info": target_position,
+            "processing_time": datetime.now().isoformat()
+        }
+
+    def _processing_key(self, image_bytes: bytes, target_position: Dict[str, Any] = None) -> str:
+        """图片内容哈希 + 影响处理结果的参数"""
+        params = {key: (target_position or {}).get(key) for key in _PROCESSING_POSITION_KEYS}
+        hasher = hashlib.blake2b(image_bytes, digest_size=16)
+        hasher.update(json.dumps([params, self.image_config], sort_keys=True, default=str).encode())
+        return hasher.hexdigest()
+
+    def _get_processed(self, cache_key: str, target_position: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        with self._processed_cache_lock:
+            cached = self._processed_cache.get(cache_key)
+            if cached is None:
+                return None
+            if not os.path.exists(cached["file_path"]):
+                # 文件已被清理，重新处理
+                del self._processed_cache[cache_key]
+                return None
+            self._processed_cache.move_to_end(cache_key)
+        return dict(cached, position_info=target_position, reused=True)
+
+    def _store_processed(self, cache_key: str, result: Dict[str, Any]):
+        if "error" in result:
+            return
+        with self._processed_cache_lock:
+            self._processed_cache[cache_key] = result
+            self._processed_cache.move_to_end(cache_key)
+            while len(self._processed_cache) > PROCESSED_CACHE_SIZE:
+                self._processed_cache.popitem(last=False)
     
     def _parse_image_data(self, image_data: Union[str, bytes]) -> Optional[bytes]:
         """解析图片数据"""
@@ -128,10 +212,11 @@ class IntelligentImageProcessor:
         except Exception:
             return None
     
-    def _validate_image_format(self, image_bytes: bytes) -> Dict[str, Any]:
+    def _validate_image_format(self, image: Union[bytes, Image.Image]) -> Dict[str, Any]:
         """验证图片格式"""
         try:
-            image = Image.open(io.BytesIO(image_bytes))
+            if isinstance(image, bytes):
+                image = Image.open(io.BytesIO(image))
             
             # 检查格式
             format_name = image.format
@@ -152,10 +237,11 @@ class IntelligentImageProcessor:
         except Exception as e:
             return {"error": f"图片格式验证失败: {str(e)}"}
     
-    def _process_image(self, image_bytes: bytes, target_position: Dict[str, Any] = None) -> Dict[str, Any]:
+    def _process_image(self, image: Union[bytes, Image.Image], target_position: Dict[str, Any] = None) -> Dict[str, Any]:
         """处理图片"""
         try:
-            image = Image.open(io.BytesIO(image_bytes))
+            if isinstance(image, bytes):
+                image = Image.open(io.BytesIO(image))
             
             # 1. 调整尺寸
             processed_image = self._resize_image(image, target_position)
@@ -248,14 +334,15 @@ class IntelligentImageProcessor:
         # 这里只是返回原图，实际转换在保存时进行
         return image
     
-    def _save_processed_image(self, processed_data: Dict[str, Any], image_name: str = None) -> Dict[str, Any]:
+    def _save_processed_image(self, processed_data: Dict[str, Any], image_name: str = None,
+                              content_hash: str = None) -> Dict[str, Any]:
         """保存处理后的图片"""
         try:
             image = processed_data["image"]
             format_name = processed_data["format"]
             
             # 生成图片ID
-            image_id = self._generate_image_id(image, image_name)
+            image_id = self._generate_image_id(image, image_name, content_hash)
             
             # 生成文件名
             if image_name:
@@ -294,10 +381,10 @@ class IntelligentImageProcessor:
         except Exception as e:
             return {"error": f"保存图片失败: {str(e)}"}
     
-    def _generate_image_id(self, image: Image.Image, image_name: str = None) -> str:
+    def _generate_image_id(self, image: Image.Image, image_name: str = None, content_hash: str = None) -> str:
         """生成图片ID"""
-        # 基于图片内容和名称生成唯一ID
-        content_hash = hashlib.md5(image.tobytes()).hexdigest()[:8]
+        # 基于图片内容和名称生成唯一ID（已有原始数据哈希时不再对像素求哈希）
+        content_hash = (content_hash or hashlib.md5(image.tobytes()).hexdigest())[:8]
         name_hash = hashlib.md5((image_name or "").encode()).hexdigest()[:4]
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         
@@ -386,13 +473,17 @@ class IntelligentImageProcessor:
             return f"[图片{image_id}] {image_path}"
     
     def batch_process_images(self, image_list: List[Dict[str, Any]], 
-                           document_content: str) -> Dict[str, Any]:
+                           document_content: str, parallel: bool = True) -> Dict[str, Any]:
         """
         批量处理图片
+
+        每张图片只解码一次；内容与处理参数相同的图片（包括之前批次已处理过的）只处理一次；
+        待处理图片较多时交给进程池并行处理，结果与插入文档的顺序和输入顺序一致。
         
         Args:
             image_list: 图片列表
             document_content: 文档内容
+            parallel: 是否允许使用进程池
             
         Returns:
             批量处理结果
@@ -404,42 +495,90 @@ class IntelligentImageProcessor:
                 "updated_document": document_content,
                 "errors": []
             }
-            
+
+            # 1. 解码并按 (内容哈希 + 处理参数) 去重
+            outcomes: Dict[int, Dict[str, Any]] = {}
+            pending: "OrderedDict[str, Tuple[bytes, str, Optional[Dict[str, Any]]]]" = OrderedDict()
+            keys: Dict[int, str] = {}
             for i, image_data in enumerate(image_list):
                 try:
-                    # 处理单个图片
-                    result = self.process_uploaded_image(
-                        image_data["data"],
-                        image_data.get("name", f"image_{i}"),
-                        image_data.get("position")
-                    )
-                    
-                    if "error" in result:
-                        results["errors"].append({
-                            "index": i,
-                            "error": result["error"]
-                        })
-                    else:
-                        results["processed_images"].append(result)
-                        
-                        # 插入到文档中
-                        if image_data.get("position"):
-                            results["updated_document"] = self.insert_image_to_document(
-                                results["updated_document"],
-                                result,
-                                image_data["position"]
-                            )
-                
+                    image_bytes = self._parse_image_data(image_data["data"])
+                    if not image_bytes:
+                        outcomes[i] = {"error": "无效的图片数据"}
+                        continue
+                    position = image_data.get("position")
+                    cache_key = self._processing_key(image_bytes, position)
+                    keys[i] = cache_key
+                    if cache_key not in pending and self._get_processed(cache_key) is None:
+                        pending[cache_key] = (image_bytes, image_data.get("name", f"image_{i}"), position)
                 except Exception as e:
+                    outcomes[i] = {"error": str(e)}
+
+            # 2. 处理未处理过的图片
+            fresh: Dict[str, Dict[str, Any]] = {}
+            for cache_key, result in self._run_image_jobs(pending, parallel):
+                self._store_processed(cache_key, result)
+                fresh[cache_key] = result
+
+            # 3. 按输入顺序汇总结果并插入文档
+            for i, image_data in enumerate(image_list):
+                result = outcomes.get(i)
+                if result is None and keys[i] in fresh:
+                    result = fresh[keys[i]]
+                    if "error" not in result:
+                        result = dict(result, position_info=image_data.get("position"))
+                if result is None:
+                    result = self._get_processed(keys[i], image_data.get("position")) or {"error": "图片处理失败"}
+
+                if "error" in result:
                     results["errors"].append({
                         "index": i,
-                        "error": str(e)
+                        "error": result["error"]
                     })
+                    continue
+
+                results["processed_images"].append(result)
+
+                # 插入到文档中
+                if image_data.get("position"):
+                    results["updated_document"] = self.insert_image_to_document(
+                        results["updated_document"],
+                        result,
+                        image_data["position"]
+                    )
             
             return results
             
         except Exception as e:
             return {"error": f"批量处理图片失败: {str(e)}"}
+
+    def _run_image_jobs(self, pending: "OrderedDict[str, Tuple[bytes, str, Optional[Dict[str, Any]]]]",
+                        parallel: bool):
+        """处理待处理图片，逐个产出 (cache_key, result)"""
+        if not pending:
+            return
+
+        workers = min(self.max_workers, len(pending))
+        if parallel and workers > 1 and len(pending) >= PARALLEL_BATCH_THRESHOLD:
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_image_worker,
+                                         initargs=(self.image_config, self.image_storage_dir)) as executor:
+                    futures = [(key, executor.submit(_process_image_job, data, name, position, key))
+                               for key, (data, name, position) in pending.items()]
+                    for key, future in futures:
+                        yield key, future.result()
+                return
+            except Exception as e:
+                # 进程池不可用（如受限环境）时串行处理剩余图片
+                logger.warning(f"并行处理图片失败，改为串行: {e}")
+                pending = OrderedDict((key, job) for key, job in pending.items()
+                                      if self._get_processed(key) is None)
+
+        for key, (data, name, position) in pending.items():
+            try:
+                yield key, self._process_image_bytes(data, name, position, key)
+            except Exception as e:
+                yield key, {"error": f"图片处理失败: {str(e)}"}
     
     def get_image_statistics(self) -> Dict[str, Any]:
         """获取图片统计信息"""
@@ -21,6 +21,11 @@ from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+from .structure_patterns import get_pattern_registry
+
+# 图片占位符模式（预编译，所有实例共享）
+IMAGE_PLACEHOLDER_PATTERNS = get_pattern_registry().get("patent_image_placeholder")
+
 class FieldType(Enum):
     """字段类型枚举"""
     TEXT = "text"                    # 普通文本
@@ -342,23 +347,31 @@ class PatentDocumentAnalyzer:
         """识别文档区块"""
         sections = []
         lines = content.split('\n')
+        section_patterns = get_pattern_registry().pattern_set(
+            ((section_type, pattern)
+             for section_type, patterns in self.section_patterns.items()
+             for pattern in patterns),
+            re.IGNORECASE
+        )
         
         for line_num, line in enumerate(lines):
             line = line.strip()
             if not line:
                 continue
             
-            for section_type, patterns in self.section_patterns.items():
-                for pattern in patterns:
-                    if re.search(pattern, line, re.IGNORECASE):
-                        sections.append({
-                            "section_type": section_type.value,
-                            "section_name": line,
-                            "line_number": line_num + 1,
-                            "content_start": line_num + 1,
-                            "content_end": None
-                        })
-                        break
+            # 每种区块类型最多记录一次
+            matched_types = set()
+            for section_type, _ in section_patterns.search(line):
+                if section_type in matched_types:
+                    continue
+                matched_types.add(section_type)
+                sections.append({
+                    "section_type": section_type.value,
+                    "section_name": line,
+                    "line_number": line_num + 1,
+                    "content_start": line_num + 1,
+                    "content_end": None
+                })
         
         # 确定每个区块的内容范围
         for i, section in enumerate(sections):
@@ -373,37 +386,41 @@ class PatentDocumentAnalyzer:
         """识别专利申请书字段"""
         fields = []
         lines = content.split('\n')
+        field_patterns = get_pattern_registry().pattern_set(
+            ((field_key, pattern)
+             for field_key, field_info in self.patent_field_patterns.items()
+             for pattern in field_info["patterns"]),
+            re.IGNORECASE
+        )
         
         for line_num, line in enumerate(lines):
             line = line.strip()
             if not line:
                 continue
             
-            for field_key, field_info in self.patent_field_patterns.items():
-                for pattern in field_info["patterns"]:
-                    matches = re.finditer(pattern, line, re.IGNORECASE)
-                    for match in matches:
-                        field = {
-                            "field_id": field_key,
-                            "field_name": self._extract_field_name(match.group()),
-                            "field_type": field_info["field_type"].value,
-                            "section": field_info["section"].value,
-                            "line_number": line_num + 1,
-                            "line_content": line,
-                            "match_text": match.group(),
-                            "position": match.span(),
-                            "constraints": self._serialize_constraints(field_info["constraints"]),
-                            "ai_fill_prompt": field_info["ai_fill_prompt"],
-                            "related_fields": [],
-                            "image_position": None
-                        }
-                        
-                        # 如果是图片字段，设置图片位置信息
-                        if field_info["field_type"] == FieldType.IMAGE:
-                            field["image_position"] = self._get_image_position_info(line_num, lines)
-                        
-                        fields.append(field)
-                        break
+            # 每个模式只取首个匹配
+            for field_key, match in field_patterns.search(line):
+                field_info = self.patent_field_patterns[field_key]
+                field = {
+                    "field_id": field_key,
+                    "field_name": self._extract_field_name(match.group()),
+                    "field_type": field_info["field_type"].value,
+                    "section": field_info["section"].value,
+                    "line_number": line_num + 1,
+                    "line_content": line,
+                    "match_text": match.group(),
+                    "position": match.span(),
+                    "constraints": self._serialize_constraints(field_info["constraints"]),
+                    "ai_fill_prompt": field_info["ai_fill_prompt"],
+                    "related_fields": [],
+                    "image_position": None
+                }
+                
+                # 如果是图片字段，设置图片位置信息
+                if field_info["field_type"] == FieldType.IMAGE:
+                    field["image_position"] = self._get_image_position_info(line_num, lines)
+                
+                fields.append(field)
         
         return fields
     
@@ -418,25 +435,15 @@ class PatentDocumentAnalyzer:
                 continue
             
             # 识别图片占位符
-            image_patterns = [
-                r"\[图片\d*\]",
-                r"\[附图\d*\]",
-                r"\[示意图\d*\]",
-                r"图\d+",
-                r"附图\d+"
-            ]
-            
-            for pattern in image_patterns:
-                matches = re.finditer(pattern, line, re.IGNORECASE)
-                for match in matches:
-                    image_positions.append({
-                        "position_id": f"img_{len(image_positions) + 1}",
-                        "line_number": line_num + 1,
-                        "placeholder_text": match.group(),
-                        "suggested_size": (400, 300),
-                        "description": self._extract_image_description(line),
-                        "field_relation": self._find_related_field(line_num, lines)
-                    })
+            for _, match in IMAGE_PLACEHOLDER_PATTERNS.finditer(line):
+                image_positions.append({
+                    "position_id": f"img_{len(image_positions) + 1}",
+                    "line_number": line_num + 1,
+                    "placeholder_text": match.group(),
+                    "suggested_size": (400, 300),
+                    "description": self._extract_image_description(line),
+                    "field_relation": self._find_related_field(line_num, lines)
+                })
         
         return image_positions
     
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF Renderer - 核心模块
+
+基于 ReportLab 的 PDF 渲染服务，把导出引擎的 ExportDocument 渲染为 PDF：
+- 中文字体每个进程只注册一次（优先系统中的 TTF / TTC 中文字体，找不到时使用 ReportLab 内置的 STSong-Light）；
+- 每个模板的样式表只构建一次并缓存，渲染时直接复用；
+- 标题、小节标题、表格标签、页脚等重复出现的段落按 (模板, 样式, 文本) 缓存解析结果，渲染时复制使用。
+导出耗时因此主要取决于内容长短，而不是每次重新初始化。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import io
+import os
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+from .export_engine import ExportDocument, get_export_template
+
+logger = logging.getLogger(__name__)
+
+CJK_FONT_NAME = "AiDocCJK"
+# ReportLab 内置的中文 CID 字体，不依赖字体文件
+CJK_CID_FONT = "STSong-Light"
+
+# 按顺序查找的中文字体文件：(路径, TTC 子字体序号)
+CJK_FONT_CANDIDATES: List[Tuple[str, int]] = [
+    ("C:/Windows/Fonts/msyh.ttc", 0),
+    ("C:/Windows/Fonts/simhei.ttf", 0),
+    ("C:/Windows/Fonts/simsun.ttc", 0),
+    ("/System/Library/Fonts/PingFang.ttc", 0),
+    ("/usr/share/fonts/truetype/wqy/wqy-microhei.ttc", 0),
+    ("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 0),
+    ("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", 0),
+    ("/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc", 0),
+]
+
+DEFAULT_FLOWABLE_CACHE_SIZE = 2048
+# 超过该长度的文本不缓存段落（正文很少重复）
+_MAX_REUSABLE_TEXT = 200
+
+_ALIGNMENTS = {"left": 0, "center": 1, "right": 2}
+
+_font_lock = threading.Lock()
+_registered_font: Optional[str] = None
+
+
+def register_cjk_font(font_paths: Optional[List[Tuple[str, int]]] = None) -> str:
+    """
+    注册中文字体并返回字体名。每个进程只注册一次，后续调用直接返回已注册的字体名。
+
+    Args:
+        font_paths: 候选字体文件列表，默认使用 CJK_FONT_CANDIDATES
+    """
+    global _registered_font
+    if _registered_font:
+        return _registered_font
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("PDF 渲染需要 reportlab，请先安装: pip install reportlab")
+
+    with _font_lock:
+        if _registered_font:
+            return _registered_font
+
+        font_name = None
+        for path, subfont_index in font_paths or CJK_FONT_CANDIDATES:
+            if not os.path.exists(path):
+                continue
+            try:
+                pdfmetrics.registerFont(TTFont(CJK_FONT_NAME, path, subfontIndex=subfont_index))
+                font_name = CJK_FONT_NAME
+                logger.info(f"PDF 中文字体已注册: {path}")
+                break
+            except Exception as e:
+                logger.warning(f"注册字体失败 '{path}': {e}")
+
+        if font_name is None:
+            pdfmetrics.registerFont(UnicodeCIDFont(CJK_CID_FONT))
+            font_name = CJK_CID_FONT
+            logger.info(f"未找到中文字体文件，使用内置字体 {CJK_CID_FONT}")
+
+        # 同一字体作为粗体 / 斜体，段落中的 <b> <i> 标记不会因找不到字体而报错
+        pdfmetrics.registerFontFamily(font_name, normal=font_name, bold=font_name,
+                                      italic=font_name, boldItalic=font_name)
+        _registered_font = font_name
+        return font_name
+
+
+class PdfRenderService:
+    """PDF 渲染服务：字体只注册一次，样式表按模板缓存，重复出现的段落复用"""
+
+    def __init__(self, font_paths: Optional[List[Tuple[str, int]]] = None,
+                 flowable_cache_size: int = DEFAULT_FLOWABLE_CACHE_SIZE):
+        """
+        Args:
+            font_paths: 候选中文字体文件列表
+            flowable_cache_size: 可复用段落缓存的条目上限
+        """
+        if not REPORTLAB_AVAILABLE:
+            raise ImportError("PDF 渲染需要 reportlab，请先安装: pip install reportlab")
+        self.font_name = register_cjk_font(font_paths)
+        self.flowable_cache_size = flowable_cache_size
+
+        self._lock = threading.Lock()
+        self._stylesheets: Dict[str, Dict[str, "ParagraphStyle"]] = {}
+        self._flowables: "OrderedDict[Tuple[str, str, str], Paragraph]" = OrderedDict()
+
+    def stylesheet(self, template_name: str) -> Dict[str, "ParagraphStyle"]:
+        """获取模板的样式表（首次使用时构建）。样式只在构建时修改，可以在线程间共享"""
+        styles = self._stylesheets.get(template_name)
+        if styles is None:
+            with self._lock:
+                styles = self._stylesheets.get(template_name)
+                if styles is None:
+                    styles = self._build_stylesheet(template_name)
+                    self._stylesheets[template_name] = styles
+        return styles
+
+    def _build_stylesheet(self, template_name: str) -> Dict[str, "ParagraphStyle"]:
+        template = get_export_template(template_name)
+        sample = getSampleStyleSheet()
+        font = self.font_name
+
+        # 中文没有空格分词，按 CJK 规则逐字断行
+        def style(name: str, parent: str, **kwargs) -> "ParagraphStyle":
+            return ParagraphStyle(f"{template_name}-{name}", parent=sample[parent], fontName=font,
+                                  wordWrap="CJK", **kwargs)
+
+        styles = {
+            "title": style("title", "Heading1", fontSize=template.title_size, leading=template.title_size * 1.2,
+                           spaceAfter=30, alignment=1),
+            "heading1": style("heading1", "Heading2" if template.heading_color else "Heading1",
+                              textColor=colors.HexColor(template.heading_color or "#000000")),
+            "heading2": style("heading2", "Heading3" if template.subheading_color else "Heading2",
+                              textColor=colors.HexColor(template.subheading_color or "#000000")),
+            "heading3": style("heading3", "Heading3"),
+            "list": style("list", "Normal", leftIndent=20, spaceAfter=4),
+            "footer": style("footer", "Normal", fontSize=8, textColor=colors.grey, alignment=1),
+        }
+        for align, value in _ALIGNMENTS.items():
+            styles[f"body-{align}"] = style(f"body-{align}", "Normal", alignment=value)
+            styles[f"subtitle-{align}"] = style(f"subtitle-{align}", "Normal", alignment=value)
+        styles["body"] = styles["body-left"]
+        return styles
+
+    def paragraph(self, text: str, style_name: str, template_name: str, reuse: bool = True) -> "Paragraph":
+        """
+        创建段落。reuse=True 且文本较短时，段落解析结果按 (模板, 样式, 文本) 缓存，
+        返回缓存对象的浅复制：排版状态（wrap / split 结果）写在副本上，不影响缓存对象。
+        """
+        style = self.stylesheet(template_name)[style_name]
+        if not reuse or len(text) > _MAX_REUSABLE_TEXT:
+            return Paragraph(text, style)
+
+        key = (template_name, style_name, text)
+        with self._lock:
+            cached = self._flowables.get(key)
+            if cached is not None:
+                self._flowables.move_to_end(key)
+        if cached is None:
+            cached = Paragraph(text, style)
+            with self._lock:
+                self._flowables[key] = cached
+                while len(self._flowables) > self.flowable_cache_size:
+                    self._flowables.popitem(last=False)
+        return copy.copy(cached)
+
+    def render(self, document: ExportDocument) -> bytes:
+        """把 ExportDocument 渲染为 PDF 字节"""
+        template_name = document.template
+
+        def text(value: str) -> str:
+            return escape(value).replace("\n", "<br/>")
+
+        def para(value: str, style_name: str, reuse: bool = True) -> "Paragraph":
+            return self.paragraph(value, style_name, template_name, reuse)
+
+        story = [para(text(document.title), "title")]
+        if document.subtitle:
+            story += [para(text(document.subtitle), f"subtitle-{document.subtitle_align}", reuse=False),
+                      Spacer(1, 20)]
+
+        counter = 0
+        for block in document.blocks:
+            counter = counter + 1 if block.kind == "numbered" else 0
+            if block.kind == "heading":
+                style_name = f"heading{min(block.level, 3)}"
+                story += [para(text(block.text), style_name), Spacer(1, 6)]
+            elif block.kind == "bullet":
+                story.append(para("• " + text(block.text), "list", reuse=False))
+            elif block.kind == "numbered":
+                story.append(para(f"{counter}. " + text(block.text), "list", reuse=False))
+            elif block.kind == "table":
+                if not block.rows:
+                    continue
+                # 首列通常是固定标签（如“生成时间”），可以复用；其余单元格按内容生成
+                cells = [[para(text(cell), "body", reuse=(j == 0)) for j, cell in enumerate(row)]
+                         for row in block.rows]
+                table = Table(cells, colWidths=[2 * inch, 3 * inch] if all(len(row) == 2 for row in block.rows)
+                              else None)
+                table.setStyle(TableStyle([
+                    ("BACKGROUND", (0, 0), (0, -1), colors.lightgrey),
+                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                    ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
+                ]))
+                story += [table, Spacer(1, 20)]
+            else:
+                body = text(block.text)
+                if block.bold:
+                    body = f"<b>{body}</b>"
+                style_name = f"body-{block.align}" if block.align in _ALIGNMENTS else "body"
+                story += [para(body, style_name, reuse=False), Spacer(1, 6)]
+
+        if document.footer:
+            story += [Spacer(1, 30), para(text(document.footer), "footer")]
+
+        buffer = io.BytesIO()
+        SimpleDocTemplate(buffer, pagesize=A4).build(story)
+        return buffer.getvalue()
+
+
+# 全局 PDF 渲染服务实例
+_global_pdf_renderer = None
+_global_pdf_renderer_lock = threading.Lock()
+
+
+def get_pdf_renderer() -> PdfRenderService:
+    """获取全局 PDF 渲染服务实例"""
+    global _global_pdf_renderer
+    if _global_pdf_renderer is None:
+        with _global_pdf_renderer_lock:
+            if _global_pdf_renderer is None:
+                _global_pdf_renderer = PdfRenderService()
+    return _global_pdf_renderer
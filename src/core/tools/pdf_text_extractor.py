@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF Text Extractor - 核心模块
+
+按页流式提取 PDF 文本：
+- 优先使用 pypdfium2（PDFium，速度明显快于纯 Python 实现），不可用或解析失败时回退到 PyPDF2；
+- iter_pages 逐页惰性产出文本，调用方处理完一页即可释放，不必持有整篇文档；
+- 支持只提取指定页码范围；
+- extract_pages 可按页段分给进程池并行提取（PDFium 不是线程安全的，每个进程各自打开文档）；
+- 进程内的所有 PDFium 调用都经过模块级锁串行执行，多个请求线程同时提取时不会并发进入 PDFium。
+  锁按页获取，逐页产出之间不持有锁，多个文档可以交替提取。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.1
+License: MIT
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Iterator, NamedTuple, Tuple
+
+try:
+    import pypdfium2 as pdfium
+    PYPDFIUM2_AVAILABLE = True
+except ImportError:
+    PYPDFIUM2_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 并行提取时每个任务包含的页数
+_PARALLEL_CHUNK_PAGES = 16
+
+# PDFium 不是线程安全的：进程内所有 pypdfium2 调用都在此锁内进行。
+# 使用可重入锁，未迭代完的生成器在持锁线程中被回收、执行关闭文档时不会自锁
+_PDFIUM_LOCK = threading.RLock()
+
+
+class PdfPage(NamedTuple):
+    """单页文本，index 从 0 开始"""
+    index: int
+    text: str
+
+
+def _page_bounds(page_count: int, start: int = 0, end: Optional[int] = None) -> Tuple[int, int]:
+    """规范化页码范围 [start, end)，越界时截断"""
+    start = max(0, start)
+    end = page_count if end is None else min(end, page_count)
+    return start, max(start, end)
+
+
+def _iter_pdfium(file_path: str, start: int, end: Optional[int]) -> Iterator[PdfPage]:
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            page_count = len(pdf)
+        except BaseException:
+            pdf.close()
+            raise
+    try:
+        first, last = _page_bounds(page_count, start, end)
+        for index in range(first, last):
+            # 每页单独持锁，产出文本时已释放
+            with _PDFIUM_LOCK:
+                page = pdf[index]
+                try:
+                    textpage = page.get_textpage()
+                    try:
+                        text = textpage.get_text_bounded()
+                    finally:
+                        textpage.close()
+                finally:
+                    page.close()
+            yield PdfPage(index, text.replace("\r\n", "\n"))
+    finally:
+        with _PDFIUM_LOCK:
+            pdf.close()
+
+
+def _iter_pypdf2(file_path: str, start: int, end: Optional[int]) -> Iterator[PdfPage]:
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        first, last = _page_bounds(len(reader.pages), start, end)
+        for index in range(first, last):
+            yield PdfPage(index, reader.pages[index].extract_text() or "")
+
+
+def _extract_page_range(file_path: str, start: int, end: int, backend: str) -> List[str]:
+    """进程池任务：提取一段页面的文本"""
+    return [page.text for page in PdfTextExtractor(backend).iter_pages(file_path, start, end)]
+
+
+class PdfTextExtractor:
+    """PDF 文本提取引擎：pypdfium2 优先，PyPDF2 兜底"""
+
+    def __init__(self, backend: str = "auto", max_workers: Optional[int] = None):
+        """
+        Args:
+            backend: "auto"（pypdfium2 优先）、"pdfium" 或 "pypdf2"
+            max_workers: 并行提取的进程数
+        """
+        if backend not in ("auto", "pdfium", "pypdf2"):
+            raise ValueError(f"Unsupported PDF backend: {backend}")
+        self.backend = backend
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+
+    def _backends(self) -> List[str]:
+        if self.backend == "pdfium":
+            return ["pdfium"]
+        if self.backend == "pypdf2":
+            return ["pypdf2"]
+        return [name for name, available in (("pdfium", PYPDFIUM2_AVAILABLE), ("pypdf2", PYPDF2_AVAILABLE))
+                if available]
+
+    def page_count(self, file_path: str) -> int:
+        """PDF 页数"""
+        errors = []
+        for backend in self._backends():
+            try:
+                if backend == "pdfium":
+                    with _PDFIUM_LOCK:
+                        pdf = pdfium.PdfDocument(file_path)
+                        try:
+                            return len(pdf)
+                        finally:
+                            pdf.close()
+                with open(file_path, 'rb') as file:
+                    return len(PyPDF2.PdfReader(file).pages)
+            except Exception as e:
+                errors.append(f"{backend}: {e}")
+        raise RuntimeError(self._failure_message(file_path, errors))
+
+    def iter_pages(self, file_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[PdfPage]:
+        """
+        逐页惰性提取 [start, end) 范围内的文本。
+        首选后端在产出第一页之前失败时自动换用下一个后端。
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(file_path)
+
+        errors = []
+        for backend in self._backends():
+            pages = _iter_pdfium(file_path, start, end) if backend == "pdfium" else _iter_pypdf2(file_path, start, end)
+            try:
+                first = next(pages, None)
+            except Exception as e:
+                errors.append(f"{backend}: {e}")
+                logger.warning(f"PDF 后端 {backend} 解析失败，尝试下一个后端: {e}")
+                continue
+            if first is not None:
+                yield first
+                yield from pages
+            return
+        raise RuntimeError(self._failure_message(file_path, errors))
+
+    def extract_pages(self, file_path: str, start: int = 0, end: Optional[int] = None,
+                      parallel: bool = False) -> List[str]:
+        """提取 [start, end) 范围内各页文本（按页序）。parallel=True 时按页段分给进程池"""
+        if not parallel or self.max_workers <= 1:
+            return [page.text for page in self.iter_pages(file_path, start, end)]
+
+        first, last = _page_bounds(self.page_count(file_path), start, end)
+        if last - first <= _PARALLEL_CHUNK_PAGES:
+            return [page.text for page in self.iter_pages(file_path, first, last)]
+
+        backend = self._backends()[0] if self.backend == "auto" else self.backend
+        chunks = [(s, min(s + _PARALLEL_CHUNK_PAGES, last)) for s in range(first, last, _PARALLEL_CHUNK_PAGES)]
+        texts: List[str] = []
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            futures = [executor.submit(_extract_page_range, file_path, s, e, backend) for s, e in chunks]
+            for future in futures:
+                texts.extend(future.result())
+        return texts
+
+    def extract_text(self, file_path: str, start: int = 0, end: Optional[int] = None,
+                     parallel: bool = False) -> str:
+        """提取 [start, end) 范围内的全部文本，页与页之间以换行分隔"""
+        return "\n".join(self.extract_pages(file_path, start, end, parallel))
+
+    def _failure_message(self, file_path: str, errors: List[str]) -> str:
+        if not errors:
+            return "No PDF backend available: install pypdfium2 or PyPDF2"
+        return f"Failed to read PDF {file_path}: " + "; ".join(errors)
+
+
+# 全局 PDF 文本提取器实例
+_global_pdf_text_extractor = None
+
+
+def get_pdf_text_extractor() -> PdfTextExtractor:
+    """获取全局 PDF 文本提取器实例"""
+    global _global_pdf_text_extractor
+    if _global_pdf_text_extractor is None:
+        _global_pdf_text_extractor = PdfTextExtractor()
+    return _global_pdf_text_extractor
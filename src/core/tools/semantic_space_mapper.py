@@ -16,14 +16,15 @@ License: MIT
 import numpy as np
 import json
 import os
+import importlib.util
 from typing import Dict, Any, List, Tuple, Optional, Union
 from datetime import datetime
 
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
+from ..model_registry import get_model_registry
+
+# 只检测是否安装，sentence_transformers（及 torch）在首次编码时才导入
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+if not SENTENCE_TRANSFORMERS_AVAILABLE:
     print("Warning: sentence-transformers not available. Install with: pip install sentence-transformers")
 
 try:
@@ -35,6 +36,37 @@ except ImportError:
     print("Warning: scikit-learn not available for advanced vector operations")
 
 
+def _load_sentence_model(model_name: str):
+    """加载Sentence-BERT模型，主模型失败时尝试备用模型，都失败时返回 None（使用模拟向量）"""
+    try:
+        from sentence_transformers import SentenceTransformer
+        print(f"🔄 正在加载Sentence-BERT模型: {model_name}")
+
+        # 未显式配置时使用镜像源
+        os.environ.setdefault('HF_ENDPOINT', 'https://hf-mirror.com')
+
+        try:
+            model = SentenceTransformer(model_name)
+            print("✅ Sentence-BERT模型加载成功")
+            return model
+        except Exception as e1:
+            print(f"⚠️ 主模型加载失败，尝试备用模型: {str(e1)}")
+            try:
+                # 尝试使用更简单的模型
+                backup_model = "all-MiniLM-L6-v2"
+                model = SentenceTransformer(backup_model)
+                print(f"✅ 备用模型加载成功: {backup_model}")
+                return model
+            except Exception as e2:
+                print(f"❌ 备用模型也加载失败: {str(e2)}")
+                print("💡 使用模拟向量模式")
+                return None
+
+    except Exception as e:
+        print(f"❌ Sentence-BERT初始化失败: {str(e)}")
+        return None
+
+
 class SemanticSpaceMapper:
     """语义空间映射器 - 将语义单元转化为向量表示"""
     
@@ -51,51 +83,32 @@ class SemanticSpaceMapper:
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
         
-        # 初始化Sentence-BERT模型
+        # Sentence-BERT模型登记到模型注册表，首次编码时才加载，同名模型在进程内共享
+        self._model_key = None
         if SENTENCE_TRANSFORMERS_AVAILABLE:
-            try:
-                print(f"🔄 正在加载Sentence-BERT模型: {model_name}")
-
-                # 尝试使用镜像源
-                os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
-
-                # 尝试加载模型，如果失败则使用备用方案
-                try:
-                    self.sentence_model = SentenceTransformer(model_name)
-                    self.model_available = True
-                    print("✅ Sentence-BERT模型加载成功")
-                except Exception as e1:
-                    print(f"⚠️ 主模型加载失败，尝试备用模型: {str(e1)}")
-                    try:
-                        # 尝试使用更简单的模型
-                        backup_model = "all-MiniLM-L6-v2"
-                        self.sentence_model = SentenceTransformer(backup_model)
-                        self.model_available = True
-                        print(f"✅ 备用模型加载成功: {backup_model}")
-                    except Exception as e2:
-                        print(f"❌ 备用模型也加载失败: {str(e2)}")
-                        print("💡 使用模拟向量模式")
-                        self.sentence_model = None
-                        self.model_available = False
-                        self.use_mock_vectors = True
-
-            except Exception as e:
-                print(f"❌ Sentence-BERT初始化失败: {str(e)}")
-                self.sentence_model = None
-                self.model_available = False
-                self.use_mock_vectors = True
-        else:
-            self.sentence_model = None
-            self.model_available = False
-            self.use_mock_vectors = True
+            self._model_key = get_model_registry().register(
+                f"sentence_transformer:{model_name}",
+                lambda: _load_sentence_model(model_name))
         
         # 向量缓存
         self.vector_cache = {}
         self.load_vector_cache()
 
-        # 模拟向量模式标志
-        if not hasattr(self, 'use_mock_vectors'):
-            self.use_mock_vectors = False
+    @property
+    def sentence_model(self):
+        """Sentence-BERT模型实例（懒加载），不可用时为 None"""
+        if self._model_key is None:
+            return None
+        return get_model_registry().get(self._model_key)
+
+    @property
+    def model_available(self) -> bool:
+        return self.sentence_model is not None
+
+    @property
+    def use_mock_vectors(self) -> bool:
+        """模型不可用时使用模拟向量"""
+        return not self.model_available
     
     def load_vector_cache(self):
         """加载向量缓存"""
@@ -18,18 +18,23 @@ import re
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 
+from .batch_executor import BatchExecutor, DEFAULT_LLM_CONCURRENCY
+
 
 class SemanticUnitIdentifier:
     """语义单元识别器 - 讯飞大模型作为语义分析助手"""
     
-    def __init__(self, llm_client=None):
+    def __init__(self, llm_client=None, llm_concurrency: int = DEFAULT_LLM_CONCURRENCY):
         """
         初始化语义单元识别器
         
         Args:
             llm_client: 讯飞大模型客户端
+            llm_concurrency: 批量识别时同时进行的LLM请求数上限
         """
-        self.llm_client = llm_client
+        # 解析与摘要计算量很小，CPU 槽位数与 LLM 并发数一致，批量识别的吞吐由 LLM 并发数决定
+        self.batch_executor = BatchExecutor(llm_concurrency, cpu_workers=llm_concurrency)
+        self.llm_client = self.batch_executor.wrap_llm_client(llm_client)
         self.identification_templates = self._init_prompt_templates()
     
     def _init_prompt_templates(self) -> Dict[str, str]:
@@ -373,7 +378,7 @@ class SemanticUnitIdentifier:
         return summary
     
     def batch_identify_semantic_units(self, texts: List[str], analysis_type: str = "comprehensive") -> Dict[str, Any]:
-        """批量识别语义单元"""
+        """批量识别语义单元（并发调用大模型，结果按输入顺序返回）"""
         batch_result = {
             "batch_time": datetime.now().isoformat(),
             "total_texts": len(texts),
@@ -383,29 +388,26 @@ class SemanticUnitIdentifier:
             "results": [],
             "batch_summary": {}
         }
-        
-        for i, text in enumerate(texts):
-            print(f"处理文本 {i+1}/{len(texts)}")
-            
-            try:
-                result = self.identify_semantic_units(text, analysis_type)
-                result["batch_index"] = i
-                
-                if result.get("success"):
-                    batch_result["successful_analyses"] += 1
-                else:
-                    batch_result["failed_analyses"] += 1
-                
-                batch_result["results"].append(result)
-                
-            except Exception as e:
+
+        def on_progress(done, total, index):
+            print(f"处理文本 {done}/{total}")
+
+        def on_error(index, text, error):
+            return {
+                "success": False,
+                "error": str(error),
+                "text_preview": text[:100]
+            }
+
+        results = self.batch_executor.map(lambda text: self.identify_semantic_units(text, analysis_type),
+                                          texts, on_progress, on_error)
+        for i, result in enumerate(results):
+            result["batch_index"] = i
+            if result.get("success"):
+                batch_result["successful_analyses"] += 1
+            else:
                 batch_result["failed_analyses"] += 1
-                batch_result["results"].append({
-                    "batch_index": i,
-                    "success": False,
-                    "error": str(e),
-                    "text_preview": text[:100]
-                })
+            batch_result["results"].append(result)
         
         # 生成批量摘要
         batch_result["batch_summary"] = self._generate_batch_summary(batch_result)
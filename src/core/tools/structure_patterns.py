@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structure Patterns - 核心模块
+
+结构检测正则注册表。各结构检测器（格式提取、文档解析、复杂文档填充、专利分析、
+公文格式化）共享同一组预编译的组合模式：
+
+- LineClassifier: 多个备选分支合并为一个正则，每个分支对应一个命名组，
+  一次 match 即可通过 lastgroup 得到行类型；
+- PatternSet: 保持逐模式（可重叠）匹配语义的有序模式集合，先用合并后的
+  预筛选正则判断整行是否可能命中，未命中的行只需一次正则匹配。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Any, List, Tuple, Optional, Iterator, Iterable, Pattern, Match, Union, TextIO
+
+
+class LineClassifier:
+    """组合行分类器：备选分支按顺序尝试，首个命中的分支即为分类结果"""
+
+    def __init__(self, alternatives: List[Tuple[str, str, Any]], flags: int = 0):
+        """
+        初始化行分类器
+
+        Args:
+            alternatives: (分支名, 正则, 元数据) 列表，分支名需为合法标识符；
+                正则内部的命名组需带分支名前缀以保证全局唯一
+            flags: 正则标志
+        """
+        self.names = [name for name, _, _ in alternatives]
+        self.meta = {name: meta for name, _, meta in alternatives}
+        self.regex = re.compile(
+            '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in alternatives),
+            flags
+        )
+
+    def match(self, text: str) -> Optional[Match]:
+        """在行首匹配，返回原始 Match 对象"""
+        return self.regex.match(text)
+
+    def classify(self, text: str) -> Tuple[Optional[str], Any, Optional[Match]]:
+        """
+        对一行文本分类
+
+        Returns:
+            (分支名, 元数据, Match)；未命中时为 (None, None, None)
+        """
+        match = self.regex.match(text)
+        if not match:
+            return None, None, None
+        kind = self.kind_of(match)
+        return kind, self.meta.get(kind), match
+
+    def kind_of(self, match: Optional[Match]) -> Optional[str]:
+        """由 Match 得到命中的分支名"""
+        if match is None:
+            return None
+        kind = match.lastgroup
+        if kind in self.meta:
+            return kind
+        # 分支内部包含命名组时 lastgroup 可能指向内部组，按顺序查找外层分支
+        for name in self.names:
+            if match.group(name) is not None:
+                return name
+        return None
+
+
+class PatternSet:
+    """有序模式集合：合并预筛选 + 逐模式匹配，结果与逐个调用 re.finditer/re.search 一致"""
+
+    def __init__(self, entries: Iterable[Tuple[Any, str]], flags: int = 0):
+        """
+        初始化模式集合
+
+        Args:
+            entries: (键, 正则) 列表，顺序即输出顺序
+            flags: 正则标志
+        """
+        entries = list(entries)
+        self.entries: List[Tuple[Any, Pattern]] = [(key, re.compile(pattern, flags)) for key, pattern in entries]
+        self.prefilter = re.compile('|'.join(f'(?:{pattern})' for _, pattern in entries), flags) if entries else None
+
+    def any(self, text: str) -> bool:
+        """整行是否可能命中任一模式"""
+        return self.prefilter is not None and self.prefilter.search(text) is not None
+
+    def finditer(self, text: str) -> Iterator[Tuple[Any, Match]]:
+        """按模式顺序返回所有匹配（不同模式间可重叠）"""
+        if not self.any(text):
+            return
+        for key, regex in self.entries:
+            for match in regex.finditer(text):
+                yield key, match
+
+    def match_any(self, text: str) -> bool:
+        """是否有任一模式在行首匹配（等价于 any(re.match(p, text) for p in patterns)）"""
+        return self.prefilter is not None and self.prefilter.match(text) is not None
+
+    def search(self, text: str) -> Iterator[Tuple[Any, Match]]:
+        """按模式顺序返回每个模式的首个匹配"""
+        if not self.any(text):
+            return
+        for key, regex in self.entries:
+            match = regex.search(text)
+            if match:
+                yield key, match
+
+
+class PatternRegistry:
+    """结构检测正则注册表"""
+
+    def __init__(self):
+        self._patterns: Dict[str, Any] = {}
+        self._cache: Dict[Tuple, Any] = {}
+        self._lock = threading.RLock()
+
+    def register_classifier(self, name: str, alternatives: List[Tuple[str, str, Any]],
+                            flags: int = 0) -> LineClassifier:
+        """注册组合行分类器"""
+        classifier = LineClassifier(alternatives, flags)
+        with self._lock:
+            self._patterns[name] = classifier
+        return classifier
+
+    def register_set(self, name: str, entries: Iterable[Tuple[Any, str]], flags: int = 0) -> PatternSet:
+        """注册有序模式集合"""
+        pattern_set = PatternSet(entries, flags)
+        with self._lock:
+            self._patterns[name] = pattern_set
+        return pattern_set
+
+    def register_pattern(self, name: str, pattern: str, flags: int = 0) -> Pattern:
+        """注册单个预编译正则"""
+        regex = re.compile(pattern, flags)
+        with self._lock:
+            self._patterns[name] = regex
+        return regex
+
+    def register_keywords(self, name: str, keywords: Iterable[str], flags: int = 0) -> Pattern:
+        """注册关键词集合，编译为单个 search 用正则"""
+        regex = compile_keywords(keywords, flags)
+        with self._lock:
+            self._patterns[name] = regex
+        return regex
+
+    def get(self, name: str):
+        """获取已注册的模式"""
+        with self._lock:
+            if name not in self._patterns:
+                raise KeyError(f"Pattern not registered: {name}")
+            return self._patterns[name]
+
+    def pattern_set(self, entries: Iterable[Tuple[Any, str]], flags: int = 0) -> PatternSet:
+        """
+        获取（并缓存）实例级配置的模式集合，相同模式只编译一次
+
+        Args:
+            entries: (键, 正则) 列表，键需可哈希
+            flags: 正则标志
+        """
+        entries = tuple(entries)
+        cache_key = (entries, flags)
+        with self._lock:
+            pattern_set = self._cache.get(cache_key)
+            if pattern_set is None:
+                pattern_set = PatternSet(entries, flags)
+                self._cache[cache_key] = pattern_set
+            return pattern_set
+
+    def keyword_pattern(self, keywords: Iterable[str], flags: int = 0) -> Pattern:
+        """获取（并缓存）实例级配置的关键词正则"""
+        keywords = tuple(keywords)
+        cache_key = ('keywords', keywords, flags)
+        with self._lock:
+            regex = self._cache.get(cache_key)
+            if regex is None:
+                regex = compile_keywords(keywords, flags)
+                self._cache[cache_key] = regex
+            return regex
+
+    def list_patterns(self) -> List[str]:
+        """列出已注册的模式名称"""
+        with self._lock:
+            return sorted(self._patterns.keys())
+
+
+def compile_keywords(keywords: Iterable[str], flags: int = 0) -> Pattern:
+    """把关键词列表编译为一个交替正则（长词优先）"""
+    words = sorted(set(keywords), key=len, reverse=True)
+    return re.compile('|'.join(re.escape(word) for word in words), flags)
+
+
+def iter_text_lines(source: Union[str, os.PathLike, TextIO, Iterable[str]],
+                    encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    逐行读取文本（去掉行尾换行符），供流式结构分析使用，不会把整篇文本读入内存
+
+    Args:
+        source: 文件路径、已打开的文本文件句柄，或任意字符串行迭代器；
+            整段文本请先用 io.StringIO 包装
+        encoding: 按路径打开文件时使用的编码
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding=encoding) as f:
+            for line in f:
+                yield line.rstrip('\n')
+        return
+
+    for line in source:
+        yield line.rstrip('\n')
+
+
+# 全局注册表实例
+_global_pattern_registry = PatternRegistry()
+
+
+def get_pattern_registry() -> PatternRegistry:
+    """获取全局结构检测正则注册表"""
+    return _global_pattern_registry
+
+
+# ---------------------------------------------------------------------------
+# 内置模式
+# ---------------------------------------------------------------------------
+
+# DocumentFormatExtractor 行分类：标题分支按置信度降序排列（同置信度保持原顺序），
+# 组合后首个命中的分支即为原先逐个比较得到的最高置信度结果；其后依次为列表和日期。
+_FORMAT_HEADING_ALTERNATIVES = [
+    ('h_cn_num', r'^[一二三四五六七八九十百千万]+[、．.，,]', (1, 0.9)),
+    ('h_chapter', r'^第[一二三四五六七八九十百千万]+[章节部分条款项][、．.，,]?', (1, 0.95)),
+    ('h_num', r'^[1-9]\d*[、．.，,]', (1, 0.9)),
+    ('h_num2', r'^[1-9]\d*\.[1-9]\d*[、．.，,]?', (2, 0.85)),
+    ('h_num3', r'^[1-9]\d*\.[1-9]\d*\.[1-9]\d*[、．.，,]?', (3, 0.8)),
+    ('h_num4', r'^[1-9]\d*\.[1-9]\d*\.[1-9]\d*\.[1-9]\d*[、．.，,]?', (4, 0.75)),
+    ('h_cn_paren', r'^（[一二三四五六七八九十]+）', (2, 0.85)),
+    ('h_paren', r'^\([1-9]\d*\)', (2, 0.85)),
+    ('h_lenticular', r'^【[^】]+】', (2, 0.8)),
+    ('h_bracket', r'^\[[^\]]+\]', (2, 0.75)),
+    ('h_upper', r'^[A-Z][、．.，,]', (2, 0.7)),
+    ('h_lower', r'^[a-z][、．.，,]', (3, 0.65)),
+    ('h_attachment', r'^附件[1-9]\d*[：:]', (1, 0.9)),
+    ('h_appendix', r'^附录[A-Z]?[：:]', (1, 0.9)),
+]
+
+_FORMAT_LIST_ALTERNATIVES = [
+    ('l_symbol', r'^[•·▪▫◦‣⁃⁌⁍]', ("bullet", 0.9)),
+    ('l_dash', r'^[-*+](?=\s)', ("bullet", 0.85)),
+    ('l_num', r'^[1-9]\d*[)）](?=\s)', ("numbered", 0.9)),
+    ('l_lower', r'^[a-z][)）](?=\s)', ("lettered", 0.8)),
+    ('l_upper', r'^[A-Z][)）](?=\s)', ("lettered", 0.8)),
+    ('l_roman', r'^[ivxlcdm]+[)）](?=\s)', ("roman", 0.75)),
+]
+
+get_pattern_registry().register_classifier(
+    "format_line",
+    [(name, pattern, ("heading",) + meta)
+     for name, pattern, meta in sorted(_FORMAT_HEADING_ALTERNATIVES, key=lambda alt: -alt[2][1])]
+    + [(name, pattern, ("list",) + meta) for name, pattern, meta in _FORMAT_LIST_ALTERNATIVES]
+    + [('date', r'^\d{4}[年-]\d{1,2}[月-]\d{1,2}[日]?', ("date", 0.9))]
+)
+
+# EnhancedDocumentParserTool 行分类（输入为已 strip 的行）。
+# 长度限制以前瞻断言表达，使组合正则与原先逐个判断的回退顺序一致；
+# 全大写标题无法用正则表达，由调用方在 colon 分支之前单独判断。
+_PARSER_HEADING_ALTERNATIVES = [
+    ('markdown', r'^(?P<markdown_hashes>#{1,6})\s+(?P<markdown_text>.+)$', ("heading", "markdown")),
+    ('numbered', r'^(?=.{0,99}\Z)(?P<numbered_prefix>\d+\.?\s+)(?P<numbered_text>.+)$', ("heading", "numbered")),
+    ('colon', r'^(?=.{0,79}\Z)(?P<colon_text>.+)[:：]\s*$', ("heading", "colon")),
+]
+
+_PARSER_LIST_ALTERNATIVES = [
+    ('bullet', r'^\s*[-*+]\s+(?P<bullet_content>.+)$', ("list", "bullet")),
+    ('ordered', r'^\s*(?P<ordered_number>\d+)[.)]\s+(?P<ordered_content>.+)$', ("list", "numbered")),
+    ('lettered', r'^\s*(?P<lettered_letter>[a-zA-Z])[.)]\s+(?P<lettered_content>.+)$', ("list", "lettered")),
+]
+
+get_pattern_registry().register_classifier("parser_line", _PARSER_HEADING_ALTERNATIVES + _PARSER_LIST_ALTERNATIVES)
+get_pattern_registry().register_classifier("parser_list", _PARSER_LIST_ALTERNATIVES)
+get_pattern_registry().register_pattern("parser_column_gap", r'\s{3,}')
+
+# PatentDocumentAnalyzer 图片占位符
+get_pattern_registry().register_set("patent_image_placeholder", [
+    ("image", r"\[图片\d*\]"),
+    ("drawing", r"\[附图\d*\]"),
+    ("diagram", r"\[示意图\d*\]"),
+    ("figure", r"图\d+"),
+    ("drawing_ref", r"附图\d+"),
+], re.IGNORECASE)
+
+# GovernmentDocumentFormatterTool 结构识别
+get_pattern_registry().register_keywords(
+    "gov_title_keyword",
+    ["关于", "通知", "决定", "意见", "公告", "通报", "报告", "请示", "批复", "函"]
+)
+# 署名/日期行：日期优先于署名关键词（与原先 if/elif 顺序一致），用前瞻使其成为一次 match
+get_pattern_registry().register_classifier("gov_tail_line", [
+    ('date', r'(?=.*?\d{4}年\d{1,2}月\d{1,2}日)', "date"),
+    ('signature', r'(?=.*?(?:政府|委员会|办公室|局|厅|部))', "signature"),
+])
@@ -23,6 +23,8 @@ from io import BytesIO
 
 # 导入核心模块
 from .style_transfer import StyleTransferEngine
+from .export_engine import ExportDocument, get_export_engine, parse_markdown
+from .artifact_store import get_artifact_store
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
@@ -418,12 +420,8 @@ class StyleAlignmentCoordinator:
             filename = f"style_result_{timestamp}.{format_type}"
 
             # 根据格式类型处理导出
-            if format_type.lower() == 'txt':
-                return self._export_txt(content, filename)
-            elif format_type.lower() == 'docx':
-                return self._export_docx(content, filename)
-            elif format_type.lower() == 'pdf':
-                return self._export_pdf(content, filename)
+            if format_type.lower() in ('txt', 'docx', 'pdf'):
+                return self._export_file(content, filename, format_type.lower())
             else:
                 return {
                     'success': False,
@@ -470,138 +468,35 @@ class StyleAlignmentCoordinator:
 
                 logger.info(f"📊 任务进度更新 {task_id}: {progress}% - {message}")
 
-    def _export_txt(self, content: str, filename: str) -> Dict[str, Any]:
-        """导出TXT格式"""
+    def _export_file(self, content: str, filename: str, format_type: str) -> Dict[str, Any]:
+        """通过导出引擎生成文件（同一内容重复导出时直接复用缓存），再放入生成文件存储供下载"""
         try:
-            # 确保上传目录存在
-            upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'uploads')
-            os.makedirs(upload_dir, exist_ok=True)
+            artifact = get_export_engine().export(
+                content, format_type, template='style_result',
+                build=lambda: ExportDocument(title='文风统一处理结果',
+                                             blocks=parse_markdown(content, join_lines=True),
+                                             template='style_result'),
+                fallback=False)
 
-            file_path = os.path.join(upload_dir, filename)
-
-            # 写入文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            stored = get_artifact_store().put_file(artifact.path, filename)
 
             return {
                 'success': True,
                 'filename': filename,
-                'file_path': file_path,
+                'file_path': stored.path,
                 'download_url': f'/uploads/{filename}',
-                'format': 'txt'
+                'format': format_type
             }
-        except Exception as e:
+        except ImportError:
+            library = {'docx': 'python-docx', 'pdf': 'reportlab'}.get(format_type, format_type)
             return {
                 'success': False,
-                'error': f'TXT导出失败: {str(e)}'
-            }
-
-    def _export_docx(self, content: str, filename: str) -> Dict[str, Any]:
-        """导出DOCX格式"""
-        try:
-            # 尝试导入python-docx
-            try:
-                from docx import Document
-                from docx.shared import Inches
-            except ImportError:
-                return {
-                    'success': False,
-                    'error': 'python-docx库未安装，无法导出DOCX格式'
-                }
-
-            # 创建文档
-            doc = Document()
-
-            # 添加标题
-            doc.add_heading('文风统一处理结果', 0)
-
-            # 添加内容
-            paragraphs = content.split('\n\n')
-            for paragraph in paragraphs:
-                if paragraph.strip():
-                    doc.add_paragraph(paragraph.strip())
-
-            # 确保上传目录存在
-            upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'uploads')
-            os.makedirs(upload_dir, exist_ok=True)
-
-            file_path = os.path.join(upload_dir, filename)
-
-            # 保存文档
-            doc.save(file_path)
-
-            return {
-                'success': True,
-                'filename': filename,
-                'file_path': file_path,
-                'download_url': f'/uploads/{filename}',
-                'format': 'docx'
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f'DOCX导出失败: {str(e)}'
-            }
-
-    def _export_pdf(self, content: str, filename: str) -> Dict[str, Any]:
-        """导出PDF格式"""
-        try:
-            # 尝试导入reportlab
-            try:
-                from reportlab.lib.pagesizes import letter, A4
-                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.lib.units import inch
-                from reportlab.pdfbase import pdfmetrics
-                from reportlab.pdfbase.ttfonts import TTFont
-            except ImportError:
-                return {
-                    'success': False,
-                    'error': 'reportlab库未安装，无法导出PDF格式'
-                }
-
-            # 确保上传目录存在
-            upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'uploads')
-            os.makedirs(upload_dir, exist_ok=True)
-
-            file_path = os.path.join(upload_dir, filename)
-
-            # 创建PDF文档
-            doc = SimpleDocTemplate(file_path, pagesize=A4)
-            story = []
-
-            # 获取样式
-            styles = getSampleStyleSheet()
-            title_style = styles['Title']
-            normal_style = styles['Normal']
-
-            # 添加标题
-            title = Paragraph("文风统一处理结果", title_style)
-            story.append(title)
-            story.append(Spacer(1, 12))
-
-            # 添加内容
-            paragraphs = content.split('\n\n')
-            for paragraph in paragraphs:
-                if paragraph.strip():
-                    p = Paragraph(paragraph.strip(), normal_style)
-                    story.append(p)
-                    story.append(Spacer(1, 12))
-
-            # 构建PDF
-            doc.build(story)
-
-            return {
-                'success': True,
-                'filename': filename,
-                'file_path': file_path,
-                'download_url': f'/uploads/{filename}',
-                'format': 'pdf'
+                'error': f'{library}库未安装，无法导出{format_type.upper()}格式'
             }
         except Exception as e:
             return {
                 'success': False,
-                'error': f'PDF导出失败: {str(e)}'
+                'error': f'{format_type.upper()}导出失败: {str(e)}'
             }
 
     def _split_document_to_examples(self, document: str, max_examples: int = 3) -> List[str]:
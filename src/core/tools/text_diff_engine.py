@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Text Diff Engine - 核心模块
+
+分层文本差异引擎：先按段落对齐，再在变化的段落对内按句子、按字符求差异。
+序列比较采用 patience 锚点 + 线性空间 Myers（middle snake）算法，并带有时间预算，
+超时后剩余区间退化为整体替换，保证长文档（尤其是换行较少的中文文档）仍可交互。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import re
+import time
+import bisect
+from typing import List, Tuple, Sequence, Hashable, Optional, Iterator
+from dataclasses import dataclass
+
+# 操作码格式与 difflib.SequenceMatcher.get_opcodes() 一致: (tag, i1, i2, j1, j2)
+Opcode = Tuple[str, int, int, int, int]
+
+# 默认时间预算（秒）
+DEFAULT_TIME_BUDGET = 1.0
+
+# 段落切分：保留换行符，拼接后可还原原文
+_PARAGRAPH_PATTERN = re.compile(r'[^\n]*\n|[^\n]+')
+
+# 句子边界：中英文句末标点（含紧随的引号/括号和空白）或换行
+_SENTENCE_BOUNDARY_PATTERN = re.compile(r'[。！？!?；;]+[”’」』）)"\']*\s*|\n+')
+
+
+@dataclass
+class TextEdit:
+    """字符级文本编辑（偏移量均相对于完整原文/新文本）"""
+    tag: str  # replace, insert, delete
+    a_start: int
+    a_end: int
+    b_start: int
+    b_end: int
+    original_text: str
+    suggested_text: str
+
+
+class _Deadline:
+    """时间预算"""
+
+    def __init__(self, time_budget: Optional[float]):
+        self.expires_at = None if time_budget is None else time.monotonic() + time_budget
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() > self.expires_at
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """按行切分段落，保留换行符"""
+    return _PARAGRAPH_PATTERN.findall(text)
+
+
+def split_sentences(text: str) -> List[str]:
+    """按句末标点切分句子，保留标点与空白"""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY_PATTERN.finditer(text):
+        end = match.end()
+        if end > start:
+            sentences.append(text[start:end])
+            start = end
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def _common_prefix(a: Sequence, b: Sequence) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a: Sequence, b: Sequence, limit: int) -> int:
+    n = min(len(a), len(b)) - limit
+    i = 0
+    while i < n and a[-1 - i] == b[-1 - i]:
+        i += 1
+    return i
+
+
+def _bisect(a: Sequence, b: Sequence, deadline: _Deadline) -> Optional[Tuple[int, int]]:
+    """
+    Myers middle snake：双向搜索最短编辑路径的中点，空间 O(N+M)
+
+    Returns:
+        中点 (x, y)；超时或无公共部分时返回 None
+    """
+    n, m = len(a), len(b)
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v2 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2[v_offset + 1] = 0
+    delta = n - m
+    # 差值为奇数时在前向搜索中检测重叠，否则在反向搜索中检测
+    front = delta % 2 != 0
+    k1start = k1end = k2start = k2end = 0
+
+    for d in range(max_d):
+        if deadline.expired():
+            return None
+
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[x1] == b[y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1end += 2
+            elif y1 > m:
+                k1start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= n - v2[k2_offset]:
+                        return x1, y1
+
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[n - x2 - 1] == b[m - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2end += 2
+            elif y2 > m:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return x1, y1
+
+    return None
+
+
+def _myers(a: Sequence, b: Sequence, a_off: int, b_off: int,
+           deadline: _Deadline, out: List[Opcode]):
+    """线性空间 Myers 差异，结果追加到 out（未合并的原始操作）"""
+    prefix = _common_prefix(a, b)
+    suffix = _common_suffix(a, b, prefix)
+    n, m = len(a), len(b)
+    if prefix:
+        out.append(('equal', a_off, a_off + prefix, b_off, b_off + prefix))
+
+    mid_a = a[prefix:n - suffix]
+    mid_b = b[prefix:m - suffix]
+    ma_off, mb_off = a_off + prefix, b_off + prefix
+
+    if not mid_a and not mid_b:
+        pass
+    elif not mid_a:
+        out.append(('insert', ma_off, ma_off, mb_off, mb_off + len(mid_b)))
+    elif not mid_b:
+        out.append(('delete', ma_off, ma_off + len(mid_a), mb_off, mb_off))
+    else:
+        split = None if deadline.expired() else _bisect(mid_a, mid_b, deadline)
+        if split is None:
+            # 超时或无公共部分，整体替换
+            out.append(('replace', ma_off, ma_off + len(mid_a), mb_off, mb_off + len(mid_b)))
+        else:
+            # 每次切分使编辑距离减半，递归深度为 O(log D)
+            x, y = split
+            _myers(mid_a[:x], mid_b[:y], ma_off, mb_off, deadline, out)
+            _myers(mid_a[x:], mid_b[y:], ma_off + x, mb_off + y, deadline, out)
+
+    if suffix:
+        out.append(('equal', a_off + n - suffix, a_off + n, b_off + m - suffix, b_off + m))
+
+
+def _unique_anchors(a: Sequence[Hashable], b: Sequence[Hashable]) -> List[Tuple[int, int]]:
+    """patience 锚点：两侧各仅出现一次的元素，取 b 下标的最长递增子序列"""
+    counts = {}
+    for i, item in enumerate(a):
+        entry = counts.get(item)
+        counts[item] = [i, -1, 1, 0] if entry is None else [entry[0], -1, entry[2] + 1, 0]
+    for j, item in enumerate(b):
+        entry = counts.get(item)
+        if entry is not None:
+            entry[1] = j
+            entry[3] += 1
+    pairs = sorted((e[0], e[1]) for e in counts.values() if e[2] == 1 and e[3] == 1)
+    if not pairs:
+        return []
+
+    # 耐心排序求最长递增子序列
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    back = [-1] * len(pairs)
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos > 0:
+            back[idx] = tail_idx[pos - 1]
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+    result = []
+    idx = tail_idx[-1]
+    while idx != -1:
+        result.append(pairs[idx])
+        idx = back[idx]
+    result.reverse()
+    return result
+
+
+def _patience(a: Sequence[Hashable], b: Sequence[Hashable], a_off: int, b_off: int,
+              deadline: _Deadline, out: List[Opcode]):
+    """patience 差异：以唯一公共元素为锚点切分，锚点之间用 Myers"""
+    prefix = _common_prefix(a, b)
+    suffix = _common_suffix(a, b, prefix)
+    n, m = len(a), len(b)
+    if prefix:
+        out.append(('equal', a_off, a_off + prefix, b_off, b_off + prefix))
+    mid_a = a[prefix:n - suffix]
+    mid_b = b[prefix:m - suffix]
+    ma_off, mb_off = a_off + prefix, b_off + prefix
+
+    anchors = _unique_anchors(mid_a, mid_b) if mid_a and mid_b else []
+    if not anchors:
+        _myers(mid_a, mid_b, ma_off, mb_off, deadline, out)
+    else:
+        last_i = last_j = 0
+        for i, j in anchors:
+            if i > last_i or j > last_j:
+                _patience(mid_a[last_i:i], mid_b[last_j:j], ma_off + last_i, mb_off + last_j, deadline, out)
+            out.append(('equal', ma_off + i, ma_off + i + 1, mb_off + j, mb_off + j + 1))
+            last_i, last_j = i + 1, j + 1
+        if last_i < len(mid_a) or last_j < len(mid_b):
+            _patience(mid_a[last_i:], mid_b[last_j:], ma_off + last_i, mb_off + last_j, deadline, out)
+
+    if suffix:
+        out.append(('equal', a_off + n - suffix, a_off + n, b_off + m - suffix, b_off + m))
+
+
+def _normalize(raw: List[Opcode]) -> List[Opcode]:
+    """合并相邻操作：连续的 equal 合并，连续的非 equal 合并为 replace/insert/delete"""
+    opcodes: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in raw:
+        if i1 == i2 and j1 == j2:
+            continue
+        changed = tag != 'equal'
+        if opcodes and (opcodes[-1][0] != 'equal') == changed:
+            _, pi1, _, pj1, _ = opcodes[-1]
+            opcodes[-1] = (tag, pi1, i2, pj1, j2)
+        else:
+            opcodes.append((tag, i1, i2, j1, j2))
+
+    result: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != 'equal':
+            if i1 == i2:
+                tag = 'insert'
+            elif j1 == j2:
+                tag = 'delete'
+            else:
+                tag = 'replace'
+        result.append((tag, i1, i2, j1, j2))
+    return result
+
+
+def get_opcodes(a: Sequence[Hashable], b: Sequence[Hashable],
+                time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+                patience: bool = True, deadline: _Deadline = None) -> List[Opcode]:
+    """
+    计算两个序列的差异操作码，格式同 difflib.SequenceMatcher.get_opcodes()
+
+    Args:
+        a: 原序列
+        b: 新序列
+        time_budget: 时间预算（秒），None 表示不限时
+        patience: 是否使用 patience 锚点（适合段落/句子等粗粒度元素）
+        deadline: 共享的截止时间（优先于 time_budget）
+
+    Returns:
+        操作码列表
+    """
+    deadline = deadline or _Deadline(time_budget)
+    raw: List[Opcode] = []
+    if patience:
+        _patience(a, b, 0, 0, deadline, raw)
+    else:
+        _myers(a, b, 0, 0, deadline, raw)
+    return _normalize(raw)
+
+
+def _offsets(tokens: List[str], base: int = 0) -> List[int]:
+    """token 起始偏移量（末尾附加总长度）"""
+    offsets = [base]
+    for token in tokens:
+        offsets.append(offsets[-1] + len(token))
+    return offsets
+
+
+class TextDiffEngine:
+    """分层文本差异引擎：段落 → 句子 → 字符"""
+
+    def __init__(self, time_budget: Optional[float] = DEFAULT_TIME_BUDGET, merge_gap: int = 2):
+        """
+        初始化差异引擎
+
+        Args:
+            time_budget: 单次比较的时间预算（秒）
+            merge_gap: 字符级差异中，相距不超过该字符数的改动合并为一处
+        """
+        self.time_budget = time_budget
+        self.merge_gap = merge_gap
+
+    def diff(self, original: str, revised: str) -> List[TextEdit]:
+        """
+        比较两段文本，返回字符级编辑列表（按原文位置排序）
+
+        Args:
+            original: 原文
+            revised: 修改后文本
+
+        Returns:
+            编辑列表
+        """
+        deadline = _Deadline(self.time_budget)
+        edits: List[TextEdit] = []
+        if original == revised:
+            return edits
+
+        a_paras = split_paragraphs(original)
+        b_paras = split_paragraphs(revised)
+        a_pos = _offsets(a_paras)
+        b_pos = _offsets(b_paras)
+
+        for tag, i1, i2, j1, j2 in get_opcodes(a_paras, b_paras, deadline=deadline):
+            if tag == 'equal':
+                continue
+            a_start, a_end = a_pos[i1], a_pos[i2]
+            b_start, b_end = b_pos[j1], b_pos[j2]
+            if tag == 'replace':
+                self._diff_sentences(original, revised, a_start, a_end, b_start, b_end, deadline, edits)
+            else:
+                edits.append(self._make_edit(original, revised, a_start, a_end, b_start, b_end))
+        return edits
+
+    def _diff_sentences(self, original: str, revised: str, a_start: int, a_end: int,
+                        b_start: int, b_end: int, deadline: _Deadline, edits: List[TextEdit]):
+        """在变化的段落区间内按句子对齐"""
+        a_sents = split_sentences(original[a_start:a_end])
+        b_sents = split_sentences(revised[b_start:b_end])
+        a_pos = _offsets(a_sents, a_start)
+        b_pos = _offsets(b_sents, b_start)
+
+        for tag, i1, i2, j1, j2 in get_opcodes(a_sents, b_sents, deadline=deadline):
+            if tag == 'equal':
+                continue
+            if tag != 'replace':
+                edits.append(self._make_edit(original, revised, a_pos[i1], a_pos[i2], b_pos[j1], b_pos[j2]))
+            elif i2 - i1 == j2 - j1:
+                # 句数相同时逐句配对，缩小字符级比较规模
+                for k in range(i2 - i1):
+                    self._diff_chars(original, revised, a_pos[i1 + k], a_pos[i1 + k + 1],
+                                     b_pos[j1 + k], b_pos[j1 + k + 1], deadline, edits)
+            else:
+                self._diff_chars(original, revised, a_pos[i1], a_pos[i2],
+                                 b_pos[j1], b_pos[j2], deadline, edits)
+
+    def _diff_chars(self, original: str, revised: str, a_start: int, a_end: int,
+                    b_start: int, b_end: int, deadline: _Deadline, edits: List[TextEdit]):
+        """在变化的句子区间内按字符求差异，并合并相邻改动"""
+        a_text = original[a_start:a_end]
+        b_text = revised[b_start:b_end]
+        if a_text == b_text:
+            return
+
+        hunk = None
+        for tag, i1, i2, j1, j2 in get_opcodes(a_text, b_text, patience=False, deadline=deadline):
+            if tag == 'equal':
+                continue
+            if hunk and i1 - hunk[1] <= self.merge_gap and j1 - hunk[3] <= self.merge_gap:
+                hunk = [hunk[0], i2, hunk[2], j2]
+            else:
+                if hunk:
+                    edits.append(self._make_edit(original, revised, a_start + hunk[0], a_start + hunk[1],
+                                                 b_start + hunk[2], b_start + hunk[3]))
+                hunk = [i1, i2, j1, j2]
+        if hunk:
+            edits.append(self._make_edit(original, revised, a_start + hunk[0], a_start + hunk[1],
+                                         b_start + hunk[2], b_start + hunk[3]))
+
+    @staticmethod
+    def _make_edit(original: str, revised: str, a_start: int, a_end: int,
+                   b_start: int, b_end: int) -> TextEdit:
+        if a_start == a_end:
+            tag = 'insert'
+        elif b_start == b_end:
+            tag = 'delete'
+        else:
+            tag = 'replace'
+        return TextEdit(
+            tag=tag,
+            a_start=a_start,
+            a_end=a_end,
+            b_start=b_start,
+            b_end=b_end,
+            original_text=original[a_start:a_end],
+            suggested_text=revised[b_start:b_end]
+        )
+
+
+def unified_diff(a: List[str], b: List[str], fromfile: str = '', tofile: str = '',
+                 n: int = 3, lineterm: str = '\n',
+                 time_budget: Optional[float] = DEFAULT_TIME_BUDGET) -> Iterator[str]:
+    """
+    生成统一格式差异，输出格式与 difflib.unified_diff 一致
+
+    Args:
+        a: 原文行列表
+        b: 新文本行列表
+        fromfile: 原文件名
+        tofile: 新文件名
+        n: 上下文行数
+        lineterm: 控制行结尾
+        time_budget: 时间预算（秒）
+    """
+    opcodes = get_opcodes(a, b, time_budget=time_budget)
+    if not opcodes or all(op[0] == 'equal' for op in opcodes):
+        return
+
+    # 与 difflib.SequenceMatcher.get_grouped_opcodes 相同的分组逻辑
+    codes = list(opcodes)
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    groups = []
+    group = []
+    nn = n + n
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > nn:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        groups.append(group)
+
+    def _format_range(start, stop):
+        beginning = start + 1
+        length = stop - start
+        if length == 1:
+            return '{}'.format(beginning)
+        if not length:
+            beginning -= 1
+        return '{},{}'.format(beginning, length)
+
+    yield '--- {}{}'.format(fromfile, lineterm)
+    yield '+++ {}{}'.format(tofile, lineterm)
+    for group in groups:
+        first, last = group[0], group[-1]
+        file1_range = _format_range(first[1], last[2])
+        file2_range = _format_range(first[3], last[4])
+        yield '@@ -{} +{} @@{}'.format(file1_range, file2_range, lineterm)
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield ' ' + line
+                continue
+            if tag in ('replace', 'delete'):
+                for line in a[i1:i2]:
+                    yield '-' + line
+            if tag in ('replace', 'insert'):
+                for line in b[j1:j2]:
+                    yield '+' + line
+
+
+# 全局差异引擎实例
+_global_diff_engine = None
+
+
+def get_diff_engine() -> TextDiffEngine:
+    """获取全局差异引擎实例"""
+    global _global_diff_engine
+    if _global_diff_engine is None:
+        _global_diff_engine = TextDiffEngine()
+    return _global_diff_engine
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Text Segmenter - 核心模块
+
+共享分词服务：封装 jieba 的分词与词性标注。
+- 词典在启动时预加载（可放到后台线程），并可指定共享的词典缓存目录，多个 worker 复用同一份预构建缓存文件；
+- 按段落哈希做 LRU 记忆化，同一段落重复分析时直接复用结果；
+- 批量输入可切换到进程池并行分词；
+- jieba 不可用时退化为正则切分（中文按字、英文/数字按连续串），保证调用方仍能拿到近似词元。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional, Iterable, NamedTuple
+
+try:
+    import jieba
+    import jieba.posseg as pseg
+    JIEBA_AVAILABLE = True
+except ImportError:
+    JIEBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 段落分隔符：与 jieba 的 re_skip 一致，\r\n 作为一个整体词元
+_PARAGRAPH_SPLIT_PATTERN = re.compile(r'(\r\n|\n)')
+
+# jieba 不可用时的退化切分：中文单字 / 英文数字串 / 空白串 / 其他单个字符
+_FALLBACK_TOKEN_PATTERN = re.compile(r'[一-鿿]|[A-Za-z]+|[0-9]+(?:\.[0-9]+)?|\s+|\S')
+
+# 含有文字或数字的词元才计为"词"
+_WORD_TOKEN_PATTERN = re.compile(r'\w')
+
+# 批量并行时，每个任务包含的段落数
+_PARALLEL_CHUNK_SIZE = 64
+
+
+class Token(NamedTuple):
+    """带词性的词元，字段名与 jieba.posseg.pair 保持一致"""
+    word: str
+    flag: str
+
+
+def _fallback_cut(text: str) -> List[str]:
+    return _FALLBACK_TOKEN_PATTERN.findall(text)
+
+
+def _fallback_flag(word: str) -> str:
+    if word[0].isdigit():
+        return 'm'
+    if word[0].isascii() and word[0].isalpha():
+        return 'eng'
+    return 'x'
+
+
+def _load_dictionary(cache_dir: Optional[str] = None, dictionary: Optional[str] = None):
+    """加载 jieba 词典（幂等）。cache_dir 指定预构建缓存文件所在目录"""
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        jieba.dt.tmp_dir = cache_dir
+    if dictionary:
+        jieba.set_dictionary(dictionary)
+    jieba.initialize()
+
+
+def _segment_chunk(paragraphs: List[str], with_pos: bool) -> List[tuple]:
+    """进程池任务：对一组段落分词"""
+    if with_pos:
+        return [tuple(Token(p.word, p.flag) for p in pseg.cut(text)) for text in paragraphs]
+    return [tuple(jieba.cut(text)) for text in paragraphs]
+
+
+class TextSegmenter:
+    """分词服务：词典预加载 + 段落级记忆化 + 批量并行"""
+
+    def __init__(self, cache_size: int = 4096, cache_dir: Optional[str] = None,
+                 dictionary: Optional[str] = None, max_workers: Optional[int] = None):
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir or os.environ.get('JIEBA_CACHE_DIR')
+        self.dictionary = dictionary
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+
+        self._cache: "OrderedDict[Tuple[str, bytes], tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._preload_thread: Optional[threading.Thread] = None
+
+        self.stats = {"hits": 0, "misses": 0}
+
+    @property
+    def available(self) -> bool:
+        return JIEBA_AVAILABLE
+
+    # ------------------------------------------------------------------
+    # 词典加载
+    # ------------------------------------------------------------------
+
+    def preload(self, background: bool = False):
+        """预加载词典。background=True 时在后台线程加载，不阻塞启动"""
+        if not JIEBA_AVAILABLE or self._loaded:
+            return
+        if background:
+            if self._preload_thread is None:
+                self._preload_thread = threading.Thread(
+                    target=self._ensure_loaded, name="jieba-preload", daemon=True)
+                self._preload_thread.start()
+            return
+        self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                _load_dictionary(self.cache_dir, self.dictionary)
+                logger.info("jieba 词典加载完成")
+            except Exception as e:
+                logger.error(f"jieba 词典加载失败: {e}")
+            self._loaded = True
+
+    # ------------------------------------------------------------------
+    # 分词
+    # ------------------------------------------------------------------
+
+    def cut(self, text: str) -> List[str]:
+        """分词，结果与 jieba.cut(text) 一致"""
+        return self._segment(text, with_pos=False)
+
+    def posseg(self, text: str) -> List[Token]:
+        """词性标注，结果与 jieba.posseg.cut(text) 一致"""
+        return self._segment(text, with_pos=True)
+
+    def words(self, text: str) -> List[str]:
+        """只保留包含文字或数字的词元（去掉空白与标点）"""
+        return [token for token in self.cut(text) if _WORD_TOKEN_PATTERN.search(token)]
+
+    def cut_batch(self, texts: Iterable[str], with_pos: bool = False,
+                  parallel: bool = False) -> List[list]:
+        """批量分词。parallel=True 时未命中缓存的段落交给进程池处理"""
+        texts = list(texts)
+        if parallel and JIEBA_AVAILABLE:
+            self._prefetch(texts, with_pos)
+        return [self._segment(text, with_pos) for text in texts]
+
+    def _segment(self, text: str, with_pos: bool) -> list:
+        if not text:
+            return []
+
+        tokens = []
+        for piece in _PARAGRAPH_SPLIT_PATTERN.split(text):
+            if not piece:
+                continue
+            if piece == '\n' or piece == '\r\n':
+                tokens.append(Token(piece, 'x') if with_pos else piece)
+            else:
+                tokens.extend(self._segment_paragraph(piece, with_pos))
+        return tokens
+
+    def _segment_paragraph(self, paragraph: str, with_pos: bool) -> tuple:
+        key = ('pos' if with_pos else 'cut', self._paragraph_key(paragraph))
+
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached
+
+        result = self._segment_uncached(paragraph, with_pos)
+        self._store(key, result)
+        return result
+
+    def _segment_uncached(self, paragraph: str, with_pos: bool) -> tuple:
+        if not JIEBA_AVAILABLE:
+            tokens = _fallback_cut(paragraph)
+            if with_pos:
+                return tuple(Token(t, _fallback_flag(t)) for t in tokens)
+            return tuple(tokens)
+
+        self._ensure_loaded()
+        return _segment_chunk([paragraph], with_pos)[0]
+
+    def _prefetch(self, texts: List[str], with_pos: bool):
+        """把批量输入中未缓存的段落并行分词并写入缓存"""
+        mode = 'pos' if with_pos else 'cut'
+        pending = {}
+        with self._cache_lock:
+            for text in texts:
+                for piece in _PARAGRAPH_SPLIT_PATTERN.split(text):
+                    if not piece or piece == '\n' or piece == '\r\n':
+                        continue
+                    key = (mode, self._paragraph_key(piece))
+                    if key not in self._cache:
+                        pending[key] = piece
+
+        if len(pending) < _PARALLEL_CHUNK_SIZE:
+            return
+
+        # 父进程先加载词典：fork 出的子进程直接继承，spawn 时子进程读取共享缓存文件
+        self._ensure_loaded()
+        keys = list(pending)
+        chunks = [keys[i:i + _PARALLEL_CHUNK_SIZE] for i in range(0, len(keys), _PARALLEL_CHUNK_SIZE)]
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_load_dictionary,
+                                     initargs=(self.cache_dir, self.dictionary)) as executor:
+                futures = [(chunk, executor.submit(_segment_chunk, [pending[k] for k in chunk], with_pos))
+                           for chunk in chunks]
+                for chunk, future in futures:
+                    for key, result in zip(chunk, future.result()):
+                        self._store(key, result)
+        except Exception as e:
+            # 并行失败时由调用方的串行路径兜底
+            logger.warning(f"并行分词失败，改为串行: {e}")
+
+    def _store(self, key: Tuple[str, bytes], result: tuple):
+        with self._cache_lock:
+            self.stats["misses"] += 1
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _paragraph_key(paragraph: str) -> bytes:
+        return hashlib.blake2b(paragraph.encode('utf-8'), digest_size=16).digest()
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self.stats = {"hits": 0, "misses": 0}
+
+
+# 全局分词服务实例
+_global_segmenter = None
+
+
+def get_text_segmenter() -> TextSegmenter:
+    """获取全局分词服务实例"""
+    global _global_segmenter
+    if _global_segmenter is None:
+        _global_segmenter = TextSegmenter()
+    return _global_segmenter
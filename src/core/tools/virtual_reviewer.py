@@ -17,6 +17,7 @@ import re
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from .base_tool import BaseTool
+from .text_segmenter import get_text_segmenter
 
 class EnhancedVirtualReviewerTool(BaseTool):
 
@@ -255,7 +256,8 @@ class EnhancedVirtualReviewerTool(BaseTool):
         lines = content.split('\n')
         paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
         sentences = re.split(r'[.!?]+', content)
-        words = content.split()
+        # 使用共享分词服务的真实词元（中文不再按空白整行计为一个词）
+        words = get_text_segmenter().words(content)
 
         # Identify document sections
         headings = []
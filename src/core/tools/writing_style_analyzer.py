@@ -18,7 +18,8 @@ import os
 from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime
 import hashlib
-import difflib
+
+from .text_diff_engine import get_diff_engine, unified_diff
 
 # 导入增强的文风分析组件
 try:
@@ -2093,64 +2094,50 @@ class WritingStyleAnalyzer:
             template_id = session_data.get("style_template_id", "template")
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             # 2. 应用变更，保留结构，按diff顺序合成
-            from docx import Document
-            from docx.shared import Pt, Inches, RGBColor
-            from docx.enum.text import WD_ALIGN_PARAGRAPH
+            from docx.shared import Pt, Inches
             from docx.oxml.ns import qn
             from docx.enum.style import WD_STYLE_TYPE
-            from docx.oxml import OxmlElement
-            import re
-            doc = Document()
+            from .docx_writer import StyledDocxWriter
+            # 段落先缓存为 XML 片段，保存前一次性写入正文
+            writer = StyledDocxWriter()
+            doc = writer.document
             # 2.1 封面
             doc.add_section()
-            cover = doc.add_paragraph()
-            run = cover.add_run(f"文风统一导出文档\n\n原文件: {doc_name}\n模板: {template_id}\n导出时间: {timestamp}")
-            run.font.size = Pt(20)
-            run.bold = True
-            cover.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            doc.add_page_break()
+            writer.add_paragraph([(f"文风统一导出文档\n\n原文件: {doc_name}\n模板: {template_id}\n导出时间: {timestamp}",
+                                   {"size": 20, "bold": True})], alignment="center")
+            writer.add_page_break()
             # 2.2 目录
-            toc = doc.add_paragraph("目录", style='Heading 1')
-            doc.add_paragraph("（请在Word中更新目录域以显示章节）")
-            doc.add_page_break()
+            heading_style = writer.style_id("Heading 1")
+            writer.add_paragraph("目录", heading_style)
+            writer.add_paragraph("（请在Word中更新目录域以显示章节）")
+            writer.add_page_break()
             # 2.3 正文（保留原结构，应用变更并高亮diff）
+            accepted_changes = [c for c in suggested_changes if c.get("status") == "accepted" and c.get("original_text")]
             paragraphs = original_content.split('\n')
             for para_text in paragraphs:
                 if not para_text.strip():
-                    doc.add_paragraph()
+                    writer.add_paragraph()
                     continue
-                para = doc.add_paragraph()
-                applied = False
-                for change in suggested_changes:
-                    if change.get("status") == "accepted" and change.get("original_text") in para_text:
+                runs = [para_text]
+                for change in accepted_changes:
+                    if change["original_text"] in para_text:
                         before, match, after = para_text.partition(change["original_text"])
-                        if before:
-                            para.add_run(before)
-                        run = para.add_run(change["suggested_text"])
-                        # 简化高亮设置，避免导入问题
-                        run.font.color.rgb = RGBColor(255, 255, 0)  # 黄色文字
-                        comment = OxmlElement('w:commentRangeStart')
-                        comment.set(qn('w:id'), '0')
-                        para._p.append(comment)
-                        run = para.add_run(f"（风格变更：{change.get('change_type','')}，置信度{change.get('confidence',0):.2f}）")
-                        run.font.size = Pt(8)
-                        run.font.color.rgb = RGBColor(255,0,0)
-                        comment_end = OxmlElement('w:commentRangeEnd')
-                        comment_end.set(qn('w:id'), '0')
-                        para._p.append(comment_end)
-                        if after:
-                            para.add_run(after)
-                        applied = True
+                        runs = [
+                            before,
+                            (change.get("suggested_text", ""), {"color": "FFFF00"}),  # 黄色文字
+                            (f"（风格变更：{change.get('change_type','')}，置信度{change.get('confidence',0):.2f}）",
+                             {"size": 8, "color": "FF0000"}),
+                            after
+                        ]
                         break
-                if not applied:
-                    para.add_run(para_text)
+                writer.add_paragraph(runs)
             # 2.4 统一样式
             for section in doc.sections:
                 section.top_margin = Inches(1)
                 section.bottom_margin = Inches(1)
                 section.left_margin = Inches(1.25)
                 section.right_margin = Inches(1.25)
-            # 简化样式设置，避免复杂的字体操作
+            # 字体在样式中统一设置，正文段落不再逐个 run 设置
             for style in doc.styles:
                 if style.type == WD_STYLE_TYPE.PARAGRAPH:
                     style.font.name = '宋体'
@@ -2161,33 +2148,25 @@ class WritingStyleAnalyzer:
             core_props.title = f"文风统一导出-{doc_name}"
             core_props.subject = f"风格模板ID: {template_id}"
             core_props.author = "智能文档助手"
-            core_props.comments = f"导出时间: {timestamp}；变更数: {len([c for c in suggested_changes if c.get('status') == 'accepted'])}"
+            core_props.comments = f"导出时间: {timestamp}；变更数: {len(accepted_changes)}"
             core_props.keywords = f"style_template_id:{template_id};export_time:{timestamp}"
             # 2.6 文档末尾添加风格调整报告
-            doc.add_page_break()
-            report = doc.add_paragraph("风格调整报告", style='Heading 1')
-            report.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            doc.add_paragraph(f"原文件名: {doc_name}")
-            doc.add_paragraph(f"风格模板ID: {template_id}")
-            doc.add_paragraph(f"导出时间: {timestamp}")
-            doc.add_paragraph(f"总变更数: {len([c for c in suggested_changes if c.get('status') == 'accepted'])}")
+            writer.add_page_break()
+            writer.add_paragraph("风格调整报告", heading_style, alignment="left")
+            writer.add_paragraph(f"原文件名: {doc_name}")
+            writer.add_paragraph(f"风格模板ID: {template_id}")
+            writer.add_paragraph(f"导出时间: {timestamp}")
+            writer.add_paragraph(f"总变更数: {len(accepted_changes)}")
+            list_style = writer.style_id("List Number")
             for idx, change in enumerate(suggested_changes, 1):
                 if change.get("status") == "accepted":
-                    para = doc.add_paragraph(f"[{idx}] 类型: {change.get('change_type','')} | 置信度: {change.get('confidence',0):.2f}", style='List Number')
-                    para.add_run(f"\n原文: {change.get('original_text','')}")
-                    para.add_run(f"\n建议: {change.get('suggested_text','')}")
+                    writer.add_paragraph(
+                        f"[{idx}] 类型: {change.get('change_type','')} | 置信度: {change.get('confidence',0):.2f}"
+                        f"\n原文: {change.get('original_text','')}"
+                        f"\n建议: {change.get('suggested_text','')}", list_style)
             # 2.7 文件命名
             filename = f"{doc_name}_{template_id}_{timestamp}.docx"
-            import tempfile
-            temp_dir = tempfile.gettempdir()
-            output_path = os.path.join(temp_dir, filename)
-            doc.save(output_path)
-            with open(output_path, 'rb') as f:
-                docx_content = f.read()
-            try:
-                os.remove(output_path)
-            except:
-                pass
+            docx_content = writer.to_bytes()
             return {
                 "success": True,
                 "docx_content": docx_content,
@@ -2249,8 +2228,7 @@ class WritingStyleAnalyzer:
             # 5. 生成diff（可选：对比迁移前后文本差异）
             diff = []
             if "rewritten_text" in transfer_result and transfer_result["rewritten_text"] != document_content:
-                import difflib
-                diff = list(difflib.unified_diff(
+                diff = list(unified_diff(
                     document_content.splitlines(), 
                     transfer_result["rewritten_text"].splitlines(),
                     lineterm=""
@@ -2639,30 +2617,21 @@ class WritingStyleAnalyzer:
         """
         changes = []
         
-        # 使用difflib生成差异
-        import difflib
-        
-        # 简单的词级别差异检测
-        original_words = original_content.split()
-        migrated_words = migrated_content.split()
-        
-        matcher = difflib.SequenceMatcher(None, original_words, migrated_words)
-        
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            if tag == 'replace':
-                original_text = ' '.join(original_words[i1:i2])
-                suggested_text = ' '.join(migrated_words[j1:j2])
-                
-                if original_text.strip() and suggested_text.strip():
-                    change = {
-                        "original_text": original_text,
-                        "suggested_text": suggested_text,
-                        "status": "accepted",
-                        "change_type": self._classify_change_type(original_text, suggested_text),
-                        "confidence": 0.85,
-                        "position": i1
-                    }
-                    changes.append(change)
+        # 分层差异：段落对齐 → 句子 → 字符，position 为原文字符偏移
+        for edit in get_diff_engine().diff(original_content, migrated_content):
+            original_text = edit.original_text
+            suggested_text = edit.suggested_text
+            
+            if original_text.strip() or suggested_text.strip():
+                change = {
+                    "original_text": original_text,
+                    "suggested_text": suggested_text,
+                    "status": "accepted",
+                    "change_type": self._classify_change_type(original_text, suggested_text),
+                    "confidence": 0.85,
+                    "position": edit.a_start
+                }
+                changes.append(change)
         
         return changes
     
@@ -2782,27 +2751,34 @@ class WritingStyleAnalyzer:
             str: 更新后的预览内容
         """
         try:
-            # 按位置排序变化，确保按顺序应用
-            accepted_changes = [c for c in suggested_changes if c.get("status") == "accepted"]
-            accepted_changes.sort(key=lambda x: x.get("position", {}).get("start", 0))
-            
-            # 从后往前应用变化，避免位置偏移
-            updated_content = original_content
-            offset = 0
-            
-            for change in accepted_changes:
-                position = change.get("position", {})
-                start = position.get("start", 0) + offset
-                end = position.get("end", 0) + offset
-                suggested_text = change.get("suggested_text", "")
-                
-                # 应用变化
-                if start < len(updated_content) and end <= len(updated_content):
-                    updated_content = updated_content[:start] + suggested_text + updated_content[end:]
-                    # 更新偏移量
-                    offset += len(suggested_text) - (end - start)
+            # 计算每个已接受变化在原文中的区间并按位置排序
+            spans = []
+            for change in suggested_changes:
+                if change.get("status") != "accepted":
+                    continue
+                position = change.get("position", 0)
+                if isinstance(position, dict):
+                    start = position.get("start", 0)
+                    end = position.get("end", start)
+                else:
+                    start = position or 0
+                    end = start + len(change.get("original_text", ""))
+                spans.append((start, end, change.get("suggested_text", "")))
+            spans.sort(key=lambda x: x[0])
+            
+            # 顺序拼接未变化片段与建议文本，避免重复切片整个文档
+            parts = []
+            cursor = 0
+            for start, end, suggested_text in spans:
+                # 跳过越界或与前一变化重叠的区间
+                if start < cursor or end > len(original_content):
+                    continue
+                parts.append(original_content[cursor:start])
+                parts.append(suggested_text)
+                cursor = end
+            parts.append(original_content[cursor:])
             
-            return updated_content
+            return "".join(parts)
             
         except Exception as e:
             print(f"生成更新预览失败: {e}")
@@ -3398,30 +3374,21 @@ class WritingStyleAnalyzer:
         """
         changes = []
         
-        # 使用difflib生成差异
-        import difflib
-        
-        # 简单的词级别差异检测
-        original_words = original_content.split()
-        migrated_words = migrated_content.split()
-        
-        matcher = difflib.SequenceMatcher(None, original_words, migrated_words)
-        
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            if tag == 'replace':
-                original_text = ' '.join(original_words[i1:i2])
-                suggested_text = ' '.join(migrated_words[j1:j2])
-                
-                if original_text.strip() and suggested_text.strip():
-                    change = {
-                        "original_text": original_text,
-                        "suggested_text": suggested_text,
-                        "status": "accepted",
-                        "change_type": self._classify_change_type(original_text, suggested_text),
-                        "confidence": 0.85,
-                        "position": i1
-                    }
-                    changes.append(change)
+        # 分层差异：段落对齐 → 句子 → 字符，position 为原文字符偏移
+        for edit in get_diff_engine().diff(original_content, migrated_content):
+            original_text = edit.original_text
+            suggested_text = edit.suggested_text
+            
+            if original_text.strip() or suggested_text.strip():
+                change = {
+                    "original_text": original_text,
+                    "suggested_text": suggested_text,
+                    "status": "accepted",
+                    "change_type": self._classify_change_type(original_text, suggested_text),
+                    "confidence": 0.85,
+                    "position": edit.a_start
+                }
+                changes.append(change)
         
         return changes
     
@@ -3541,27 +3508,34 @@ class WritingStyleAnalyzer:
             str: 更新后的预览内容
         """
         try:
-            # 按位置排序变化，确保按顺序应用
-            accepted_changes = [c for c in suggested_changes if c.get("status") == "accepted"]
-            accepted_changes.sort(key=lambda x: x.get("position", {}).get("start", 0))
-            
-            # 从后往前应用变化，避免位置偏移
-            updated_content = original_content
-            offset = 0
-            
-            for change in accepted_changes:
-                position = change.get("position", {})
-                start = position.get("start", 0) + offset
-                end = position.get("end", 0) + offset
-                suggested_text = change.get("suggested_text", "")
-                
-                # 应用变化
-                if start < len(updated_content) and end <= len(updated_content):
-                    updated_content = updated_content[:start] + suggested_text + updated_content[end:]
-                    # 更新偏移量
-                    offset += len(suggested_text) - (end - start)
+            # 计算每个已接受变化在原文中的区间并按位置排序
+            spans = []
+            for change in suggested_changes:
+                if change.get("status") != "accepted":
+                    continue
+                position = change.get("position", 0)
+                if isinstance(position, dict):
+                    start = position.get("start", 0)
+                    end = position.get("end", start)
+                else:
+                    start = position or 0
+                    end = start + len(change.get("original_text", ""))
+                spans.append((start, end, change.get("suggested_text", "")))
+            spans.sort(key=lambda x: x[0])
+            
+            # 顺序拼接未变化片段与建议文本，避免重复切片整个文档
+            parts = []
+            cursor = 0
+            for start, end, suggested_text in spans:
+                # 跳过越界或与前一变化重叠的区间
+                if start < cursor or end > len(original_content):
+                    continue
+                parts.append(original_content[cursor:start])
+                parts.append(suggested_text)
+                cursor = end
+            parts.append(original_content[cursor:])
             
-            return updated_content
+            return "".join(parts)
             
         except Exception as e:
             print(f"生成更新预览失败: {e}")
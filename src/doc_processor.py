@@ -17,14 +17,62 @@ License: MIT
 
 
 import os
+import cv2
+import atexit
 import logging
+import threading
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Union, Sequence, Optional
 
-from ocr_engine import PaddleOCRWrapper
-from layout_analyzer import LayoutAnalyzer
 from table_parser import TableParser
+from ocr_cache import OCRResultCache, create_result_cache, image_content_hash
+from ocr_preprocess import OCRPreprocessor, create_preprocessor, read_image_dpi
 from utils import load_config, get_paddleocr_kwargs
+from core.model_registry import get_model_registry, DEFAULT_IDLE_TIMEOUT
+
+
+# 每个已登记模型一个专属线程：同一模型始终在同一线程上串行调用，
+# 多个 DocumentProcessor 共享同一模型实例时也共用这个线程；进程退出时统一关闭
+_model_executors: Dict[str, ThreadPoolExecutor] = {}
+_model_executors_lock = threading.Lock()
+
+
+def _model_executor(model_name: str) -> ThreadPoolExecutor:
+    """获取模型专属的单线程执行器（首次使用时创建）"""
+    with _model_executors_lock:
+        executor = _model_executors.get(model_name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=model_name.split(":", 1)[0])
+            _model_executors[model_name] = executor
+        return executor
+
+
+def shutdown_model_executors(wait: bool = True):
+    """关闭所有模型专属线程；之后再处理页面时会重新创建"""
+    with _model_executors_lock:
+        executors = list(_model_executors.values())
+        _model_executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+atexit.register(shutdown_model_executors)
+
+
+def _load_ocr_engine(ocr_kwargs: Dict[str, Any], result_cache: Optional[OCRResultCache],
+                     preprocessor: Optional[OCRPreprocessor]):
+    # 延迟导入：paddleocr 只在首次使用 OCR 时加载
+    from ocr_engine import PaddleOCRWrapper
+    return PaddleOCRWrapper(result_cache=result_cache, preprocessor=preprocessor, **ocr_kwargs)
+
+
+def _load_layout_analyzer(config: Dict[str, Any], result_cache: Optional[OCRResultCache]):
+    from layout_analyzer import LayoutAnalyzer
+    return LayoutAnalyzer(config, result_cache=result_cache)
+
 
 class DocumentProcessor:
     def __init__(self, config_path="config/config.yaml"):
@@ -34,16 +82,73 @@ class DocumentProcessor:
         self.table_config = self.config.get("table_parser", {})
         self.data_dir = self.config.get("data_dir", "data")
         
+        # OCR / 版面结果缓存（未启用时为 None）
+        self.result_cache = create_result_cache(self.config)
+
+        # OCR 引擎与版面模型登记到模型注册表：首次使用时才加载，同配置的实例在进程内共享，空闲超时后卸载
+        registry_config = self.config.get("model_registry", {})
+        idle_timeout = registry_config.get("idle_timeout", DEFAULT_IDLE_TIMEOUT)
+        self.model_registry = get_model_registry()
+
         # 优先用本地 PaddleOCR 模型参数初始化 OCR 引擎
         ocr_kwargs = get_paddleocr_kwargs(self.config)
-        self.ocr_engine = PaddleOCRWrapper(**ocr_kwargs)
-        
-        # 初始化 Layout Analyzer
-        self.layout_analyzer = LayoutAnalyzer(self.config)
+        result_cache = self.result_cache
+        # OCR 前处理（DPI 归一化、长边限制、纠偏等），未启用时为 None
+        preprocessor = self.preprocessor = create_preprocessor(self.config)
+        self._ocr_model = self.model_registry.register(
+            f"paddleocr:{sorted(ocr_kwargs.items())}:{preprocessor.signature if preprocessor else None}",
+            lambda: _load_ocr_engine(ocr_kwargs, result_cache, preprocessor),
+            idle_timeout=idle_timeout)
+
+        # Layout Analyzer
+        config = self.config
+        self._layout_model = self.model_registry.register(
+            "layout:{}:{}:{}".format(self.layout_config.get("model_type", "hf"),
+                                     self.layout_config.get("onnx_model_path")
+                                     if self.layout_config.get("model_type") == "onnx"
+                                     else self.layout_config.get("hf_model_id"),
+                                     self.layout_config.get("detection_threshold", 0.3)),
+            lambda: _load_layout_analyzer(config, result_cache),
+            idle_timeout=idle_timeout)
         
         # 初始化 Table Parser
         self.table_parser = TableParser(self.config)
 
+        # OCR 模式: full 整页识别（与版面分析并发）; regions 先版面分析，只识别表格等区域
+        self.ocr_mode = self.ocr_config.get("mode", "full")
+        self.region_types = self.ocr_config.get("region_types", ["Table"])
+        self.region_padding = self.ocr_config.get("region_padding", 8)
+
+        if registry_config.get("prewarm", False):
+            self.warm_up(background=True)
+
+    @property
+    def ocr_engine(self):
+        return self.model_registry.get(self._ocr_model)
+
+    @property
+    def layout_analyzer(self):
+        return self.model_registry.get(self._layout_model)
+
+    # OCR 与版面分析各用模型专属的线程并发执行（模块级共享，不随实例创建）
+    @property
+    def _ocr_executor(self) -> ThreadPoolExecutor:
+        return _model_executor(self._ocr_model)
+
+    @property
+    def _layout_executor(self) -> ThreadPoolExecutor:
+        return _model_executor(self._layout_model)
+
+    def warm_up(self, background: bool = True):
+        """预热 OCR 与版面模型，background=True 时在后台线程加载"""
+        return self.model_registry.warm_up([self._ocr_model, self._layout_model], background=background)
+
+    @contextmanager
+    def _models_in_use(self):
+        """处理页面期间固定模型实例，防止被空闲巡检卸载"""
+        with self.model_registry.use(self._ocr_model), self.model_registry.use(self._layout_model):
+            yield
+
     def process_document(self, image_filename: str) -> List[pd.DataFrame]:
         image_path = os.path.join(self.data_dir, image_filename)
         
@@ -51,34 +156,70 @@ class DocumentProcessor:
             logging.error(f"文档处理错误: 文件 '{image_path}' 不存在。")
             return []
 
-        logging.info(f"开始处理文档: {image_path}")
+        return self.process_image(image_path)
 
-        # 1. OCR 识别
-        ocr_results = self.ocr_engine.recognize(image_path)
-        if not ocr_results:
-            logging.warning(f"文档 '{image_path}' OCR 结果为空。")
-            return []
-        logging.info(f"OCR 识别完成，共找到 {len(ocr_results)} 个文本块。")
+    def process_image(self, image: Union[str, np.ndarray], source: str = None,
+                      dpi: Optional[float] = None) -> List[pd.DataFrame]:
+        """
+        处理单页图片：OCR + 版面分析 → 按表格区域分组 OCR 结果 → 表格解析。
+        image 可以是图片路径，也可以是已解码的页面数组（多页扫描件的某一页），source 仅用于日志。
+        dpi 为扫描分辨率，供 OCR 前处理做 DPI 归一化（传入路径时从文件读取）。
+        """
+        with self._models_in_use():
+            return self._process_image(image, source, dpi)
+
+    def _process_image(self, image: Union[str, np.ndarray], source: str = None,
+                       dpi: Optional[float] = None) -> List[pd.DataFrame]:
+        source = source or (image if isinstance(image, str) else "<image>")
+        logging.info(f"开始处理文档: {source}")
+
+        # 0. 页面只解码一次，两个模型共享同一数组
+        if isinstance(image, str):
+            if self.preprocessor is not None and dpi is None:
+                dpi = read_image_dpi(image)
+            image = cv2.imread(image)
+            if image is None:
+                logging.error(f"文档处理错误: 无法读取图片 '{source}'。")
+                return []
+
+        # 启用缓存时只计算一次图像哈希，OCR 与版面分析共用
+        image_hash = image_content_hash(image) if self.result_cache is not None else None
+
+        # 1. OCR 识别与版面分析 (表格检测)
+        if self.ocr_mode == "regions":
+            table_blocks, ocr_results = self._recognize_regions(image, source, image_hash)
+        else:
+            table_blocks, ocr_results = self._recognize_full_page(image, source, image_hash, dpi)
 
-        # 2. 版面分析 (表格检测)
-        table_blocks = self.layout_analyzer.analyze(image_path)
-        
         if not table_blocks:
-            logging.info(f"文档 '{image_path}' 中未检测到表格。")
             return []
+        if not ocr_results:
+            logging.warning(f"文档 '{source}' OCR 结果为空。")
+            return []
+        logging.info(f"OCR 识别完成，共找到 {len(ocr_results)} 个文本块。")
 
-        # 3. 表格解析与内容提取
-        extracted_tables = []
+        # 2. 校验表格边界框
+        table_bboxes = []
         for i, block in enumerate(table_blocks):
-            logging.info(f"正在解析表格 {i+1}/{len(table_blocks)}...")
-            table_bbox = block.block.box # [x1, y1, x2, y2]
-            
-            if not (isinstance(table_bbox, (list, tuple)) and len(table_bbox) == 4 and
+            table_bbox = [int(v) for v in block.coordinates] # [x1, y1, x2, y2]
+            if not (len(table_bbox) == 4 and
                     table_bbox[0] < table_bbox[2] and table_bbox[1] < table_bbox[3]):
                 logging.warning(f"跳过无效的表格边界框: {table_bbox}")
                 continue
-                
-            df_table = self.table_parser.parse(image_path, table_bbox, ocr_results)
+            table_bboxes.append(table_bbox)
+
+        # 3. 按表格区域筛选 OCR 结果，表格解析器只接收落在本表格内的文本块
+        regions = self._group_ocr_by_regions(ocr_results, table_bboxes)
+
+        # 4. 表格解析与内容提取
+        extracted_tables = []
+        for i, (table_bbox, region_ocr) in enumerate(zip(table_bboxes, regions)):
+            logging.info(f"正在解析表格 {i+1}/{len(table_bboxes)}...")
+            if not region_ocr:
+                logging.warning(f"表格 {i+1} (Box: {table_bbox}) 内没有 OCR 结果。")
+                continue
+
+            df_table = self.table_parser.parse(source, table_bbox, region_ocr)
             
             if df_table is not None and not df_table.empty:
                 extracted_tables.append(df_table)
@@ -86,9 +227,50 @@ class DocumentProcessor:
             else:
                 logging.warning(f"表格 {i+1} (Box: {table_bbox}) 解析失败或结果为空。")
         
-        logging.info(f"文档 '{image_path}' 处理完成，共提取 {len(extracted_tables)} 个表格。")
+        logging.info(f"文档 '{source}' 处理完成，共提取 {len(extracted_tables)} 个表格。")
         return extracted_tables
 
+    def _recognize_full_page(self, image: np.ndarray, source: str, image_hash: str = None,
+                             dpi: Optional[float] = None):
+        """整页 OCR 与版面分析并发执行，单页耗时为两者的最大值"""
+        ocr_future = self._ocr_executor.submit(self.ocr_engine.recognize, image, image_hash, dpi)
+        layout_future = self._layout_executor.submit(self.layout_analyzer.analyze, image, "Table", image_hash)
+
+        table_blocks = layout_future.result()
+        if not table_blocks:
+            # 无表格时不必等待 OCR 结束
+            logging.info(f"文档 '{source}' 中未检测到表格。")
+            return [], []
+        return table_blocks, ocr_future.result()
+
+    def _recognize_regions(self, image: np.ndarray, source: str, image_hash: str = None):
+        """先做版面分析，再只对表格及配置的相关文本区域做一次批量 OCR"""
+        block_types = set(self.region_types) | {"Table"}
+        blocks = self._layout_executor.submit(self.layout_analyzer.analyze, image, block_types, image_hash).result()
+        table_blocks = [block for block in blocks if block.type == "Table"]
+        if not table_blocks:
+            logging.info(f"文档 '{source}' 中未检测到表格。")
+            return [], []
+
+        regions = [[int(v) for v in block.coordinates] for block in blocks]
+        ocr_results = self._ocr_executor.submit(
+            self.ocr_engine.recognize_regions, image, regions, self.region_padding, image_hash=image_hash).result()
+        return table_blocks, ocr_results
+
+    @staticmethod
+    def _group_ocr_by_regions(ocr_results: List[Dict[str, Any]],
+                              bboxes: Sequence[Sequence[int]]) -> List[List[Dict[str, Any]]]:
+        """按文本块中心点把 OCR 结果分配到各区域（与 TableParser 的筛选规则一致）"""
+        if not bboxes:
+            return []
+        boxes = np.asarray([item['box'] for item in ocr_results], dtype=np.float64).reshape(len(ocr_results), -1)
+        cx = boxes[:, 0::2].mean(axis=1)[:, None]
+        cy = boxes[:, 1::2].mean(axis=1)[:, None]
+        regions = np.asarray(bboxes, dtype=np.float64)
+        inside = ((cx >= regions[:, 0]) & (cx < regions[:, 2]) &
+                  (cy >= regions[:, 1]) & (cy < regions[:, 3]))
+        return [[ocr_results[i] for i in np.flatnonzero(inside[:, k])] for k in range(len(regions))]
+
     def save_tables(self, tables: List[pd.DataFrame], output_prefix: str = "output_table"):
         import os
         for idx, table in enumerate(tables):
@@ -19,36 +19,111 @@ License: MIT
 import os
 import cv2
 import logging
+import numpy as np
 import layoutparser as lp
-from typing import Dict, Any
+from typing import Dict, Any, Union, Sequence, Optional
+
+from ocr_cache import OCRResultCache, image_content_hash, encode_layout_blocks, decode_layout_blocks
 
 class LayoutAnalyzer:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], result_cache: Optional[OCRResultCache] = None):
         self.config = config
+        self.result_cache = result_cache
         self.layout_config = config.get("layout_analyzer", {})
         self.hf_model_id = self.layout_config.get("hf_model_id")
         self.model_type = self.layout_config.get("model_type", "hf")
         self.cache_dir = self.layout_config.get("cache_dir")
         self.label_map = self.layout_config.get("label_map", {})
         self.detection_threshold = self.layout_config.get("detection_threshold", 0.3)
+        self.onnx_model_path = self.layout_config.get("onnx_model_path")
 
-        if not self.hf_model_id:
-            raise ValueError("Layout Analyzer model ID (hf_model_id) not specified in config.")
-        if not self.cache_dir:
-            raise ValueError("Layout Analyzer cache directory (cache_dir) not specified in config.")
-
-        os.makedirs(self.cache_dir, exist_ok=True)
-        logging.info(f"LayoutAnalyzer: Model '{self.hf_model_id}' will use cache dir '{self.cache_dir}'")
+        if self.model_type == "onnx":
+            if not self.onnx_model_path:
+                raise ValueError("Layout Analyzer ONNX model path (onnx_model_path) not specified in config.")
+            logging.info(f"LayoutAnalyzer: Using ONNX model '{self.onnx_model_path}'")
+        elif self.model_type == "hf":
+            if not self.hf_model_id:
+                raise ValueError("Layout Analyzer model ID (hf_model_id) not specified in config.")
+            if not self.cache_dir:
+                raise ValueError("Layout Analyzer cache directory (cache_dir) not specified in config.")
+            os.makedirs(self.cache_dir, exist_ok=True)
+            logging.info(f"LayoutAnalyzer: Model '{self.hf_model_id}' will use cache dir '{self.cache_dir}'")
+        else:
+            raise ValueError(f"Unsupported layout model_type: {self.model_type} (expected 'hf' or 'onnx')")
 
         self.model = self._load_model()
 
+    @property
+    def model_id(self) -> str:
+        """当前后端的模型标识（缓存键的一部分）"""
+        return self.onnx_model_path if self.model_type == "onnx" else self.hf_model_id
+
     def _load_model(self):
+        if self.model_type == "onnx":
+            from onnx_layout_model import OnnxLayoutModel
+            return OnnxLayoutModel(
+                self.onnx_model_path,
+                label_map=self.label_map,
+                intra_op_threads=self.layout_config.get("intra_op_threads"),
+                min_size=self.layout_config.get("onnx_min_size", 800),
+                max_size=self.layout_config.get("onnx_max_size", 1333),
+            )
+
         model = lp.Detectron2LayoutModel(
             self.hf_model_id,
             extra_config=None,
             label_map=self.label_map,
-            enforce_cpu=False,
+            enforce_cpu=self.layout_config.get("enforce_cpu", False),
             config_path=None,
             cache_dir=self.cache_dir,
         )
-        return model
\ No newline at end of file
+        return model
+
+    def analyze(self, image: Union[str, np.ndarray], block_types: Union[str, Sequence[str]] = "Table",
+                image_hash: str = None) -> lp.Layout:
+        """
+        检测版面并返回指定类型（默认表格）的区块。
+        image 可以是图片路径，也可以是已解码的 BGR 数组；block_types 可为单个类型或类型列表。
+        启用结果缓存时按 (图像哈希, 模型, 检测阈值) 缓存全部类型的区块，image_hash 可由调用方传入。
+        """
+        if isinstance(block_types, str):
+            block_types = (block_types,)
+
+        if isinstance(image, str):
+            image = cv2.imread(image)
+            if image is None:
+                logging.error("LayoutAnalyzer: 无法读取图片。")
+                return lp.Layout([])
+
+        blocks = self._detect_cached(image, image_hash)
+        return lp.Layout([block for block in blocks if block.type in block_types])
+
+    def _detect(self, image: np.ndarray) -> lp.Layout:
+        # layoutparser 模型使用 RGB 输入
+        layout = self.model.detect(np.ascontiguousarray(image[..., ::-1]))
+        return lp.Layout([
+            block for block in layout
+            if block.score is None or block.score >= self.detection_threshold
+        ])
+
+    def _detect_cached(self, image: np.ndarray, image_hash: Optional[str]) -> lp.Layout:
+        if self.result_cache is None:
+            return self._detect(image)
+
+        cache_key = self.result_cache.make_key(
+            "layout", image_hash or image_content_hash(image),
+            self.model_type, self.model_id, self.detection_threshold)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return lp.Layout([
+                lp.TextBlock(lp.Rectangle(*item["coordinates"]), type=item["type"], score=item["score"])
+                for item in decode_layout_blocks(cached)
+            ])
+
+        layout = self._detect(image)
+        self.result_cache.put(cache_key, encode_layout_blocks(
+            [list(block.coordinates) for block in layout],
+            [block.score for block in layout],
+            [block.type for block in layout],
+        ))
+        return layout
@@ -17,11 +17,9 @@ import json
 import logging
 import requests
 import re
-import tempfile
 import uuid
 from typing import Dict, Any, Optional, List, Iterator
 from datetime import datetime
-from docx import Document
 
 class SparkX1Client:
     """星火X1大模型HTTP客户端 - 专为智能填报设计"""
@@ -233,30 +231,24 @@ class SparkX1Client:
     def _create_summary_document(self, content: str) -> Dict[str, str]:
         """创建年度总结Word文档"""
         try:
-            doc = Document()
+            from core.tools.artifact_store import get_artifact_store
+            from core.tools.docx_skeleton import blocks_xml, get_smart_fill_skeleton
+            from core.tools.export_engine import parse_markdown
 
-            # 添加标题
-            title = doc.add_heading('年度工作总结', 0)
-            title.alignment = 1  # 居中对齐
-
-            # 添加日期
-            date_para = doc.add_paragraph(f'日期：{datetime.now().strftime("%Y年%m月%d日")}')
-            date_para.alignment = 2  # 右对齐
-
-            # 添加内容
-            doc.add_paragraph(content)
+            # 预编译骨架只需代入日期和正文段落
+            skeleton = get_smart_fill_skeleton("summary")
+            data = skeleton.fill({
+                "date": datetime.now().strftime("%Y年%m月%d日"),
+                "body": blocks_xml(parse_markdown(content, join_lines=True), skeleton.style_ids),
+            })
 
             # 保存文档
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"年度工作总结_{timestamp}.docx"
-
-            # 创建临时文件
-            temp_dir = tempfile.gettempdir()
-            file_path = os.path.join(temp_dir, filename)
-            doc.save(file_path)
+            artifact = get_artifact_store().put(data, filename)
 
             return {
-                "file_path": file_path,
+                "file_path": artifact.path,
                 "filename": filename
             }
 
@@ -267,70 +259,52 @@ class SparkX1Client:
     def _create_resume_document(self, resume_data: Dict[str, Any]) -> Dict[str, str]:
         """创建简历Word文档"""
         try:
-            doc = Document()
-
-            # 添加标题
-            title = doc.add_heading('个人简历', 0)
-            title.alignment = 1  # 居中对齐
-
-            # 基本信息
-            doc.add_heading('基本信息', level=1)
-            basic_info = doc.add_paragraph()
-            basic_info.add_run(f"姓名：{resume_data.get('姓名', '暂无')}\n")
-            basic_info.add_run(f"电话：{resume_data.get('电话', '暂无')}\n")
-            basic_info.add_run(f"邮箱：{resume_data.get('邮箱', '暂无')}")
-
-            # 个人陈述
-            if resume_data.get('个人陈述') and resume_data['个人陈述'] != '暂无相关内容':
-                doc.add_heading('个人陈述', level=1)
-                doc.add_paragraph(resume_data['个人陈述'])
-
-            # 教育背景
-            doc.add_heading('教育背景', level=1)
-            education_list = resume_data.get('教育背景', [])
-            for edu in education_list:
-                if edu.get('学校') and edu['学校'] != '暂无相关内容':
-                    edu_para = doc.add_paragraph()
-                    edu_para.add_run(f"• {edu.get('时间', '')} - {edu.get('学校', '')}\n")
-                    edu_para.add_run(f"  专业：{edu.get('专业', '')} | 学位：{edu.get('学位', '')}")
-
-            # 工作经验
-            doc.add_heading('工作经验', level=1)
-            work_list = resume_data.get('工作经验', [])
-            for work in work_list:
-                if work.get('公司') and work['公司'] != '暂无相关内容':
-                    work_para = doc.add_paragraph()
-                    work_para.add_run(f"• {work.get('时间', '')} - {work.get('公司', '')}\n")
-                    work_para.add_run(f"  职位：{work.get('职位', '')}\n")
-                    work_para.add_run(f"  职责：{work.get('职责', '')}")
-
-            # 项目经验
-            doc.add_heading('项目经验', level=1)
-            project_list = resume_data.get('项目经验', [])
-            for project in project_list:
-                if project.get('名称') and project['名称'] != '暂无相关内容':
-                    proj_para = doc.add_paragraph()
-                    proj_para.add_run(f"• {project.get('名称', '')} ({project.get('时间', '')})\n")
-                    proj_para.add_run(f"  角色：{project.get('角色', '')}\n")
-                    proj_para.add_run(f"  描述：{project.get('描述', '')}")
-
-            # 专业技能
-            if resume_data.get('专业技能') and resume_data['专业技能'] != '暂无相关内容':
-                doc.add_heading('专业技能', level=1)
-                doc.add_paragraph(resume_data['专业技能'])
+            from core.tools.artifact_store import get_artifact_store
+            from core.tools.docx_skeleton import get_smart_fill_skeleton
+            from core.tools.docx_writer import paragraph_xml
+
+            skeleton = get_smart_fill_skeleton("resume")
+            heading, body = skeleton.style_ids["heading1"], skeleton.style_ids["body"]
+
+            def has_content(value: Any) -> bool:
+                return bool(value) and value != '暂无相关内容'
+
+            def entries(key: str, required: str, lines) -> List[str]:
+                return [paragraph_xml("\n".join(lines(item)), body)
+                        for item in resume_data.get(key, []) if has_content(item.get(required))]
+
+            def section(title: str, key: str) -> List[str]:
+                if not has_content(resume_data.get(key)):
+                    return []
+                return [paragraph_xml(title, heading), paragraph_xml(resume_data[key], body)]
+
+            data = skeleton.fill({
+                "name": resume_data.get('姓名', '暂无'),
+                "phone": resume_data.get('电话', '暂无'),
+                "email": resume_data.get('邮箱', '暂无'),
+                "statement": section('个人陈述', '个人陈述'),
+                "education": entries('教育背景', '学校', lambda edu: [
+                    f"• {edu.get('时间', '')} - {edu.get('学校', '')}",
+                    f"  专业：{edu.get('专业', '')} | 学位：{edu.get('学位', '')}"]),
+                "work": entries('工作经验', '公司', lambda work: [
+                    f"• {work.get('时间', '')} - {work.get('公司', '')}",
+                    f"  职位：{work.get('职位', '')}",
+                    f"  职责：{work.get('职责', '')}"]),
+                "projects": entries('项目经验', '名称', lambda project: [
+                    f"• {project.get('名称', '')} ({project.get('时间', '')})",
+                    f"  角色：{project.get('角色', '')}",
+                    f"  描述：{project.get('描述', '')}"]),
+                "skills": section('专业技能', '专业技能'),
+            })
 
             # 保存文档
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            name = resume_data.get('姓名', '未知')
+            name = re.sub(r'[\\/:*?"<>|]', '_', str(resume_data.get('姓名', '未知')))
             filename = f"个人简历_{name}_{timestamp}.docx"
-
-            # 创建临时文件
-            temp_dir = tempfile.gettempdir()
-            file_path = os.path.join(temp_dir, filename)
-            doc.save(file_path)
+            artifact = get_artifact_store().put(data, filename)
 
             return {
-                "file_path": file_path,
+                "file_path": artifact.path,
                 "filename": filename
             }
 
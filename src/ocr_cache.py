@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR / 版面分析结果缓存
+
+以 (图像内容哈希, 模型配置) 为键持久化 OCR 与版面分析结果，同一扫描模板再次处理时直接跳过模型推理。
+结果以紧凑的二进制数组（npz）存放在 SQLite 中，按最近访问时间做 LRU 淘汰，总大小不超过上限。
+SQLite 采用 WAL 模式，进程池中的多个工作进程可以共享同一个缓存文件。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import io
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = "data/ocr_cache/ocr_cache.sqlite3"
+DEFAULT_MAX_SIZE_MB = 512
+
+
+def image_content_hash(image: Union[str, bytes, np.ndarray]) -> str:
+    """
+    计算图像内容哈希。ndarray 按像素和形状计算（与来源文件格式无关）；
+    路径 / bytes 按文件字节计算。PIL Image 可传入 np.asarray(image)。
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    if isinstance(image, np.ndarray):
+        hasher.update(str((image.shape, image.dtype.str)).encode())
+        hasher.update(np.ascontiguousarray(image).data)
+    elif isinstance(image, str):
+        with open(image, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+    else:
+        hasher.update(image)
+    return hasher.hexdigest()
+
+
+def _encode_texts(texts: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {"text_bytes": np.frombuffer(b''.join(encoded), dtype=np.uint8), "text_offsets": offsets}
+
+
+def _decode_texts(arrays: Dict[str, np.ndarray]) -> List[str]:
+    data = arrays["text_bytes"].tobytes()
+    offsets = arrays["text_offsets"]
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def encode_ocr_results(results: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """OCR 结果 → 数组：boxes int32 (N, 8)、confidences float64、文本字节 + 偏移"""
+    arrays = _encode_texts([item["text"] for item in results])
+    arrays["boxes"] = np.asarray([item["box"] for item in results], dtype=np.int32).reshape(-1, 8)
+    arrays["confidences"] = np.asarray([item["confidence"] for item in results], dtype=np.float64)
+    return arrays
+
+
+def decode_ocr_results(arrays: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    texts = _decode_texts(arrays)
+    boxes = arrays["boxes"].tolist()
+    confidences = arrays["confidences"].tolist()
+    return [{"text": text, "box": box, "confidence": confidence}
+            for text, box, confidence in zip(texts, boxes, confidences)]
+
+
+def encode_layout_blocks(coordinates: List[List[float]], scores: List[Optional[float]],
+                         types: List[str]) -> Dict[str, np.ndarray]:
+    """版面区块 → 数组：coordinates float32 (N, 4)、scores float32（NaN 表示无分数）、类型字节 + 偏移"""
+    arrays = _encode_texts([str(t) for t in types])
+    arrays["coordinates"] = np.asarray(coordinates, dtype=np.float32).reshape(len(types), 4)
+    arrays["scores"] = np.asarray([np.nan if s is None else s for s in scores], dtype=np.float32)
+    return arrays
+
+
+def decode_layout_blocks(arrays: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    types = _decode_texts(arrays)
+    return [{"coordinates": coords, "score": None if np.isnan(score) else float(score), "type": block_type}
+            for coords, score, block_type in zip(arrays["coordinates"].tolist(), arrays["scores"], types)]
+
+
+class OCRResultCache:
+    """基于 SQLite 的 OCR / 版面结果缓存，LRU + 总大小上限"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._local = threading.local()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_access ON ocr_cache(last_access)")
+        conn.commit()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取线程本地的数据库连接"""
+        if not hasattr(self._local, 'connection'):
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = conn
+        return self._local.connection
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """由图像哈希与模型配置等组成缓存键"""
+        return hashlib.sha256("\x1f".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            conn = self._get_connection()
+            row = conn.execute("SELECT payload FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            conn.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.stats["hits"] += 1
+            with np.load(io.BytesIO(row[0]), allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        except Exception as e:
+            logging.warning(f"OCR 缓存读取失败: {e}")
+            return None
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]):
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        payload = buffer.getvalue()
+        try:
+            conn = self._get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(payload), len(payload), time.time()))
+            conn.commit()
+            self._evict(conn)
+        except Exception as e:
+            logging.warning(f"OCR 缓存写入失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """总大小超过上限时，按最近访问时间从旧到新淘汰"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_access"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM ocr_cache WHERE key = ?", victims)
+        conn.commit()
+        self.stats["evictions"] += len(victims)
+
+    def clear(self):
+        conn = self._get_connection()
+        conn.execute("DELETE FROM ocr_cache")
+        conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        conn = self._get_connection()
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()
+        return dict(self.stats, entries=count, size_bytes=total, max_bytes=self.max_bytes)
+
+
+def create_result_cache(config: Dict[str, Any]) -> Optional[OCRResultCache]:
+    """根据配置中的 ocr_cache 段创建缓存，未启用时返回 None"""
+    cache_config = config.get("ocr_cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+    try:
+        return OCRResultCache(
+            path=cache_config.get("path", DEFAULT_CACHE_PATH),
+            max_size_mb=cache_config.get("max_size_mb", DEFAULT_MAX_SIZE_MB),
+        )
+    except Exception as e:
+        logging.warning(f"OCR 缓存初始化失败，将不使用缓存: {e}")
+        return None
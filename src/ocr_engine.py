@@ -28,35 +28,180 @@ License: MIT
 import os
 import cv2
 import logging
+import numpy as np
+import paddleocr
 from paddleocr import PaddleOCR
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union, Sequence, Tuple, Optional
+
+from ocr_cache import OCRResultCache, image_content_hash, encode_ocr_results, decode_ocr_results
+from ocr_preprocess import OCRPreprocessor, read_image_dpi
 
 class PaddleOCRWrapper:
-    def __init__(self, lang='ch', use_gpu=False, **kwargs):
+    def __init__(self, lang='ch', use_gpu=False, result_cache: Optional[OCRResultCache] = None,
+                 preprocessor: Optional[OCRPreprocessor] = None, **kwargs):
         self.ocr_engine = PaddleOCR(use_angle_cls=True, lang=lang, use_gpu=use_gpu, **kwargs)
+        self.lang = lang
+        self.result_cache = result_cache
+        self.preprocessor = preprocessor
+        # 模型版本标识：PaddleOCR 版本 + 影响识别结果的初始化参数（模型目录等），作为缓存键的一部分
+        self.model_version = f"paddleocr-{getattr(paddleocr, '__version__', 'unknown')}:{sorted(kwargs.items())}"
         logging.info(f"PaddleOCR initialized with lang='{lang}', use_gpu={use_gpu}")
 
-    def recognize(self, image_path: str) -> List[Dict[str, Any]]:
-        if not os.path.exists(image_path):
-            logging.error(f"OCR 错误: 文件 '{image_path}' 不存在。")
+    def recognize(self, image: Union[str, np.ndarray], image_hash: str = None,
+                  dpi: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        识别图片文字。image 可以是图片路径，也可以是已解码的 BGR 数组。
+        启用结果缓存时，image_hash 可传入调用方已算好的图像内容哈希，避免重复计算。
+        启用前处理时，dpi 为扫描分辨率（传入路径时从文件读取），返回的框坐标始终对应原图。
+        """
+        if isinstance(image, str) and not os.path.exists(image):
+            logging.error(f"OCR 错误: 文件 '{image}' 不存在。")
+            return []
+
+        cache_key = self._cache_key("ocr", image, image_hash, dpi)
+        if cache_key:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return decode_ocr_results(cached)
+
+        try:
+            if self.preprocessor is not None and isinstance(image, str):
+                dpi = dpi or read_image_dpi(image)
+                image = cv2.imread(image)
+                if image is None:
+                    logging.error("OCR 错误: 无法读取图片。")
+                    return []
+            extracted_texts = self._run_ocr(image, dpi)
+        except Exception as e:
+            logging.error(f"OCR 过程中发生错误: {e}")
+            return []
+
+        if cache_key:
+            self.result_cache.put(cache_key, encode_ocr_results(extracted_texts))
+        return extracted_texts
+
+    def _run_ocr(self, image: Union[str, np.ndarray], dpi: Optional[float] = None) -> List[Dict[str, Any]]:
+        prepared = None
+        if self.preprocessor is not None and isinstance(image, np.ndarray):
+            prepared = self.preprocessor.process(image, dpi)
+            logging.debug(f"OCR 前处理: scale={prepared.scale:.3f}, deskew={prepared.angle:.2f}°, "
+                          f"{image.shape[1]}x{image.shape[0]} → {prepared.image.shape[1]}x{prepared.image.shape[0]}")
+            image = prepared.image
+
+        result = self.ocr_engine.ocr(image, cls=True)
+
+        extracted_texts = []
+        if result and result[0]:
+            for line in result[0]:
+                if line:
+                    # PaddleOCR 返回四个 [x, y] 顶点，展平为 [x1, y1, ..., x4, y4]
+                    bbox = [int(coord) for point in line[0] for coord in point]
+                    if prepared is not None and not prepared.is_identity:
+                        bbox = prepared.to_original(bbox)
+                    text = line[1][0]
+                    confidence = line[1][1]
+                    extracted_texts.append({
+                        "text": text,
+                        "box": bbox,
+                        "confidence": confidence
+                    })
+        return extracted_texts
+
+    def _cache_key(self, kind: str, image: Union[str, np.ndarray], image_hash: Optional[str], *extra) -> Optional[str]:
+        if self.result_cache is None:
+            return None
+        if image_hash is None:
+            image_hash = image_content_hash(image)
+        preprocess = self.preprocessor.signature if self.preprocessor is not None else None
+        return self.result_cache.make_key(kind, image_hash, self.lang, self.model_version, preprocess, *extra)
+
+    def recognize_regions(self, image: Union[str, np.ndarray], regions: Sequence[Sequence[int]],
+                          padding: int = 8, gap: int = 32, image_hash: str = None) -> List[Dict[str, Any]]:
+        """
+        只识别指定区域内的文字。各区域（四周外扩 padding 像素）裁剪后纵向拼接到一张白底画布上，
+        区域之间留 gap 像素空白，整张画布只做一次 OCR 调用；返回的框坐标已映射回原图。
+        """
+        if isinstance(image, str):
+            if not os.path.exists(image):
+                logging.error(f"OCR 错误: 文件 '{image}' 不存在。")
+                return []
+            image = cv2.imread(image)
+            if image is None:
+                logging.error("OCR 错误: 无法读取图片。")
+                return []
+
+        merged_regions = _merge_regions(regions)
+        cache_key = self._cache_key("ocr_regions", image, image_hash, merged_regions, padding, gap)
+        if cache_key:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return decode_ocr_results(cached)
+
+        height, width = image.shape[:2]
+        crops = []
+        for x1, y1, x2, y2 in merged_regions:
+            x1, y1 = max(0, int(x1) - padding), max(0, int(y1) - padding)
+            x2, y2 = min(width, int(x2) + padding), min(height, int(y2) + padding)
+            if x2 > x1 and y2 > y1:
+                crops.append((x1, y1, image[y1:y2, x1:x2]))
+        if not crops:
             return []
 
+        canvas_width = max(crop.shape[1] for _, _, crop in crops)
+        canvas_height = sum(crop.shape[0] for _, _, crop in crops) + gap * (len(crops) - 1)
+        canvas = np.full((canvas_height, canvas_width) + image.shape[2:], 255, dtype=image.dtype)
+
+        # 每个区域在画布上的纵向范围及其到原图坐标的平移量
+        spans = []
+        top = 0
+        for x1, y1, crop in crops:
+            crop_height, crop_width = crop.shape[:2]
+            canvas[top:top + crop_height, :crop_width] = crop
+            spans.append((top, top + crop_height, x1, y1 - top))
+            top += crop_height + gap
+
         try:
-            result = self.ocr_engine.ocr(image_path, cls=True)
-            
-            extracted_texts = []
-            if result and result[0]:
-                for line in result[0]:
-                    if line:
-                        bbox = [int(coord) for coord in line[0]]
-                        text = line[1][0]
-                        confidence = line[1][1]
-                        extracted_texts.append({
-                            "text": text,
-                            "box": bbox,
-                            "confidence": confidence
-                        })
-            return extracted_texts
+            results = self._run_ocr(canvas)
         except Exception as e:
             logging.error(f"OCR 过程中发生错误: {e}")
             return []
+
+        span_tops = np.array([span[0] for span in spans])
+        remapped = []
+        for item in results:
+            box = item["box"]
+            center_y = sum(box[1::2]) / len(box[1::2])
+            top, bottom, dx, dy = spans[max(int(np.searchsorted(span_tops, center_y, side="right")) - 1, 0)]
+            if not (top <= center_y < bottom):
+                # 落在区域间空白上的误检
+                continue
+            remapped.append({
+                "text": item["text"],
+                "box": [v + dx if k % 2 == 0 else v + dy for k, v in enumerate(box)],
+                "confidence": item["confidence"],
+            })
+
+        if cache_key:
+            self.result_cache.put(cache_key, encode_ocr_results(remapped))
+        return remapped
+
+
+def _merge_regions(regions: Sequence[Sequence[int]]) -> List[Tuple[int, int, int, int]]:
+    """合并相交的区域，避免重叠部分被重复识别"""
+    merged = [tuple(int(v) for v in region) for region in regions]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for region in merged:
+            for k, other in enumerate(result):
+                if region[0] < other[2] and other[0] < region[2] and region[1] < other[3] and other[1] < region[3]:
+                    result[k] = (min(region[0], other[0]), min(region[1], other[1]),
+                                 max(region[2], other[2]), max(region[3], other[3]))
+                    changed = True
+                    break
+            else:
+                result.append(region)
+        merged = result
+    # 按原图自上而下排列
+    return sorted(merged, key=lambda r: (r[1], r[0]))
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多页 OCR 表格提取流水线
+
+将多页扫描件（多页 TIFF）或图片目录拆分为页面任务，交给进程池并行处理。
+每个工作进程在初始化时各自加载一套 OCR / 版面分析模型（DocumentProcessor），
+页面结果按页序流式返回，并可作为处理器注册到 BatchProcessor。
+
+Author: AI Assistant (Claude)
+Created: 2025-01-28
+Last Modified: 2025-01-28
+Modified By: AI Assistant (Claude)
+AI Assisted: 是 - Claude 3.5 Sonnet
+Version: v1.0
+License: MIT
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from ocr_preprocess import read_image_dpi
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+MULTIPAGE_EXTENSIONS = ('.tif', '.tiff')
+
+
+@dataclass
+class PageTask:
+    """页面任务：文档路径 + 页码（从 0 开始）"""
+    document: str
+    page_index: int
+    page_count: int = 1
+
+
+@dataclass
+class PageResult:
+    """页面处理结果"""
+    document: str
+    page_index: int
+    tables: List[pd.DataFrame] = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+def count_pages(path: str) -> int:
+    """统计图片页数，多页 TIFF 返回实际页数，其余图片为 1"""
+    if not path.lower().endswith(MULTIPAGE_EXTENSIONS):
+        return 1
+    if hasattr(cv2, "imcount"):
+        return max(int(cv2.imcount(path)), 1)
+    ok, pages = cv2.imreadmulti(path)
+    return len(pages) if ok else 1
+
+
+def load_page(path: str, page_index: int = 0) -> Optional[np.ndarray]:
+    """解码指定页面为 BGR 数组"""
+    if page_index == 0 and not path.lower().endswith(MULTIPAGE_EXTENSIONS):
+        return cv2.imread(path)
+    try:
+        # 只解码目标页（OpenCV >= 4.5）
+        ok, pages = cv2.imreadmulti(path, start=page_index, count=1, flags=cv2.IMREAD_COLOR)
+    except cv2.error:
+        ok, pages = cv2.imreadmulti(path, flags=cv2.IMREAD_COLOR)
+        pages = pages[page_index:page_index + 1] if ok else []
+    return pages[0] if ok and pages else None
+
+
+def expand_pages(sources: Iterable[str]) -> List[PageTask]:
+    """把文件 / 目录列表展开为页面任务列表（目录按文件名排序）"""
+    tasks = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths = [os.path.join(source, name) for name in sorted(os.listdir(source))
+                     if name.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            paths = [source]
+
+        for path in paths:
+            if not os.path.isfile(path):
+                logging.warning(f"OCRPipeline: 文件 '{path}' 不存在，已跳过。")
+                continue
+            page_count = count_pages(path)
+            tasks.extend(PageTask(path, i, page_count) for i in range(page_count))
+    return tasks
+
+
+# ----------------------------------------------------------------------
+# 工作进程
+# ----------------------------------------------------------------------
+
+_worker_processor = None
+
+
+def _init_worker(config_path: str, threads_per_worker: Optional[int]):
+    """工作进程初始化：限制算子线程数并加载本进程专属的模型"""
+    global _worker_processor
+    if threads_per_worker:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads_per_worker)
+        cv2.setNumThreads(threads_per_worker)
+
+    from doc_processor import DocumentProcessor
+    _worker_processor = DocumentProcessor(config_path)
+    _worker_processor.warm_up(background=False)
+    logging.info(f"OCRPipeline 工作进程 {os.getpid()} 模型加载完成")
+
+
+def _run_page(task: PageTask) -> PageResult:
+    start = time.time()
+    try:
+        image = load_page(task.document, task.page_index)
+        if image is None:
+            return PageResult(task.document, task.page_index, error="无法读取页面图像")
+        source = task.document if task.page_count == 1 else f"{task.document}#{task.page_index + 1}"
+        dpi = read_image_dpi(task.document) if _worker_processor.preprocessor is not None else None
+        tables = _worker_processor.process_image(image, source=source, dpi=dpi)
+        return PageResult(task.document, task.page_index, tables, elapsed=time.time() - start)
+    except Exception as e:
+        logging.error(f"OCRPipeline: 页面 {task.document}#{task.page_index + 1} 处理失败: {e}")
+        return PageResult(task.document, task.page_index, error=str(e), elapsed=time.time() - start)
+
+
+# ----------------------------------------------------------------------
+# 流水线
+# ----------------------------------------------------------------------
+
+class OCRPipeline:
+    """进程池并行的多页 OCR 表格提取流水线"""
+
+    def __init__(self, config_path: str = "config/config.yaml", max_workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = 1, prefetch: int = 2):
+        """
+        Args:
+            config_path: 配置文件路径（工作进程各自加载）
+            max_workers: 工作进程数，默认等于 CPU 核数
+            threads_per_worker: 每个进程的算子线程数，避免多进程之间线程超订
+            prefetch: 每个工作进程预先排队的页面数
+        """
+        self.config_path = os.path.abspath(config_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker
+        self.prefetch = max(1, prefetch)
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # 模型库不保证 fork 安全，使用 spawn 启动工作进程
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.config_path, self.threads_per_worker),
+                )
+                logging.info(f"OCRPipeline 进程池已启动，工作进程数: {self.max_workers}")
+            return self._executor
+
+    def iter_results(self, sources: Union[str, Iterable[str]]) -> Iterator[PageResult]:
+        """
+        按页序流式返回结果。提交窗口有上限，前面的页面一完成即返回，
+        无需等待整批结束，大目录也不会一次性堆积全部任务。
+        """
+        if isinstance(sources, str):
+            sources = [sources]
+        tasks = iter(expand_pages(sources))
+        executor = self._get_executor()
+        window = self.max_workers * self.prefetch
+
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(_run_page, task))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            future = pending.popleft()
+            next_task = next(tasks, None)
+            if next_task is not None:
+                pending.append(executor.submit(_run_page, next_task))
+            yield future.result()
+
+    def process(self, sources: Union[str, Iterable[str]]) -> Dict[str, List[pd.DataFrame]]:
+        """处理全部页面，按文档汇总提取到的表格"""
+        results: Dict[str, List[pd.DataFrame]] = {}
+        for page in self.iter_results(sources):
+            results.setdefault(page.document, []).extend(page.tables)
+        return results
+
+    def process_file(self, file_path: str, processing_config: Dict[str, Any]) -> Dict[str, Any]:
+        """BatchProcessor 处理器接口：处理单个文件（可为多页），可选将表格保存为 CSV"""
+        output_dir = processing_config.get('output_dir')
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        prefix = os.path.splitext(os.path.basename(file_path))[0]
+
+        page_count = 0
+        table_count = 0
+        output_files = []
+        errors = []
+        for page in self.iter_results(file_path):
+            page_count += 1
+            if page.error:
+                errors.append(f"第 {page.page_index + 1} 页: {page.error}")
+                continue
+            for idx, table in enumerate(page.tables):
+                table_count += 1
+                if output_dir:
+                    output_path = os.path.join(output_dir, f"{prefix}_p{page.page_index + 1}_t{idx + 1}.csv")
+                    table.to_csv(output_path, index=False)
+                    output_files.append(output_path)
+
+        return {
+            'success': page_count > 0 and not errors,
+            'pages': page_count,
+            'tables': table_count,
+            'output_files': output_files,
+            'error': '; '.join(errors) if errors else (None if page_count else "未找到可处理的页面"),
+        }
+
+    def register(self, batch_processor=None, operation: str = "ocr_tables"):
+        """注册到 BatchProcessor，默认使用全局批量处理器"""
+        if batch_processor is None:
+            from core.tools.batch_processor import get_batch_processor
+            batch_processor = get_batch_processor()
+        batch_processor.register_processor(operation, self.process_file)
+        return batch_processor
+
+    def shutdown(self, wait: bool = True):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+# 全局流水线实例
+_global_ocr_pipeline = None
+
+
+def get_ocr_pipeline() -> OCRPipeline:
+    """获取全局 OCR 流水线实例"""
+    global _global_ocr_pipeline
+    if _global_ocr_pipeline is None:
+        _global_ocr_pipeline = OCRPipeline()
+    return _global_ocr_pipeline
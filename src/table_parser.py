@@ -30,7 +30,84 @@ import numpy as np
 import pandas as pd
 import logging
 from typing import List, Dict, Any, Tuple
-from sklearn.cluster import KMeans
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """布尔数组中连续 True 区间的 [start, end) 边界"""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def _projection_bands(starts: np.ndarray, ends: np.ndarray, tolerance: float,
+                      min_gap: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    一维投影间隙检测：统计每个像素位置被多少个框覆盖。覆盖数不超过
+    max(覆盖数) * tolerance（至少为 1）的位置视为弱覆盖，两侧都有强覆盖时即为分隔带，
+    这样少量跨行/跨列的合并单元格不会抹掉真实的分隔带；
+    完全由弱覆盖组成、与其他内容之间有空白的区段（稀疏列/行）单独成带。
+    """
+    origin = np.floor(starts.min())
+    s = np.floor(starts - origin).astype(np.int64)
+    e = np.maximum(np.ceil(ends - origin).astype(np.int64), s + 1)
+    length = int(e.max()) + 1
+
+    # 差分数组 + 前缀和得到覆盖数
+    coverage = np.cumsum(np.bincount(s, minlength=length) - np.bincount(e, minlength=length))[:-1]
+    peak = int(coverage.max())
+    threshold = max(1, int(peak * tolerance)) if peak > 1 else 0
+    strong = coverage > threshold
+
+    band_starts, band_ends = _runs(strong)
+    segment_starts, segment_ends = _runs(coverage > 0)
+    weak_only = ~np.maximum.reduceat(strong, segment_starts)
+    if weak_only.any():
+        band_starts = np.concatenate((band_starts, segment_starts[weak_only]))
+        band_ends = np.concatenate((band_ends, segment_ends[weak_only]))
+        order = np.argsort(band_starts)
+        band_starts, band_ends = band_starts[order], band_ends[order]
+
+    # 合并过窄的分隔带（如同一单元格内词与词之间的空隙）
+    if len(band_starts) > 1 and min_gap > 1:
+        keep = np.concatenate(([True], band_starts[1:] - band_ends[:-1] >= min_gap))
+        last_of_group = np.concatenate((np.flatnonzero(keep)[1:] - 1, [len(band_ends) - 1]))
+        band_starts, band_ends = band_starts[keep], band_ends[last_of_group]
+
+    return band_starts + origin, band_ends + origin
+
+
+def _assign_bands(starts: np.ndarray, ends: np.ndarray, band_starts: np.ndarray,
+                  band_ends: np.ndarray, min_overlap: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算每个框覆盖的首、末带索引（含）。首末不同即为合并单元格；
+    与边缘带的重叠不足带宽 min_overlap 的部分视为越界误差并剔除。
+    """
+    n_bands = len(band_starts)
+    first = np.searchsorted(band_ends, starts, side='right')
+    last = np.searchsorted(band_starts, ends, side='left') - 1
+
+    # 完全落在分隔带内的框归入中心最近的带
+    orphan = first > last
+    if orphan.any():
+        band_centers = (band_starts + band_ends) / 2
+        centers = (starts[orphan] + ends[orphan]) / 2
+        right = np.clip(np.searchsorted(band_centers, centers), 0, n_bands - 1)
+        left = np.maximum(right - 1, 0)
+        nearest = np.where(np.abs(centers - band_centers[left]) <= np.abs(centers - band_centers[right]),
+                           left, right)
+        first[orphan] = nearest
+        last[orphan] = nearest
+
+    widths = band_ends - band_starts
+    overlap_first = np.minimum(ends, band_ends[first]) - np.maximum(starts, band_starts[first])
+    trim = (first < last) & (overlap_first < min_overlap * widths[first])
+    first[trim] += 1
+    overlap_last = np.minimum(ends, band_ends[last]) - np.maximum(starts, band_starts[last])
+    trim = (first < last) & (overlap_last < min_overlap * widths[last])
+    last[trim] -= 1
+
+    return first, last
+
 
 class TableParser:
     def __init__(self, config: Dict[str, Any]):
@@ -38,6 +115,14 @@ class TableParser:
         self.table_config = config.get("table_parser", {})
         self.strategy = self.table_config.get("strategy", "ocr_based_rule")
 
+        # 行/列聚类参数
+        self.row_tolerance = self.table_config.get("row_tolerance", 0.2)
+        self.col_tolerance = self.table_config.get("col_tolerance", 0.2)
+        self.row_shrink = self.table_config.get("row_shrink", 0.15)
+        self.min_span_overlap = self.table_config.get("min_span_overlap", 0.3)
+        # 合并单元格的填充方式: "anchor" 仅左上角单元格填文本, "repeat" 覆盖区域全部填充
+        self.span_fill = self.table_config.get("span_fill", "anchor")
+
         if self.strategy == "ocr_based_rule":
             logging.info("TableParser 初始化: 使用 OCR-based Rule 策略。")
         else:
@@ -52,82 +137,77 @@ class TableParser:
 
     def _parse_ocr_based(self, image_path: str, table_bbox: Tuple[int, int, int, int], ocr_results: List[Dict[str, Any]]) -> pd.DataFrame:
         x1, y1, x2, y2 = table_bbox
-        
-        # 筛选出在当前表格区域内的 OCR 结果
-        relevant_ocr = []
-        for item in ocr_results:
-            bbox = item['box']
-            # 检查 OCR 文本的中心点是否在表格区域内
-            cx = (bbox[0] + bbox[2] + bbox[4] + bbox[6]) / 4
-            cy = (bbox[1] + bbox[3] + bbox[5] + bbox[7]) / 4
-            if x1 <= cx < x2 and y1 <= cy < y2:
-                # 将 OCR 框坐标转换为相对于表格区域的坐标
-                relative_bbox = [
-                    bbox[0] - x1, bbox[1] - y1,
-                    bbox[2] - x1, bbox[3] - y1,
-                    bbox[4] - x1, bbox[5] - y1,
-                    bbox[6] - x1, bbox[7] - y1
-                ]
-                relevant_ocr.append({
-                    "text": item['text'],
-                    "box": relative_bbox,
-                    "confidence": item['confidence']
-                })
-
-        if not relevant_ocr:
+
+        if not ocr_results:
+            logging.warning(f"在表格区域 {table_bbox} 内未找到相关的 OCR 结果。")
+            return pd.DataFrame()
+
+        # 一次性转成 (N, 8) 坐标数组，框坐标转换为相对于表格区域的坐标
+        boxes = np.asarray([item['box'] for item in ocr_results], dtype=np.float64).reshape(len(ocr_results), -1)
+        xs = boxes[:, 0::2] - x1
+        ys = boxes[:, 1::2] - y1
+
+        # 按中心点筛选出在当前表格区域内的 OCR 结果
+        cx = xs.mean(axis=1)
+        cy = ys.mean(axis=1)
+        inside = (cx >= 0) & (cx < x2 - x1) & (cy >= 0) & (cy < y2 - y1)
+        if not inside.any():
             logging.warning(f"在表格区域 {table_bbox} 内未找到相关的 OCR 结果。")
             return pd.DataFrame()
 
-        # 尝试聚类行
-        y_centers = np.array([sum(item['box'][1::2]) / len(item['box'][1::2]) for item in relevant_ocr]).reshape(-1, 1)
-        
-        # 基于行的阈值聚类
-        row_threshold = (y2 - y1) * 0.1  # 假设行的间隙阈值是表格高度的10%
-        current_row_y_start = relevant_ocr[0]['box'][1]
-        current_row_texts = [relevant_ocr[0]]
-        rows = []
-        
-        for i in range(1, len(relevant_ocr)):
-            text_item = relevant_ocr[i]
-            text_y_center = sum(text_item['box'][1::2]) / len(text_item['box'][1::2])
-            
-            if text_y_center - current_row_y_start > row_threshold:
-                rows.append(current_row_texts)
-                current_row_texts = [text_item]
-                current_row_y_start = text_y_center
-            else:
-                current_row_texts.append(text_item)
-        rows.append(current_row_texts)  # 添加最后一行
-
-        if not rows:
+        index = np.flatnonzero(inside)
+        texts = np.asarray([ocr_results[i]['text'] for i in index], dtype=object)
+        x_min, x_max = xs[index].min(axis=1), xs[index].max(axis=1)
+        y_min, y_max = ys[index].min(axis=1), ys[index].max(axis=1)
+        cy = cy[index]
+
+        return self._reconstruct_table(texts, x_min, y_min, x_max, y_max, cy)
+
+    def _reconstruct_table(self, texts: np.ndarray, x_min: np.ndarray, y_min: np.ndarray,
+                           x_max: np.ndarray, y_max: np.ndarray, cy: np.ndarray) -> pd.DataFrame:
+        """基于框坐标数组的表格重建：行列投影聚类、合并单元格识别、直接生成 DataFrame"""
+        heights = np.maximum(y_max - y_min, 1.0)
+        median_height = float(np.median(heights))
+
+        # 行：上下各收缩一部分框高，避免相邻行的框轻微重叠导致行粘连
+        shrink = heights * self.row_shrink
+        row_starts, row_ends = y_min + shrink, y_max - shrink
+        row_bands = _projection_bands(row_starts, row_ends, self.row_tolerance)
+        row_first, row_last = _assign_bands(row_starts, row_ends, *row_bands, self.min_span_overlap)
+
+        # 列：小于半个字高的空隙视为同一单元格内的词间距
+        col_bands = _projection_bands(x_min, x_max, self.col_tolerance, min_gap=median_height * 0.5)
+        col_first, col_last = _assign_bands(x_min, x_max, *col_bands, self.min_span_overlap)
+
+        n_rows, n_cols = len(row_bands[0]), len(col_bands[0])
+        if n_rows == 0 or n_cols == 0:
             logging.warning("未能解析出表格的行结构。")
             return pd.DataFrame()
 
-        # 填充 DataFrame
-        max_cols = 0
-        table_data = []
-        for row_texts in rows:
-            row_data = {}
-            # 尝试对同一行内的文本按 X 坐标排序作为列
-            row_texts.sort(key=lambda x: x['box'][0])
-            
-            for col_idx, text_item in enumerate(row_texts):
-                col_key = f"Col_{col_idx}"
-                row_data[col_key] = text_item['text']
-                if col_idx + 1 > max_cols:
-                    max_cols = col_idx + 1
-            
-            # 填充空单元格
-            for i in range(max_cols):
-                col_key = f"Col_{i}"
-                if col_key not in row_data:
-                    row_data[col_key] = ""
-            
-            table_data.append(row_data)
-
-        if not table_data:
-            logging.warning("未能从行数据生成表格数据。"); return pd.DataFrame()
-
-        df = pd.DataFrame(table_data)
+        # 同一单元格内的多个框按文本行、再按 X 坐标排序后拼接
+        cell = row_first * n_cols + col_first
+        line_key = np.floor(cy / max(median_height, 1.0))
+        order = np.lexsort((x_min, line_key, cell))
+        cell_sorted = cell[order]
+        group_head = np.concatenate(([True], cell_sorted[1:] != cell_sorted[:-1]))
+        separators = np.where(group_head, "", " ").astype(object)
+        group_starts = np.flatnonzero(group_head)
+        joined = np.add.reduceat(separators + texts[order], group_starts)
+
+        grid = np.full(n_rows * n_cols, "", dtype=object)
+        grid[cell_sorted[group_starts]] = joined
+        grid = grid.reshape(n_rows, n_cols)
+
+        # 合并单元格
+        spanning = np.flatnonzero((row_last > row_first) | (col_last > col_first))
+        merged_cells = []
+        for i in spanning:
+            r0, r1, c0, c1 = int(row_first[i]), int(row_last[i]), int(col_first[i]), int(col_last[i])
+            merged_cells.append({"row": r0, "col": c0, "rowspan": r1 - r0 + 1, "colspan": c1 - c0 + 1})
+            if self.span_fill == "repeat":
+                grid[r0:r1 + 1, c0:c1 + 1] = grid[r0, c0]
+
+        df = pd.DataFrame(grid, columns=[f"Col_{i}" for i in range(n_cols)])
+        df.attrs["merged_cells"] = merged_cells
         logging.info(f"成功解析出表格，行数: {len(df)}, 列数: {len(df.columns) if not df.empty else 0}")
         return df
@@ -7,9 +7,6 @@
 import os
 import yaml
 import logging
-from transformers import AutoModel, AutoTokenizer, AutoConfig
-import layoutparser as lp
-import requests
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
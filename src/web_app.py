@@ -30,7 +30,7 @@ import json
 import uuid
 import time
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template, send_from_directory, make_response
+from flask import Flask, request, jsonify, render_template, send_from_directory, send_file, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
@@ -63,11 +63,34 @@ CORS(app)
 # 确保上传目录存在
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# 大文件交给前端代理（nginx X-Accel / Apache X-Sendfile）发送，需代理配合时通过环境变量开启
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
+def send_stored_artifact(artifact, download_name=None):
+    """
+    返回生成文件存储中的文件：ETag 使用写入时计算的内容摘要，支持 Range 断点续传与 If-None-Match 条件请求；
+    文件对象交给 WSGI 服务器的 file_wrapper，由服务器以 sendfile 发送
+    """
+    return send_file(
+        artifact.path,
+        mimetype=artifact.mimetype,
+        as_attachment=True,
+        download_name=download_name or artifact.filename,
+        conditional=True,
+        etag=artifact.etag,
+        last_modified=artifact.created
+    )
+
 # 添加uploads文件下载路由
 @app.route('/uploads/<filename>')
 def download_uploaded_file(filename):
-    """下载uploads目录中的文件"""
+    """下载生成的文件（生成文件存储）或uploads目录中的文件"""
     try:
+        from core.tools.artifact_store import get_artifact_store
+        artifact = get_artifact_store().get(filename)
+        if artifact:
+            return send_stored_artifact(artifact)
+
         return send_from_directory(
             app.config['UPLOAD_FOLDER'],
             filename,
@@ -744,64 +767,30 @@ def generate_resume():
 def download_file(filename):
     """下载生成的文件"""
     try:
-        import tempfile
         import urllib.parse
+        from core.tools.artifact_store import get_artifact_store
 
         # URL解码文件名
         decoded_filename = urllib.parse.unquote(filename)
-
-        temp_dir = tempfile.gettempdir()
-        file_path = os.path.join(temp_dir, decoded_filename)
-
-        print(f"尝试下载文件: {decoded_filename}")
-        print(f"文件路径: {file_path}")
-        print(f"文件是否存在: {os.path.exists(file_path)}")
-
-        # 如果文件不存在，尝试查找类似的文件
-        if not os.path.exists(file_path):
-            # 列出临时目录中的所有文件
-            temp_files = []
-            try:
-                temp_files = os.listdir(temp_dir)
-                print(f"临时目录中的文件: {temp_files}")
-
-                # 查找包含关键词的文件
-                if '年度工作总结' in decoded_filename:
-                    matching_files = [f for f in temp_files if '年度工作总结' in f and f.endswith('.docx')]
-                elif '个人简历' in decoded_filename:
-                    matching_files = [f for f in temp_files if '个人简历' in f and f.endswith('.docx')]
-                else:
-                    matching_files = [f for f in temp_files if decoded_filename in f]
-
-                if matching_files:
-                    # 使用最新的文件
-                    matching_files.sort(reverse=True)
-                    actual_filename = matching_files[0]
-                    file_path = os.path.join(temp_dir, actual_filename)
-                    print(f"找到匹配文件: {actual_filename}")
-                else:
-                    print(f"未找到匹配文件，搜索关键词: {decoded_filename}")
-            except Exception as e:
-                print(f"列出临时目录文件失败: {e}")
-
-        if not os.path.exists(file_path):
+        store = get_artifact_store()
+        artifact = store.get(decoded_filename)
+
+        # 如果文件不存在，按类型查找最新生成的文件
+        if artifact is None:
+            if '年度工作总结' in decoded_filename:
+                artifact = store.find_latest('年度工作总结', '.docx')
+            elif '个人简历' in decoded_filename:
+                artifact = store.find_latest('个人简历', '.docx')
+            if artifact:
+                print(f"找到匹配文件: {artifact.filename}")
+
+        if artifact is None:
             return jsonify({
                 'success': False,
-                'error': f'文件不存在: {decoded_filename}',
-                'debug_info': {
-                    'temp_dir': temp_dir,
-                    'requested_file': decoded_filename,
-                    'file_path': file_path,
-                    'temp_files': temp_files[:10] if 'temp_files' in locals() else []
-                }
+                'error': f'文件不存在或已过期: {decoded_filename}'
             }), 404
 
-        return send_from_directory(
-            temp_dir,
-            os.path.basename(file_path),
-            as_attachment=True,
-            download_name=decoded_filename
-        )
+        return send_stored_artifact(artifact, decoded_filename)
 
     except Exception as e:
         return jsonify({
@@ -849,12 +838,12 @@ def export_smart_fill_result():
         print("✅ 参数验证通过，开始处理...")
 
         # 读取原始文件内容
-        import tempfile
-        temp_dir = tempfile.gettempdir()
-        original_file_path = os.path.join(temp_dir, filename)
+        from core.tools.artifact_store import get_artifact_store
+        original = get_artifact_store().get(filename)
+        original_file_path = original.path if original else None
 
         content = ""
-        if os.path.exists(original_file_path):
+        if original_file_path:
             try:
                 if filename.endswith('.docx'):
                     # 读取Word文档内容
@@ -871,19 +860,18 @@ def export_smart_fill_result():
                 print(f"❌ 读取原始文件失败: {e}")
                 content = f"读取原始文件失败: {str(e)}"
         else:
-            print(f"❌ 原始文件不存在: {original_file_path}")
+            print(f"❌ 原始文件不存在: {filename}")
             content = f"原始文件不存在: {filename}"
 
         # 生成新格式文件
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         new_filename = f"{result_type}_result_{timestamp}.{format_type}"
 
-        # 确保uploads目录存在
-        uploads_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
-        os.makedirs(uploads_dir, exist_ok=True)
-        new_file_path = os.path.join(uploads_dir, new_filename)
+        # 生成到内存，再放入生成文件存储
+        import io
+        buffer = io.BytesIO()
 
-        print(f"🔄 生成{format_type.upper()}文件: {new_file_path}")
+        print(f"🔄 生成{format_type.upper()}文件: {new_filename}")
 
         if format_type == 'docx':
             try:
@@ -900,7 +888,7 @@ def export_smart_fill_result():
                     if paragraph.strip():
                         doc.add_paragraph(paragraph.strip())
 
-                doc.save(new_file_path)
+                doc.save(buffer)
                 print(f"✅ DOCX文件生成成功")
 
             except ImportError as e:
@@ -922,7 +910,7 @@ def export_smart_fill_result():
                 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
                 from reportlab.lib.styles import getSampleStyleSheet
 
-                doc = SimpleDocTemplate(new_file_path, pagesize=A4)
+                doc = SimpleDocTemplate(buffer, pagesize=A4)
                 story = []
 
                 styles = getSampleStyleSheet()
@@ -961,8 +949,7 @@ def export_smart_fill_result():
         else:
             # TXT格式
             try:
-                with open(new_file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                buffer.write(content.encode('utf-8'))
                 print(f"✅ TXT文件生成成功")
             except Exception as e:
                 print(f"❌ TXT生成失败: {e}")
@@ -971,6 +958,7 @@ def export_smart_fill_result():
                     'error': f'TXT生成失败: {str(e)}'
                 }), 500
 
+        get_artifact_store().put(buffer.getvalue(), new_filename)
         print(f"🎉 文件生成完成: {new_filename}")
         return jsonify({
             'success': True,
@@ -1173,7 +1161,34 @@ def format_alignment_process():
             }), 500
 
         try:
-            # 处理第一个文件（简化处理）
+            # 多个文件：并发格式化，返回批量任务ID，可通过 stream 接口按完成顺序获取各文件结果
+            if len(files) > 1 or data.get('mode') == 'batch':
+                result = format_alignment_coordinator.start_batch_format_task(
+                    files,
+                    instruction=format_instruction,
+                    temperature=options.get('temperature', 0.7),
+                    max_tokens=options.get('max_tokens', 4000)
+                )
+                if not result.get('success'):
+                    return jsonify({
+                        'code': 1,
+                        'message': result.get('error', '格式化失败'),
+                        'data': None
+                    }), 500
+
+                return jsonify({
+                    'code': 0,
+                    'message': 'success',
+                    'data': {
+                        'task_id': result['task_id'],
+                        'mode': 'batch',
+                        'status': result['status'],
+                        'total': result['total'],
+                        'stream_url': f"/api/format-alignment/stream/{result['task_id']}",
+                        'estimated_time': 30 * ((result['total'] + result['concurrency'] - 1) // result['concurrency'])
+                    }
+                })
+
             file_content = files[0]['content']
 
             # 使用星火X1进行格式化
@@ -1240,8 +1255,26 @@ def format_alignment_result(task_id):
                 'processing_log': task_data.get('processing_log', ''),
             }
 
+            # 批量任务：汇总各文件状态，已完成的文件可以单独下载，全部完成后可下载合并文档
+            if task_data.get('type') == 'batch':
+                response_data.update({
+                    'mode': 'batch',
+                    'total': task_data['total'],
+                    'completed': task_data['completed'],
+                    'failed': task_data['failed'],
+                    'elapsed': round(task_data['elapsed'], 2),
+                    'files': [batch_file_info(entry) for entry in task_data['files']],
+                    'result_files': [batch_file_info(entry) for entry in task_data['files']
+                                     if entry['status'] == 'completed']
+                })
+                if task_data['status'] == 'completed':
+                    response_data['result_files'].append({
+                        'file_id': f"result_{task_id}",
+                        'filename': f"formatted_documents_{task_id}.txt",
+                        'download_url': f"/api/format-alignment/download/{task_id}"
+                    })
             # 如果任务完成，添加结果文件信息
-            if task_data['status'] == 'completed':
+            elif task_data['status'] == 'completed':
                 response_data['result_files'] = [
                     {
                         'file_id': f"result_{task_id}",
@@ -1269,6 +1302,66 @@ def format_alignment_result(task_id):
             'data': None
         }), 500
 
+def batch_file_info(entry):
+    """批量任务中单个文件的状态与下载信息"""
+    info = {
+        'file_id': entry['file_id'],
+        'filename': entry['filename'],
+        'status': entry['status'],
+        'task_id': entry['task_id'],
+        'error': entry['error']
+    }
+    if entry['status'] == 'completed':
+        info['download_url'] = f"/api/format-alignment/download/{entry['task_id']}"
+    return info
+
+@app.route('/api/format-alignment/stream/<task_id>', methods=['GET'])
+def format_alignment_stream(task_id):
+    """按完成顺序流式返回批量任务中各文件的结果（每行一个 JSON），最后一行为汇总"""
+    if format_alignment_coordinator is None:
+        return jsonify({
+            'code': 1,
+            'message': '格式对齐协调器未初始化',
+            'data': None
+        }), 500
+
+    result = format_alignment_coordinator.get_task_result(task_id)
+    if not result.get('success') or result.get('type') != 'batch':
+        return jsonify({
+            'code': 1,
+            'message': result.get('error', f'批量任务 {task_id} 不存在'),
+            'data': None
+        }), 404
+
+    include_content = request.args.get('include_content', 'false').lower() == 'true'
+    timeout = request.args.get('timeout', 300, type=float)
+
+    def generate():
+        for item in format_alignment_coordinator.iter_batch_results(task_id, timeout=timeout):
+            event = {'event': 'file', 'completed': item['completed'], 'total': item['total'],
+                     **batch_file_info(item)}
+            if include_content and item['status'] == 'completed':
+                file_result = format_alignment_coordinator.get_task_result(item['task_id'])
+                event['formatted_content'] = file_result.get('formatted_content', '')
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+
+        summary = format_alignment_coordinator.get_task_result(task_id)
+        yield json.dumps({
+            'event': 'summary',
+            'task_id': task_id,
+            'status': summary['status'],
+            'total': summary['total'],
+            'completed': summary['completed'],
+            'failed': summary['failed'],
+            'elapsed': round(summary['elapsed'], 2),
+            'download_url': f"/api/format-alignment/download/{task_id}"
+        }, ensure_ascii=False) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # 格式模板管理API（文风统一模块使用）
 @app.route('/api/format-templates', methods=['GET'])
 def get_format_templates_for_style():
@@ -1449,6 +1542,8 @@ def format_alignment_download(task_id):
     try:
         # 获取文件格式参数
         file_format = request.args.get('format', 'txt').lower()
+        if file_format not in ('docx', 'html', 'pdf'):
+            file_format = 'txt'
 
         # 使用全局格式对齐协调器
         if format_alignment_coordinator is None:
@@ -1461,24 +1556,29 @@ def format_alignment_download(task_id):
         # 获取任务结果
         result = format_alignment_coordinator.get_task_result(task_id)
 
-        if result.get('success'):
+        if result.get('success') and result.get('type') == 'batch':
+            # 批量任务：已完成的文件按上传顺序合并为一个文档
+            sections = []
+            for entry in result['files']:
+                if entry['status'] == 'completed':
+                    file_result = format_alignment_coordinator.get_task_result(entry['task_id'])
+                    sections.append(f"# {entry['filename']}\n\n{file_result.get('formatted_content', '')}")
+            formatted_content = '\n\n'.join(sections)
+
+            from core.tools.export_engine import get_export_engine
+            artifact = get_export_engine().export(
+                formatted_content, file_format, template='document',
+                build=lambda: build_formatted_document(formatted_content))
+            return send_export_artifact(artifact, f'formatted_documents_{task_id}')
+        elif result.get('success'):
             formatted_content = result.get('formatted_content', '')
 
-            if file_format == 'docx':
-                # 生成Word格式文件
-                return generate_word_document(formatted_content, task_id)
-            elif file_format == 'html':
-                # 生成HTML格式文件
-                return generate_html_document(formatted_content, task_id)
-            elif file_format == 'pdf':
-                # 生成PDF格式文件
-                return generate_pdf_document(formatted_content, task_id)
-            else:
-                # 默认生成文本文件
-                response = make_response(formatted_content)
-                response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-                response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.txt'
-                return response
+            # 同一结果的重复下载直接使用导出缓存，渲染失败时导出引擎会回退到 html / txt
+            from core.tools.export_engine import get_export_engine
+            artifact = get_export_engine().export(
+                formatted_content, file_format, template='document',
+                build=lambda: build_formatted_document(formatted_content))
+            return send_export_artifact(artifact, f'formatted_document_{task_id}')
         else:
             return jsonify({
                 'code': 1,
@@ -1493,254 +1593,27 @@ def format_alignment_download(task_id):
             'data': None
         }), 500
 
-def generate_word_document(content, task_id):
-    """生成Word文档"""
-    try:
-        from docx import Document
-        from docx.shared import Inches
-        import io
-
-        # 创建Word文档
-        doc = Document()
-
-        # 添加标题
-        doc.add_heading('格式化文档', 0)
-
-        # 处理内容，按行分割并添加到文档
-        lines = content.split('\n')
-        current_paragraph = None
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # 检查是否是标题
-            if line.startswith('#'):
-                level = len(line) - len(line.lstrip('#'))
-                title_text = line.lstrip('#').strip()
-                doc.add_heading(title_text, level)
-            elif line.startswith('##'):
-                doc.add_heading(line[2:].strip(), 2)
-            elif line.startswith('#'):
-                doc.add_heading(line[1:].strip(), 1)
-            else:
-                # 普通段落
-                doc.add_paragraph(line)
-
-        # 保存到内存
-        doc_io = io.BytesIO()
-        doc.save(doc_io)
-        doc_io.seek(0)
-
-        # 创建响应
-        response = make_response(doc_io.getvalue())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.docx'
-
-        return response
-
-    except ImportError:
-        # 如果没有安装python-docx，回退到文本格式
-        response = make_response(content)
-        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.txt'
-        return response
-    except Exception as e:
-        # 出错时回退到文本格式
-        response = make_response(content)
-        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.txt'
-        return response
-
-def generate_html_document(content, task_id):
-    """生成HTML文档"""
-    try:
-        # 将Markdown格式的内容转换为HTML
-        html_content = markdown_to_html(content)
-
-        # 创建完整的HTML文档
-        full_html = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>格式化文档</title>
-    <style>
-        body {{
-            font-family: 'Microsoft YaHei', Arial, sans-serif;
-            line-height: 1.6;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            color: #333;
-        }}
-        h1, h2, h3, h4, h5, h6 {{
-            color: #2c3e50;
-            margin-top: 30px;
-            margin-bottom: 15px;
-        }}
-        h1 {{ font-size: 2.5em; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
-        h2 {{ font-size: 2em; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }}
-        h3 {{ font-size: 1.5em; }}
-        p {{ margin-bottom: 15px; text-align: justify; }}
-        ul, ol {{ margin-bottom: 15px; padding-left: 30px; }}
-        li {{ margin-bottom: 5px; }}
-        .header {{ text-align: center; margin-bottom: 40px; }}
-        .footer {{ text-align: center; margin-top: 40px; color: #7f8c8d; font-size: 0.9em; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>格式化文档</h1>
-        <p>生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-    </div>
-    <div class="content">
-        {html_content}
-    </div>
-    <div class="footer">
-        <p>由 aiDoc 智能文档处理系统生成</p>
-    </div>
-</body>
-</html>"""
-
-        # 创建响应
-        response = make_response(full_html)
-        response.headers['Content-Type'] = 'text/html; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.html'
-
-        return response
-
-    except Exception as e:
-        # 出错时回退到文本格式
-        response = make_response(content)
-        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.txt'
-        return response
-
-def markdown_to_html(content):
-    """将Markdown格式的内容转换为HTML"""
-    import re
-
-    # 简单的Markdown到HTML转换
-    html = content
-
-    # 转换标题
-    html = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-
-    # 转换段落
-    paragraphs = html.split('\n\n')
-    html_paragraphs = []
-
-    for para in paragraphs:
-        para = para.strip()
-        if para:
-            # 检查是否已经是HTML标签
-            if not (para.startswith('<') and para.endswith('>')):
-                # 处理列表
-                if para.startswith('- ') or para.startswith('* '):
-                    items = para.split('\n')
-                    list_html = '<ul>\n'
-                    for item in items:
-                        if item.strip().startswith(('- ', '* ')):
-                            list_html += f'<li>{item.strip()[2:]}</li>\n'
-                    list_html += '</ul>'
-                    html_paragraphs.append(list_html)
-                elif re.match(r'^\d+\. ', para):
-                    items = para.split('\n')
-                    list_html = '<ol>\n'
-                    for item in items:
-                        if re.match(r'^\d+\. ', item.strip()):
-                            list_html += f'<li>{re.sub(r"^\d+\. ", "", item.strip())}</li>\n'
-                    list_html += '</ol>'
-                    html_paragraphs.append(list_html)
-                else:
-                    # 普通段落
-                    html_paragraphs.append(f'<p>{para}</p>')
-            else:
-                html_paragraphs.append(para)
-
-    return '\n'.join(html_paragraphs)
-
-def generate_pdf_document(content, task_id):
-    """生成PDF文档"""
-    try:
-        # 尝试使用reportlab生成PDF
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-        import io
-
-        # 创建PDF文档
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-
-        # 获取样式
-        styles = getSampleStyleSheet()
-
-        # 创建内容
-        story = []
-
-        # 添加标题
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1  # 居中
-        )
-        story.append(Paragraph('格式化文档', title_style))
-        story.append(Spacer(1, 20))
-
-        # 处理内容
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                story.append(Spacer(1, 12))
-                continue
-
-            if line.startswith('###'):
-                style = styles['Heading3']
-                text = line[3:].strip()
-            elif line.startswith('##'):
-                style = styles['Heading2']
-                text = line[2:].strip()
-            elif line.startswith('#'):
-                style = styles['Heading1']
-                text = line[1:].strip()
-            else:
-                style = styles['Normal']
-                text = line
-
-            story.append(Paragraph(text, style))
-            story.append(Spacer(1, 6))
-
-        # 构建PDF
-        doc.build(story)
-
-        # 创建响应
-        buffer.seek(0)
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.pdf'
-
-        return response
-
-    except ImportError:
-        # 如果没有安装reportlab，回退到HTML格式
-        return generate_html_document(content, task_id)
-    except Exception as e:
-        # 出错时回退到文本格式
-        response = make_response(content)
-        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename=formatted_document_{task_id}.txt'
-        return response
+def build_formatted_document(content):
+    """格式对齐结果 → 导出中间表示（结果按内容缓存，不写入生成时间）"""
+    from core.tools.export_engine import ExportDocument, parse_markdown
+
+    return ExportDocument(
+        title='格式化文档',
+        blocks=parse_markdown(content),
+        template='document',
+        footer='由 aiDoc 智能文档处理系统生成'
+    )
+
+def send_export_artifact(artifact, download_name):
+    """返回导出文件（支持 Range / 条件请求），扩展名以实际导出格式为准"""
+    return send_file(
+        artifact.path,
+        mimetype=artifact.mimetype,
+        as_attachment=True,
+        download_name=f'{download_name}{artifact.extension}',
+        conditional=True,
+        etag=artifact.key
+    )
 
 @app.route('/api/format-alignment/continue', methods=['POST'])
 def format_alignment_continue():
@@ -1990,7 +1863,8 @@ def analyze_document():
                     'document_length': result.get('document_length', 0),
                     'processing_time': result.get('processing_time', 0),
                     'review_type': result.get('review_type', review_type),
-                    'chunks_count': result.get('chunks_count', 1)
+                    'chunks_count': result.get('chunks_count', 1),
+                    'reviewed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 }
             })
         else:
@@ -2032,42 +1906,15 @@ def get_review_templates():
 @app.route('/api/document-review/export-pdf', methods=['POST'])
 def export_review_report_pdf():
     """导出PDF格式审查报告"""
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': '请求数据为空'
-            }), 400
-
-        review_data = data.get('review_data', {})
-        filename = data.get('filename', 'document_review_report')
-
-        if not review_data or not review_data.get('review_result'):
-            return jsonify({
-                'success': False,
-                'error': '审查结果数据为空'
-            }), 400
-
-        # 生成PDF内容
-        pdf_content = generate_pdf_report(review_data, filename)
-
-        # 创建响应
-        response = make_response(pdf_content)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
-
-        return response
-
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'PDF导出失败: {str(e)}'
-        }), 500
+    return export_review_report('pdf', 'PDF')
 
 @app.route('/api/document-review/export-word', methods=['POST'])
 def export_review_report_word():
     """导出Word格式审查报告"""
+    return export_review_report('docx', 'Word')
+
+def export_review_report(file_format, format_label):
+    """导出审查报告（同一份审查结果重复导出时直接使用导出缓存）"""
     try:
         data = request.get_json()
         if not data:
@@ -2085,299 +1932,45 @@ def export_review_report_word():
                 'error': '审查结果数据为空'
             }), 400
 
-        # 生成Word内容
-        word_content = generate_word_report(review_data, filename)
-
-        # 创建响应
-        response = make_response(word_content)
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        response.headers['Content-Disposition'] = f'attachment; filename="{filename}.docx"'
-
-        return response
+        from core.tools.export_engine import get_export_engine
+        artifact = get_export_engine().export(
+            review_data, file_format, template='report',
+            build=lambda: build_review_report(review_data))
+        return send_export_artifact(artifact, filename)
 
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': f'Word导出失败: {str(e)}'
+            'error': f'{format_label}导出失败: {str(e)}'
         }), 500
 
-def generate_pdf_report(review_data, filename):
-    """生成PDF报告"""
-    # @AI-Generated: 2025-01-25, Confidence: 0.99, Model: Claude Sonnet 4, Prompt: generate_pdf_report
-    try:
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-        import io
-        from datetime import datetime
-
-        # 创建内存缓冲区
-        buffer = io.BytesIO()
-
-        # 创建PDF文档
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1*inch)
-
-        # 获取样式
-        styles = getSampleStyleSheet()
-
-        # 创建自定义样式
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1  # 居中
-        )
-
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            textColor=colors.darkblue
-        )
-
-        # 构建文档内容
-        story = []
-
-        # 标题
-        story.append(Paragraph("📋 AI文档审查报告", title_style))
-        story.append(Spacer(1, 20))
-
-        # 元数据表格
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        meta_data = [
-            ['生成时间', timestamp],
-            ['文档长度', f"{review_data.get('document_length', 0)} 字符"],
-            ['处理时间', f"{review_data.get('processing_time', 0):.2f} 秒"],
-        ]
-
-        if review_data.get('chunks_count', 1) > 1:
-            meta_data.append(['分块处理', f"{review_data.get('chunks_count')} 个块"])
-
-        meta_table = Table(meta_data, colWidths=[2*inch, 3*inch])
-        meta_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-
-        story.append(meta_table)
-        story.append(Spacer(1, 30))
-
-        # 审查结果内容
-        story.append(Paragraph("审查结果", heading_style))
-        story.append(Spacer(1, 12))
-
-        # 处理审查结果文本
-        review_content = review_data.get('review_result', '')
-
-        # 简单的Markdown到PDF转换
-        lines = review_content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                story.append(Spacer(1, 6))
-                continue
-
-            if line.startswith('# '):
-                # 一级标题
-                story.append(Paragraph(line[2:], heading_style))
-                story.append(Spacer(1, 12))
-            elif line.startswith('## '):
-                # 二级标题
-                sub_heading_style = ParagraphStyle(
-                    'SubHeading',
-                    parent=styles['Heading3'],
-                    fontSize=12,
-                    spaceAfter=8,
-                    textColor=colors.darkgreen
-                )
-                story.append(Paragraph(line[3:], sub_heading_style))
-                story.append(Spacer(1, 8))
-            elif line.startswith('- ') or line.startswith('* '):
-                # 列表项
-                list_style = ParagraphStyle(
-                    'ListItem',
-                    parent=styles['Normal'],
-                    leftIndent=20,
-                    spaceAfter=4
-                )
-                story.append(Paragraph(f"• {line[2:]}", list_style))
-            else:
-                # 普通段落
-                story.append(Paragraph(line, styles['Normal']))
-                story.append(Spacer(1, 6))
-
-        # 页脚
-        story.append(Spacer(1, 30))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=1  # 居中
-        )
-        story.append(Paragraph("本报告由aiDoc AI文档审查系统生成 | 基于讯飞星火X1大模型", footer_style))
-
-        # 构建PDF
-        doc.build(story)
-
-        # 获取PDF内容
-        pdf_content = buffer.getvalue()
-        buffer.close()
-
-        return pdf_content
-
-    except ImportError:
-        # 如果没有安装reportlab，返回简单的文本文件
-        content = f"""AI文档审查报告
-
-生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-文档长度: {review_data.get('document_length', 0)} 字符
-处理时间: {review_data.get('processing_time', 0):.2f} 秒
-
-审查结果:
-{review_data.get('review_result', '')}
-
-本报告由aiDoc AI文档审查系统生成 | 基于讯飞星火X1大模型
-"""
-        return content.encode('utf-8')
-    except Exception as e:
-        # 发生错误时返回简单的文本内容
-        content = f"""AI文档审查报告 (简化版)
-
-生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-错误信息: PDF生成失败 - {str(e)}
-
-审查结果:
-{review_data.get('review_result', '')}
-"""
-        return content.encode('utf-8')
-
-def generate_word_report(review_data, filename):
-    """生成Word报告"""
-    # @AI-Generated: 2025-01-25, Confidence: 0.99, Model: Claude Sonnet 4, Prompt: generate_word_report
-    try:
-        from docx import Document
-        from docx.shared import Inches, Pt
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        from docx.oxml.shared import OxmlElement, qn
-        import io
-        from datetime import datetime
-
-        # 创建Word文档
-        doc = Document()
-
-        # 设置文档标题
-        title = doc.add_heading('📋 AI文档审查报告', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        # 添加元数据表格
-        doc.add_heading('报告信息', level=1)
-
-        table = doc.add_table(rows=3, cols=2)
-        table.style = 'Table Grid'
-
-        # 填充表格数据
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        table_data = [
-            ('生成时间', timestamp),
-            ('文档长度', f"{review_data.get('document_length', 0)} 字符"),
-            ('处理时间', f"{review_data.get('processing_time', 0):.2f} 秒"),
-        ]
-
-        for i, (key, value) in enumerate(table_data):
-            table.cell(i, 0).text = key
-            table.cell(i, 1).text = value
-
-        # 如果有分块处理，添加额外行
-        if review_data.get('chunks_count', 1) > 1:
-            row = table.add_row()
-            row.cells[0].text = '分块处理'
-            row.cells[1].text = f"{review_data.get('chunks_count')} 个块"
-
-        # 添加审查结果
-        doc.add_heading('审查结果', level=1)
-
-        # 处理审查结果文本
-        review_content = review_data.get('review_result', '')
-        lines = review_content.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            if line.startswith('# '):
-                # 一级标题
-                doc.add_heading(line[2:], level=1)
-            elif line.startswith('## '):
-                # 二级标题
-                doc.add_heading(line[3:], level=2)
-            elif line.startswith('### '):
-                # 三级标题
-                doc.add_heading(line[4:], level=3)
-            elif line.startswith('- ') or line.startswith('* '):
-                # 列表项
-                p = doc.add_paragraph()
-                p.style = 'List Bullet'
-                p.add_run(line[2:])
-            elif line.startswith('**') and line.endswith('**'):
-                # 粗体文本
-                p = doc.add_paragraph()
-                p.add_run(line[2:-2]).bold = True
-            else:
-                # 普通段落
-                doc.add_paragraph(line)
-
-        # 添加页脚
-        doc.add_paragraph()
-        footer = doc.add_paragraph('本报告由aiDoc AI文档审查系统生成 | 基于讯飞星火X1大模型')
-        footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        footer.runs[0].font.size = Pt(8)
-
-        # 保存到内存缓冲区
-        buffer = io.BytesIO()
-        doc.save(buffer)
-        buffer.seek(0)
-
-        return buffer.getvalue()
-
-    except ImportError:
-        # 如果没有安装python-docx，返回简单的文本文件
-        content = f"""AI文档审查报告
-
-生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-文档长度: {review_data.get('document_length', 0)} 字符
-处理时间: {review_data.get('processing_time', 0):.2f} 秒
-
-审查结果:
-{review_data.get('review_result', '')}
-
-本报告由aiDoc AI文档审查系统生成 | 基于讯飞星火X1大模型
-"""
-        return content.encode('utf-8')
-    except Exception as e:
-        # 发生错误时返回简单的文本内容
-        content = f"""AI文档审查报告 (简化版)
-
-生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-错误信息: Word生成失败 - {str(e)}
-
-审查结果:
-{review_data.get('review_result', '')}
-"""
-        return content.encode('utf-8')
+def build_review_report(review_data):
+    """审查结果 → 导出中间表示"""
+    from core.tools.export_engine import ExportDocument, ExportBlock, parse_markdown
+
+    # 报告按 review_data 缓存，只写入审查数据自带的审查时间，不写入导出时刻
+    meta_rows = [
+        ['文档长度', f"{review_data.get('document_length', 0)} 字符"],
+        ['处理时间', f"{review_data.get('processing_time', 0):.2f} 秒"],
+    ]
+    if review_data.get('reviewed_at'):
+        meta_rows.insert(0, ['审查时间', review_data['reviewed_at']])
+    if review_data.get('chunks_count', 1) > 1:
+        meta_rows.append(['分块处理', f"{review_data.get('chunks_count')} 个块"])
+
+    blocks = [
+        ExportBlock('heading', '报告信息', level=1),
+        ExportBlock('table', rows=meta_rows),
+        ExportBlock('heading', '审查结果', level=1),
+    ]
+    blocks.extend(parse_markdown(review_data.get('review_result', '')))
+
+    return ExportDocument(
+        title='📋 AI文档审查报告',
+        blocks=blocks,
+        template='report',
+        footer='本报告由aiDoc AI文档审查系统生成 | 基于讯飞星火X1大模型'
+    )
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+版面模型 ONNX 导出工具
+
+把 layout_analyzer 配置的 Detectron2 版面模型导出为 ONNX，做 int8 动态量化，
+并可在一组样例图片上对照原模型检查精度与耗时，供 layout_analyzer.model_type: "onnx" 使用。
+
+使用方法:
+    python tools/export_layout_onnx.py --help
+    python tools/export_layout_onnx.py --export
+    python tools/export_layout_onnx.py --check tests/fixtures/layout
+    python tools/export_layout_onnx.py --export --check tests/fixtures/layout --min-recall 0.95
+
+Author: AI Assistant
+Created: 2025-01-28
+License: MIT
+"""
+
+import sys
+import os
+import copy
+import time
+import argparse
+from typing import Dict, Any, List, Tuple
+
+# 添加 src 目录到Python路径（与 src 下模块的导入方式一致）
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='版面模型 ONNX 导出 / 量化 / 精度检查工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  导出并量化（输出路径取配置中的 onnx_model_path）:
+    python tools/export_layout_onnx.py --export
+
+  在样例图片上对照 hf 模型检查 ONNX 模型:
+    python tools/export_layout_onnx.py --check tests/fixtures/layout
+        """
+    )
+
+    parser.add_argument('--config', '-c', type=str, default='config/config.yaml',
+                       help='配置文件路径')
+
+    parser.add_argument('--export', '-e', action='store_true',
+                       help='导出 ONNX 并做 int8 动态量化')
+
+    parser.add_argument('--output', '-o', type=str,
+                       help='量化模型输出路径（默认使用 layout_analyzer.onnx_model_path）')
+
+    parser.add_argument('--sample', '-s', type=str,
+                       help='导出时用于追踪的样例图片（默认取 --check 目录中的第一张）')
+
+    parser.add_argument('--opset', type=int, default=16,
+                       help='ONNX opset 版本')
+
+    parser.add_argument('--check', type=str, metavar='FIXTURE_DIR',
+                       help='在样例图片目录上对照 hf 模型检查 ONNX 模型精度')
+
+    parser.add_argument('--iou', type=float, default=0.5,
+                       help='判定同一区块的 IoU 阈值')
+
+    parser.add_argument('--min-recall', type=float, default=0.95,
+                       help='召回率低于该值时以非零状态退出')
+
+    args = parser.parse_args()
+
+    if not args.export and not args.check:
+        parser.print_help()
+        return 0
+
+    from utils import load_config
+    config = load_config(args.config)
+    layout_config = config.setdefault('layout_analyzer', {})
+    output_path = args.output or layout_config.get('onnx_model_path', 'models/layout_onnx/layout_int8.onnx')
+
+    if args.export:
+        sample = args.sample or (_list_images(args.check)[0] if args.check and _list_images(args.check) else None)
+        if not sample:
+            print("❌ 导出需要一张样例图片（--sample 或 --check 目录）")
+            return 1
+        export_onnx(config, sample, output_path, args.opset)
+
+    if args.check:
+        layout_config['onnx_model_path'] = output_path
+        report = check_accuracy(config, args.check, args.iou)
+        if report['recall'] < args.min_recall:
+            print(f"❌ 召回率 {report['recall']:.3f} 低于要求 {args.min_recall:.3f}")
+            return 1
+        print("✅ ONNX 模型精度检查通过")
+    return 0
+
+
+def export_onnx(config: Dict[str, Any], sample_path: str, output_path: str, opset: int):
+    """用 TracingAdapter 导出 Detectron2 模型，再做 int8 动态量化"""
+    import cv2
+    import torch
+    from detectron2.export import TracingAdapter
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from layout_analyzer import LayoutAnalyzer
+    from onnx_layout_model import resize_shortest_edge
+
+    hf_config = copy.deepcopy(config)
+    hf_config['layout_analyzer'].update(model_type='hf', enforce_cpu=True)
+    layout_config = hf_config['layout_analyzer']
+    model = LayoutAnalyzer(hf_config).model.model.model  # layoutparser → DefaultPredictor → torch 模型
+    model.eval()
+
+    # 与 LayoutAnalyzer / OnnxLayoutModel 相同的输入：RGB 数组按原通道顺序送入
+    image = cv2.imread(sample_path)[..., ::-1]
+    resized, _, _ = resize_shortest_edge(
+        image, layout_config.get('onnx_min_size', 800), layout_config.get('onnx_max_size', 1333))
+    tensor = torch.as_tensor(resized.astype('float32').transpose(2, 0, 1))
+
+    def inference(model, inputs):
+        instances = model.inference(inputs, do_postprocess=False)[0]
+        return [{"instances": instances}]
+
+    adapter = TracingAdapter(model, [{"image": tensor}], inference)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    fp32_path = os.path.splitext(output_path)[0] + '_fp32.onnx'
+
+    print(f"📦 导出 ONNX: {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(adapter, adapter.flattened_inputs, fp32_path, opset_version=opset,
+                          input_names=['image'], dynamic_axes={'image': {1: 'height', 2: 'width'}})
+
+    print(f"🔧 int8 动态量化: {output_path}")
+    quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+    print(f"   大小: {os.path.getsize(fp32_path) / 1e6:.1f} MB → {os.path.getsize(output_path) / 1e6:.1f} MB")
+
+
+def check_accuracy(config: Dict[str, Any], fixture_dir: str, iou_threshold: float) -> Dict[str, float]:
+    """在样例图片上对照两个后端：以 hf 结果为基准，按类型 + IoU 贪心匹配"""
+    import cv2
+    from layout_analyzer import LayoutAnalyzer
+
+    analyzers = {}
+    for model_type in ('hf', 'onnx'):
+        backend_config = copy.deepcopy(config)
+        backend_config['layout_analyzer']['model_type'] = model_type
+        analyzers[model_type] = LayoutAnalyzer(backend_config)
+
+    images = _list_images(fixture_dir)
+    if not images:
+        raise ValueError(f"样例目录中没有图片: {fixture_dir}")
+
+    matched = expected = predicted = 0
+    ious: List[float] = []
+    elapsed = {'hf': 0.0, 'onnx': 0.0}
+    print(f"🔍 检查 {len(images)} 张样例图片...")
+    for path in images:
+        image = cv2.imread(path)
+        layouts = {}
+        for model_type, analyzer in analyzers.items():
+            start = time.time()
+            layouts[model_type] = analyzer._detect(image)
+            elapsed[model_type] += time.time() - start
+
+        reference = [(b.type, b.coordinates) for b in layouts['hf']]
+        candidates = [(b.type, b.coordinates) for b in layouts['onnx']]
+        page_ious = _match_blocks(reference, candidates, iou_threshold)
+        matched += len(page_ious)
+        expected += len(reference)
+        predicted += len(candidates)
+        ious.extend(page_ious)
+        print(f"   {os.path.basename(path)}: hf {len(reference)} / onnx {len(candidates)} / 匹配 {len(page_ious)}")
+
+    report = {
+        'precision': matched / predicted if predicted else 1.0,
+        'recall': matched / expected if expected else 1.0,
+        'mean_iou': sum(ious) / len(ious) if ious else 0.0,
+    }
+    print(f"📊 precision={report['precision']:.3f} recall={report['recall']:.3f} "
+          f"mean_iou={report['mean_iou']:.3f}")
+    print(f"⏱️ 平均耗时: hf {elapsed['hf'] / len(images) * 1000:.0f} ms / "
+          f"onnx {elapsed['onnx'] / len(images) * 1000:.0f} ms")
+    return report
+
+
+def _match_blocks(reference: List[Tuple[str, tuple]], candidates: List[Tuple[str, tuple]],
+                  iou_threshold: float) -> List[float]:
+    """同类型区块按 IoU 从高到低一对一匹配，返回匹配对的 IoU"""
+    pairs = sorted(
+        ((_iou(ref[1], cand[1]), i, j)
+         for i, ref in enumerate(reference) for j, cand in enumerate(candidates) if ref[0] == cand[0]),
+        reverse=True)
+    used_ref, used_cand, ious = set(), set(), []
+    for iou, i, j in pairs:
+        if iou < iou_threshold:
+            break
+        if i in used_ref or j in used_cand:
+            continue
+        used_ref.add(i)
+        used_cand.add(j)
+        ious.append(iou)
+    return ious
+
+
+def _iou(a: tuple, b: tuple) -> float:
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _list_images(directory: str) -> List[str]:
+    if not directory or not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.lower().endswith(IMAGE_EXTENSIONS)]
+
+
+if __name__ == "__main__":
+    sys.exit(main())